@@ -1,81 +1,175 @@
 # api_routes.py
 
-from flask import Blueprint, request, jsonify
-from groq import Groq  # OpenAI yerine Groq import ediyoruz
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import json
-import re
 
 # config.py'den sadece gerekli olanı (anahtar ve database utility'leri) içeri aktar.
 from config import Config
-from database_utils import load_perfume_database, find_matching_perfumes, highlight_matching_notes
+from database_utils import highlight_matching_notes
+from catalog_store import get_catalog_snapshot
+from facet_index import SearchFilters
+from note_query import NoteQuery
+from query_cache import get_query_cache
+import note_extraction
+from scoring import SIMILARITY_METRICS, TierWeights
+from metrics import EXTRACTIONS, lap
 
 # Blueprint oluşturma: Rotaları organize etmenin Flask'taki yolu
 api = Blueprint('api', __name__)
 
-# 🔑 GROQ CLIENT BAŞLATMA
-# client objesi, bu dosya yüklendiği anda Config'den alınan anahtarla başlatılır.
-try:
-    client = Groq(api_key=Config.GROQ_API_KEY)
-except Exception as e:
-    # Başlatma başarısız olursa, bir placeholder istemci kullanın veya loglayın.
-    print(f"ERROR: Groq client could not be initialized globally: {e}") 
-    client = None 
+def _parse_positive_int(value, default, maximum=None):
+    """İstekten gelen sayfa parametrelerini güvenli şekilde tam sayıya çevirir."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    if value < 1:
+        return default
+    return min(value, maximum) if maximum else value
+
+NOTE_TIERS = ('top_notes', 'heart_notes', 'base_notes', 'all_notes')
+
+def _perfume_to_json(perfume, similarity, matched, total, note_match):
+    """Bir eşleşmeyi HTML yerine yapılandırılmış veri olarak döndürür (format=json)."""
+    item = {
+        "id": perfume.get('source_url', ''),
+        "brand": perfume.get('brand', 'Unknown'),
+        "fragrance": perfume.get('fragrance', 'Unknown'),
+        "concentration": perfume.get('concentration', ''),
+        "year": perfume.get('year'),
+        "similarity": similarity,
+        "matched": matched,
+        "total": total,
+        # Puanlamada hesaplanan maske kullanılır, eşleşme tekrar hesaplanmaz
+        "matched_note_indices": note_match.perfume_mask(perfume),
+    }
+    for tier in NOTE_TIERS:
+        item[tier] = perfume.get(tier, [])
+    return item
+
+def _json_page(query, matching_perfumes, total_matches, page, page_size, note_match=None, facets=None):
+    """format=json yanıt gövdesi: notalar, sayfa bilgisi, sayfadaki parfümler ve facet sayımları."""
+    return {
+        "notes": query.notes,
+        "required_notes": query.required,
+        "excluded_notes": query.excluded,
+        "perfumes": [_perfume_to_json(*match, note_match) for match in matching_perfumes],
+        "total": total_matches,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": -(-total_matches // page_size),
+        "facets": facets or {},
+    }
+
+def _error_response(as_json, message):
+    """Hata yanıtı: format=json için sade mesaj, aksi halde eski HTML 'reply' alanı."""
+    if as_json:
+        return jsonify({"error": message})
+    return jsonify({"reply": f"<h3>Error</h3><p>{message}</p>"})
+
+def _parse_search_request(data):
+    """
+    /analyze_comment ve /analyze_comment/stream için ortak istek parametreleri.
+    (parametreler, hata_mesajı) döndürür; hata yoksa hata_mesajı None'dır.
+    """
+    known_notes = data.get("notes")
+    params = {
+        "text": data.get("text", ""),
+        # Sunucu tarafı sayfalama parametreleri
+        "page": _parse_positive_int(data.get("page"), 1),
+        "page_size": _parse_positive_int(data.get("page_size"), Config.DEFAULT_PAGE_SIZE, Config.MAX_PAGE_SIZE),
+        "known_notes": known_notes if isinstance(known_notes, list) else None,
+        "metric": data.get("metric", Config.SIMILARITY_METRIC),
+        "extraction_mode": data.get("extraction_mode", Config.EXTRACTION_MODE),
+        "filters": None,
+        # Zorunlu / hariç tutulan notalar (yorumdan çıkarılanlara eklenir; bkz. note_query.NoteQuery)
+        "constraints": None,
+        # 'tiered' metriğinde kademe ağırlıkları (bkz. scoring.TierWeights)
+        "tier_weights": None,
+    }
+
+    try:
+        params["constraints"] = NoteQuery.from_request(
+            None, data.get("required_notes"), data.get("excluded_notes"))
+        params["tier_weights"] = TierWeights.from_request(data.get("tier_weights"), Config.TIER_WEIGHTS)
+    except ValueError as e:
+        return params, str(e)
+
+    # Marka / yıl aralığı / konsantrasyon filtreleri (bkz. facet_index.SearchFilters)
+    try:
+        params["filters"] = SearchFilters.from_request(data.get("filters"))
+    except ValueError as e:
+        return params, str(e)
+
+    if params["metric"] not in SIMILARITY_METRICS:
+        return params, f"Unknown similarity metric. Choose one of: {', '.join(SIMILARITY_METRICS)}."
+
+    if params["extraction_mode"] not in note_extraction.EXTRACTION_MODES:
+        return params, f"Unknown extraction mode. Choose one of: {', '.join(note_extraction.EXTRACTION_MODES)}."
+
+    # Eğer global client başlatılamadıysa hemen hata döndür (yerel modlar LLM'siz de çalışır)
+    if note_extraction.client is None and params["known_notes"] is None and params["extraction_mode"] == 'llm':
+        return params, "LLM client could not be established during application startup."
+
+    if not params["text"] and params["known_notes"] is None:
+        return params, "Please enter a comment."
+
+    return params, None
+
+def _extract_request_notes(params):
+    """
+    İsteğin nota sorgusunu (NoteQuery) döndürür: sonraki sayfalar için istemci daha önce çıkarılan
+    notaları geri gönderir, böylece sayfa değiştirmek yeni bir LLM çağrısı gerektirmez.
+    İstekte verilen zorunlu/hariç notalar çıkarılanlara eklenir.
+    """
+    constraints = params["constraints"]
+    if params["known_notes"] is not None:
+        query = NoteQuery([str(note) for note in params["known_notes"]])
+    else:
+        query = note_extraction.extract_notes_with_mode(
+            params["text"], params["extraction_mode"], get_catalog_snapshot().local_extractor)
+        EXTRACTIONS.inc(result="notes" if query.notes else "empty")
+    return query.with_constraints(constraints.required, constraints.excluded)
+
+def _constraints_html(query):
+    """Zorunlu/hariç notaların HTML satırları (yoksa boş)."""
+    html = ""
+    if query.required:
+        html += f"<p>Must have: {', '.join(query.required)}</p>"
+    if query.excluded:
+        html += f"<p>Excluded: {', '.join(query.excluded)}</p>"
+    return html
 
 @api.route("/analyze_comment", methods=["POST"])
 def analyze_comment():
     data = request.json
-    text = data.get("text", "")
-
-    # Eğer global client başlatılamadıysa hemen hata döndür
-    if client is None:
-        return jsonify({"reply": "<h3>Error</h3><p>Groq client could not be established during application startup.</p>"})
-    
-    if not text:
-        return jsonify({"reply": "<h3>Error</h3><p>Please enter a comment.</p>"})
+
+    # format=json: HTML yerine yapılandırılmış veri döner, arayüz kendisi çizer
+    as_json = data.get("format") == "json"
+
+    params, error = _parse_search_request(data)
+    if error:
+        return _error_response(as_json, error)
+    page, page_size, metric = params["page"], params["page_size"], params["metric"]
+    lap("parse")
         
     try:
-        # 1️⃣ Groq ile notaları çıkar (SADECE İNGİLİZCE)
-        system_prompt = """You are a perfume expert. Analyze the user's comment.
-Extract the perfume notes from the comment and return them **only in English**.
-Your response format must be strictly JSON, containing no other text or explanation. For example:
-{
-  "notes": ["bergamot", "lavender", "vanilla"]
-}
-Note: If no notes are found in the text, return an empty list.
-"""
-        user_prompt = f"Extract perfume notes from this comment: {text}"
-
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-120b",  # Groq'ta kullanılabilir model
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=4096,
-            temperature=0.6
-        )
-
-        raw_output = response.choices[0].message.content.strip()
-
-        # 🧩 JSON yanıtı ayrıştır (SADECE İNGİLİZCE "notes" anahtarı bekleniyor)
-        try:
-            json_match = re.search(r'\{.*\}', raw_output, re.DOTALL)
-            if json_match:
-                notes_data = json.loads(json_match.group())
-                user_notes_en = notes_data.get("notes", []) # Anahtar "notes" olarak değiştirildi
-            else:
-                user_notes_en = []
-        except Exception as e:
-            print(f"JSON Parsing Error: {e}")
-            user_notes_en = []
+        # 1️⃣ Notaları çıkar (istenen, zorunlu ve hariç tutulan notalar)
+        query = _extract_request_notes(params)
+        user_notes_en = query.notes
+        lap("extract")
 
-        # 2️⃣ Veritabanını yükle
-        database = load_perfume_database()
+        # 2️⃣ Bellekteki katalog snapshot'ını al (dosya her istekte yeniden okunmaz)
+        snapshot = get_catalog_snapshot()
+        database = snapshot.perfumes
+        lap("catalog")
         if not database:
-            return jsonify({"reply": "<h3>Error</h3><p>Perfume database could not be loaded.</p>"})
+            return _error_response(as_json, "Perfume database could not be loaded.")
 
         # 3️⃣ İngilizce notalarla eşleşme yap
         if not user_notes_en:
+             if as_json:
+                 return jsonify(_json_page(query, [], 0, page, page_size))
              # Yanıt HTML'i İngilizce
              reply_html = f"""
             <h3>Extracted Notes:</h3>
@@ -85,33 +179,45 @@ Note: If no notes are found in the text, return an empty list.
             """
              return jsonify({"reply": reply_html})
         
-        matching_perfumes = find_matching_perfumes(user_notes_en, database)
+        # Aynı nota kümesinin sıralaması önbellekten gelir; eşleşme maskesi de sıralamayla saklanır,
+        # hem puanlama hem vurgulama bunu kullanır. Sadece istenen sayfa HTML'e çevrilir.
+        matching_perfumes, total_matches, note_match, facets = get_query_cache().page(
+            snapshot, user_notes_en, page, page_size, metric, params["filters"], query.required, query.excluded,
+            params["tier_weights"])
+        lap("match")
+
+        if as_json:
+            response = jsonify(_json_page(query, matching_perfumes, total_matches, page, page_size,
+                                          note_match, facets))
+            lap("render")
+            return response
 
         # 4️⃣ Sonuçları hazırla
-        if not matching_perfumes:
+        if not total_matches:
             # Yanıt HTML'i İngilizce
             reply_html = f"""
             <h3>Extracted Notes:</h3>
-            <p>{', '.join(user_notes_en)}</p>
+            <p>{', '.join(user_notes_en)}</p>{_constraints_html(query)}
             <h3>Result:</h3>
             <p>Unfortunately, no perfumes matching the extracted notes were found.</p>
             """
-            return jsonify({"reply": reply_html})
+            return jsonify({"reply": reply_html, "facets": facets})
         else:
             # Başlangıç notları HTML'i İngilizce
             notes_html = f"""
             <h3>Extracted Notes:</h3>
-            <p>{', '.join(user_notes_en)}</p>
+            <p>{', '.join(user_notes_en)}</p>{_constraints_html(query)}
             """
 
             # api_routes.py dosyasındaki 4. adımdaki döngüdeki bölümü bu kod ile değiştirin:
 
             perfume_items = []
             for perfume, similarity, matched, total in matching_perfumes:
-                top_notes = highlight_matching_notes(perfume.get('top_notes', []), user_notes_en)
-                heart_notes = highlight_matching_notes(perfume.get('heart_notes', []), user_notes_en)
-                base_notes = highlight_matching_notes(perfume.get('base_notes', []), user_notes_en)
-                all_notes = highlight_matching_notes(perfume.get('all_notes', []), user_notes_en)
+                mask = note_match.perfume_mask(perfume)
+                top_notes = highlight_matching_notes(perfume.get('top_notes', []), user_notes_en, mask['top_notes'])
+                heart_notes = highlight_matching_notes(perfume.get('heart_notes', []), user_notes_en, mask['heart_notes'])
+                base_notes = highlight_matching_notes(perfume.get('base_notes', []), user_notes_en, mask['base_notes'])
+                all_notes = highlight_matching_notes(perfume.get('all_notes', []), user_notes_en, mask['all_notes'])
 
                 # Belirtilmemiş notları hariç tutmak için dinamik HTML oluşturma
                 notes_rows_html = ""
@@ -169,9 +275,173 @@ Note: If no notes are found in the text, return an empty list.
                 """
                 perfume_items.append(perfume_html)
 
-            return jsonify({"notes_html": notes_html, "perfumes": perfume_items})
+            lap("render")
+            return jsonify({
+                "notes_html": notes_html,
+                "notes": user_notes_en,
+                "required_notes": query.required,
+                "excluded_notes": query.excluded,
+                "perfumes": perfume_items,
+                "total": total_matches,
+                "page": page,
+                "page_size": page_size,
+                "total_pages": -(-total_matches // page_size),
+                "facets": facets,
+            })
 
     except Exception as e:
         # Groq API hataları için genel hata yakalama
+        if as_json:
+            return jsonify({"error": f"API Error Occurred: {e}"})
         reply_html = f"<h3>API Error Occurred</h3><p>{str(e)}</p>" 
-        return jsonify({"reply": reply_html})
\ No newline at end of file
+        return jsonify({"reply": reply_html})
+
+@api.route("/analyze_comment/stream", methods=["POST"])
+def analyze_comment_stream():
+    """
+    /analyze_comment'in akış (NDJSON) sürümü. Her satır bir olaydır:
+      {"event": "notes", ...}     LLM yanıt verir vermez çıkarılan notalar (zorunlu/hariç dahil)
+      {"event": "perfumes", ...}  sıralanmış parfümler, STREAM_CHUNK_SIZE'lık parçalar halinde
+      {"event": "done", ...}      toplam eşleşme, sayfa bilgisi ve facet sayımları
+      {"event": "error", ...}     hata durumunda (akış burada biter)
+    Parfümler format=json ile aynı yapıdadır.
+    """
+    data = request.json or {}
+    params, error = _parse_search_request(data)
+
+    def event(name, **payload):
+        return json.dumps({"event": name, **payload}, ensure_ascii=False) + "\n"
+
+    def generate():
+        if error:
+            yield event("error", error=error)
+            return
+
+        page, page_size = params["page"], params["page_size"]
+        try:
+            query = _extract_request_notes(params)
+            user_notes_en = query.notes
+            lap("extract")
+            yield event("notes", notes=user_notes_en, required_notes=query.required,
+                        excluded_notes=query.excluded)
+
+            snapshot = get_catalog_snapshot()
+            lap("catalog")
+            if not snapshot.perfumes:
+                yield event("error", error="Perfume database could not be loaded.")
+                return
+
+            total_matches = 0
+            facets = {}
+            if user_notes_en:
+                matching_perfumes, total_matches, note_match, facets = get_query_cache().page(
+                    snapshot, user_notes_en, page, page_size, params["metric"], params["filters"],
+                    query.required, query.excluded, params["tier_weights"])
+                lap("match")
+
+                # İlk parça mümkün olan en kısa sürede gitsin diye sayfa parça parça serileştirilir
+                chunk_size = Config.STREAM_CHUNK_SIZE
+                for offset in range(0, len(matching_perfumes), chunk_size):
+                    chunk = matching_perfumes[offset:offset + chunk_size]
+                    yield event("perfumes", offset=offset,
+                                perfumes=[_perfume_to_json(*match, note_match) for match in chunk])
+                lap("render")
+
+            yield event("done", total=total_matches, page=page, page_size=page_size,
+                        total_pages=-(-total_matches // page_size), facets=facets)
+        except Exception as e:
+            yield event("error", error=f"API Error Occurred: {e}")
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    # Ara katmanların (ör. nginx) yanıtı tamponlayıp akışı geciktirmesini engelle
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@api.route("/analyze_batch", methods=["POST"])
+def analyze_batch():
+    """
+    Birden çok yorumu tek istekte analiz eder. Yorumlar token bütçesine göre paketlenip
+    az sayıda LLM çağrısında çıkarılır, ardından her biri bellekteki katalogla eşleştirilir.
+    Girdi: {"comments": [{"id": "...", "text": "..."}, ...] veya ["metin", ...], "page_size": n,
+            "filters": {...}, "required_notes": [...], "excluded_notes": [...], "tier_weights": {...}}
+           (filtreler, zorunlu/hariç notalar ve kademe ağırlıkları tüm yorumlara uygulanır)
+    Notaları çıkarılamayan yorumlar sonuçta {"id": ..., "error": ...} olarak döner; diğerleri etkilenmez.
+    """
+    data = request.json or {}
+    comments = data.get("comments")
+    if not isinstance(comments, list) or not comments:
+        return jsonify({"error": "Please provide a non-empty 'comments' list."}), 400
+    if len(comments) > Config.BATCH_MAX_COMMENTS:
+        return jsonify({"error": f"At most {Config.BATCH_MAX_COMMENTS} comments can be analyzed per request."}), 400
+
+    page_size = _parse_positive_int(data.get("page_size"), Config.DEFAULT_PAGE_SIZE, Config.MAX_PAGE_SIZE)
+    metric = data.get("metric", Config.SIMILARITY_METRIC)
+    if metric not in SIMILARITY_METRICS:
+        return jsonify({"error": f"Unknown similarity metric. Choose one of: {', '.join(SIMILARITY_METRICS)}."}), 400
+
+    # Her yoruma bir id ver (verilmemişse listedeki sırası)
+    items = []
+    for position, comment in enumerate(comments, 1):
+        if isinstance(comment, dict):
+            item_id = str(comment.get("id", position))
+            text = str(comment.get("text", ""))
+        else:
+            item_id = str(position)
+            text = str(comment)
+        items.append((item_id, text))
+
+    if len({item_id for item_id, _text in items}) != len(items):
+        return jsonify({"error": "Comment ids must be unique."}), 400
+
+    try:
+        filters = SearchFilters.from_request(data.get("filters"))
+        constraints = NoteQuery.from_request(None, data.get("required_notes"), data.get("excluded_notes"))
+        tier_weights = TierWeights.from_request(data.get("tier_weights"), Config.TIER_WEIGHTS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    extraction_mode = data.get("extraction_mode", Config.EXTRACTION_MODE)
+    if extraction_mode not in note_extraction.EXTRACTION_MODES:
+        return jsonify({"error": f"Unknown extraction mode. Choose one of: {', '.join(note_extraction.EXTRACTION_MODES)}."}), 400
+
+    if note_extraction.client is None and extraction_mode == 'llm':
+        return jsonify({"error": "LLM client could not be established during application startup."}), 503
+
+    snapshot = get_catalog_snapshot()
+    errors = {}
+    try:
+        # 1️⃣ Boş olmayan yorumların notalarını paketler halinde çıkar (çıkarılamayanlar errors'a yazılır)
+        queries_by_id = note_extraction.extract_notes_batch_with_mode(
+            [(item_id, text) for item_id, text in items if text.strip()],
+            extraction_mode, snapshot.local_extractor, errors)
+    except Exception as e:
+        return jsonify({"error": f"API Error Occurred: {e}"}), 502
+    lap("extract")
+    for query in queries_by_id.values():
+        EXTRACTIONS.inc(result="notes" if query.notes else "empty")
+
+    # 2️⃣ Hepsini aynı katalog snapshot'ı ile eşleştir
+    if not snapshot.perfumes:
+        return jsonify({"error": "Perfume database could not be loaded."}), 503
+
+    results = []
+    for item_id, text in items:
+        if item_id in errors:
+            results.append({"id": item_id, "error": f"API Error Occurred: {errors[item_id]}"})
+            continue
+        query = queries_by_id.get(item_id, NoteQuery()).with_constraints(constraints.required, constraints.excluded)
+        matching_perfumes, total_matches, note_match, facets = get_query_cache().page(
+            snapshot, query.notes, 1, page_size, metric, filters, query.required, query.excluded, tier_weights)
+        results.append({
+            "id": item_id,
+            "notes": query.notes,
+            "required_notes": query.required,
+            "excluded_notes": query.excluded,
+            "total": total_matches,
+            "perfumes": [_perfume_to_json(*match, note_match) for match in matching_perfumes],
+            "facets": facets,
+        })
+    lap("match")
+
+    return jsonify({"results": results})
\ No newline at end of file
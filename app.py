@@ -3,11 +3,23 @@ from flask import Flask, render_template
 # Kendi dosyalarımızı içeri aktaralım
 from config import Config
 from api_routes import api
+from catalog_store import init_catalog_store
+from query_cache import init_query_cache
+from metrics import init_metrics
+from lifecycle import init_lifecycle
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Katalog süreç başına bir kez yüklenir; rotalar snapshot üzerinden okur
+    init_catalog_store(app)
+    init_query_cache(app)
+
+    # Aşama süreleri, sayaçlar, Server-Timing başlığı ve /metrics (Prometheus metin biçimi)
+    if app.config.get('METRICS_ENABLED', True):
+        init_metrics(app)
+
     # Blueprint'i (API rotalarını) kaydet
     app.register_blueprint(api)
 
@@ -17,6 +29,9 @@ def create_app(config_class=Config):
         # HTML_PAGE içeriği artık templates/index.html dosyasından yüklenecek.
         return render_template('index.html')
 
+    # /healthz, /readyz; üretim modunda ısınma ve gc.freeze (fork'tan önce, en son yapılır)
+    init_lifecycle(app)
+
     return app
 
 if __name__ == "__main__":
@@ -1,16 +1,26 @@
 import requests
+import argparse
 import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 
 # Konfigürasyon
 API_URL = "http://127.0.0.1:5000/analyze_comment"
 REVIEWS_FILE = "reviews.txt"
 MODEL_NAME = "openai/gpt-oss-120b"  # Örnek: "llama-3.1-70b", "mixtral-8x7b", "gemma-7b" vb.
-OUTPUT_FILE = f"analysis_results_{MODEL_NAME}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+# Sonuçlar satır satır JSONL olarak yazılır. Varsayılan dosya adı sabittir (zaman damgası yok),
+# böylece yarıda kalan bir çalıştırma aynı komutla yeniden başlatıldığında kaldığı yerden devam eder.
+OUTPUT_JSONL_FILE = f"analysis_results_{MODEL_NAME.replace('/', '_')}.jsonl"
 
 def extract_perfume_count(response_data):
     """API yanıtından önerilen parfüm sayısını çıkarır"""
+    # Yanıt sayfalı olduğundan toplam eşleşme sayısı "total" alanında gelir
+    if "total" in response_data:
+        return response_data["total"]
     if "perfumes" in response_data:
         return len(response_data["perfumes"])
     return 0
@@ -20,6 +30,10 @@ def extract_perfume_names(response_data):
     perfume_names = []
     if "perfumes" in response_data:
         for perfume_html in response_data["perfumes"]:
+            # format=json yanıtında isim doğrudan veride bulunur
+            if isinstance(perfume_html, dict):
+                perfume_names.append(f"{perfume_html['brand']} - {perfume_html['fragrance']}")
+                continue
             # HTML'den parfüm adını çıkar
             if "Perfume:" in perfume_html:
                 start = perfume_html.find("Perfume:") + 9
@@ -33,6 +47,8 @@ def extract_perfume_names(response_data):
 def extract_notes(response_data):
     """API yanıtından çıkarılan notaları alır"""
     notes = []
+    if isinstance(response_data.get("notes"), list):
+        return response_data["notes"]
     if "notes_html" in response_data:
         notes_html = response_data["notes_html"]
         # HTML'den notaları çıkar
@@ -44,11 +60,19 @@ def extract_notes(response_data):
                 notes = [note.strip() for note in notes_text.split(",")]
     return notes
 
+def extract_excluded_notes(response_data):
+    """API yanıtından hariç tutulan notaları alır (yorumda geçer ama aranmaz)"""
+    excluded = response_data.get("excluded_notes")
+    return excluded if isinstance(excluded, list) else []
+
 def extract_similarity_scores(response_data):
     """Parfümlerin benzerlik skorlarını çıkarır"""
     scores = []
     if "perfumes" in response_data:
         for perfume_html in response_data["perfumes"]:
+            if isinstance(perfume_html, dict):
+                scores.append(f"{perfume_html['matched']}/{perfume_html['total']}")
+                continue
             if "Similarity:" in perfume_html:
                 start = perfume_html.find("Similarity:") + 11
                 end = perfume_html.find("</span>", start)
@@ -56,82 +80,94 @@ def extract_similarity_scores(response_data):
                 scores.append(score)
     return scores
 
-def analyze_comment(comment_text):
+class TokenBucket:
+    """Saniyede en fazla `rate` isteğe izin veren, `capacity` kadar patlamaya izin veren hız sınırlayıcı"""
+
+    def __init__(self, rate, capacity=None):
+        if not rate > 0:
+            # 0 ile token hiç dolmaz (acquire sıfıra bölünür), negatif hız sonsuza dek bekletir
+            raise ValueError(f"rate must be positive, got {rate!r}")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bir token alınana kadar bekler"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+def make_session(pool_size):
+    """Bağlantıları yeniden kullanan (keep-alive) HTTP oturumu oluşturur"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def analyze_comment(comment_text, session=None):
     """Tek bir yorumu analiz eder"""
     try:
-        response = requests.post(
+        response = (session or requests).post(
             API_URL,
-            json={"text": comment_text},
+            # HTML yerine yapılandırılmış yanıt iste (HTML'den metin ayıklamaya gerek kalmaz)
+            json={"text": comment_text, "format": "json"},
             headers={"Content-Type": "application/json"},
             timeout=30
         )
         
         if response.status_code == 200:
-            return response.json()
+            data = response.json()
+            if "error" in data:
+                return {"error": data["error"]}
+            return data
         else:
             return {"error": f"HTTP {response.status_code}: {response.text}"}
     except requests.exceptions.RequestException as e:
         return {"error": str(e)}
 
-def process_reviews():
-    """Tüm yorumları işler ve sonuçları toplar"""
-    results = []
+def build_result(idx, review, response_data):
+    """API yanıtından tek bir yorumun sonuç kaydını oluşturur"""
+    result = {
+        "review_number": idx,
+        "original_comment": review,
+        "extracted_notes": extract_notes(response_data),
+        "excluded_notes": extract_excluded_notes(response_data),
+        "suggested_perfume_count": extract_perfume_count(response_data),
+        "perfume_names": extract_perfume_names(response_data),
+        "similarity_scores": extract_similarity_scores(response_data),
+        "timestamp": datetime.now().isoformat()
+    }
     
-    # Reviews dosyasını oku
+    # Hata varsa ekle
+    if "error" in response_data:
+        result["error"] = response_data["error"]
+    return result
+
+def read_reviews():
+    """Reviews dosyasını okur; bulunamazsa None döndürür"""
     try:
         with open(REVIEWS_FILE, 'r', encoding='utf-8') as f:
-            reviews = f.readlines()
+            return f.readlines()
     except FileNotFoundError:
         print(f"❌ HATA: {REVIEWS_FILE} dosyası bulunamadı!")
+        return None
+
+def print_summary(results):
+    """Özet istatistikleri yazdırır"""
+    if not results:
+        print("Analiz edilen yorum yok.")
         return
-    
-    total_reviews = len(reviews)
-    print(f"📊 Toplam {total_reviews} yorum bulundu.")
-    print(f"⏳ Analiz başlıyor...\n")
-    
-    # Her yorumu işle
-    for idx, review in enumerate(reviews, 1):
-        review = review.strip()
-        if not review:
-            continue
-        
-        print(f"[{idx}/{total_reviews}] İşleniyor: {review[:50]}...")
-        
-        # API'ye istek gönder
-        response_data = analyze_comment(review)
-        
-        # Sonuçları yapılandır
-        result = {
-            "review_number": idx,
-            "original_comment": review,
-            "extracted_notes": extract_notes(response_data),
-            "suggested_perfume_count": extract_perfume_count(response_data),
-            "perfume_names": extract_perfume_names(response_data),
-            "similarity_scores": extract_similarity_scores(response_data),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        # Hata varsa ekle
-        if "error" in response_data:
-            result["error"] = response_data["error"]
-        
-        results.append(result)
-        
-        # İlerleme raporu
-        print(f"   ✓ Çıkarılan notalar: {', '.join(result['extracted_notes']) if result['extracted_notes'] else 'Yok'}")
-        print(f"   ✓ Önerilen parfüm sayısı: {result['suggested_perfume_count']}")
-        print()
-        
-        # Rate limiting için kısa bekleme
-        time.sleep(0.5)
-    
-    # Sonuçları JSON dosyasına kaydet
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
-    
-    print(f"\n✅ Analiz tamamlandı!")
-    print(f"📁 Sonuçlar '{OUTPUT_FILE}' dosyasına kaydedildi.")
-    
+
     # Özet istatistikler
     print("\n" + "="*50)
     print("📊 ÖZET İSTATİSTİKLER")
@@ -155,12 +191,118 @@ def process_reviews():
     
     print("="*50)
 
+def load_completed_reviews(output_path):
+    """Daha önceki (yarıda kalmış) çalıştırmada tamamlanan yorum numaralarını okur"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # Çökme sırasında yarım yazılmış son satır; bu yorum tekrar işlenir
+                continue
+            # Hata alan yorumlar tamamlanmış sayılmaz, tekrar denenir
+            if "error" not in result:
+                completed.add(result["review_number"])
+    return completed
+
+def read_results(output_path):
+    """JSONL sonuç dosyasını satır satır okur (her yorumun son kaydı geçerlidir)"""
+    results = {}
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results[result["review_number"]] = result
+    return [results[idx] for idx in sorted(results)]
+
+def process_reviews_concurrent(output_path, workers=8, rate=5.0, resume=True):
+    """
+    Yorumları işçi havuzuyla eşzamanlı işler. İstekler token bucket ile hız sınırlanır,
+    her sonuç tamamlandığı anda JSONL dosyasına yazılır ve yeniden başlatmada
+    tamamlanmış yorumlar atlanır.
+    """
+    reviews = read_reviews()
+    if reviews is None:
+        return
+
+    completed = load_completed_reviews(output_path) if resume else set()
+    pending = [(idx, review.strip()) for idx, review in enumerate(reviews, 1)
+               if review.strip() and idx not in completed]
+
+    total_reviews = len(reviews)
+    print(f"📊 Toplam {total_reviews} yorum bulundu, {len(completed)} tanesi daha önce tamamlanmış.")
+    print(f"⏳ {len(pending)} yorum {workers} işçi ile analiz ediliyor (en fazla {rate} istek/sn)...\n")
+
+    bucket = TokenBucket(rate)
+    session = make_session(workers)
+    write_lock = threading.Lock()
+    done_count = 0
+
+    def worker(idx, review):
+        bucket.acquire()
+        return build_result(idx, review, analyze_comment(review, session))
+
+    with open(output_path, 'a' if resume else 'w', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        pending_iter = iter(pending)
+        while True:
+            # Kuyrukta en fazla 2 x işçi sayısı kadar iş tut (bellek sınırlı kalsın)
+            while len(in_flight) < workers * 2:
+                item = next(pending_iter, None)
+                if item is None:
+                    break
+                in_flight.add(executor.submit(worker, *item))
+            if not in_flight:
+                break
+
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                with write_lock:
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    out.flush()
+                done_count += 1
+                status = "❌" if "error" in result else "✓"
+                print(f"[{done_count}/{len(pending)}] {status} #{result['review_number']}: "
+                      f"{', '.join(result['extracted_notes']) if result['extracted_notes'] else 'Yok'}")
+
+    print(f"\n✅ Analiz tamamlandı!")
+    print(f"📁 Sonuçlar '{output_path}' dosyasına kaydedildi.")
+    print_summary(read_results(output_path))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="PerfumeAI Batch Analyzer")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Eşzamanlı işçi sayısı")
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="Saniyedeki en fazla istek sayısı")
+    parser.add_argument("--output", default=OUTPUT_JSONL_FILE,
+                        help="JSONL çıktı dosyası; dosya varsa kaldığı yerden devam edilir")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Mevcut çıktı dosyasını yok say ve baştan başla")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if not args.rate > 0:
+        parser.error("--rate must be greater than 0")
+    return args
+
 if __name__ == "__main__":
+    args = parse_args()
+
     print("🚀 PerfumeAI Batch Analyzer")
     print("="*50)
     print(f"API URL: {API_URL}")
     print(f"Input: {REVIEWS_FILE}")
-    print(f"Output: {OUTPUT_FILE}")
+    print(f"Output: {args.output}")
     print("="*50 + "\n")
-    
-    process_reviews()
\ No newline at end of file
+
+    # Tek işçide de aynı yol kullanılır: sonuçlar anında yazılır ve çalıştırma devam ettirilebilir
+    process_reviews_concurrent(args.output, workers=args.workers, rate=args.rate,
+                               resume=not args.no_resume)
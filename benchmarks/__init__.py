@@ -0,0 +1,9 @@
+"""
+Eşleştirme ve HTML üretimi sıcak yolları için performans ölçümleri.
+
+    python -m benchmarks.run_benchmarks --sizes 1000,10000
+    python -m benchmarks.run_benchmarks --update-baseline
+
+Sentetik kataloglar gerçek scrape dosyasının nota dağılımını izler (synthetic_catalog.py),
+sorgular reviews.txt'den türetilir (workload.py), LLM çağrısı yerine llm_client.StubBackend kullanılır.
+"""
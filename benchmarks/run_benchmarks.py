@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import note_extraction
+from app import create_app
+from catalog_store import CatalogSnapshot
+from config import Config
+from database_utils import find_matching_perfumes, find_matching_perfumes_page, highlight_matching_notes, load_perfume_database
+from extraction_cache import ExtractionCache
+from llm_client import LLMClient, StubBackend
+
+from benchmarks.synthetic_catalog import CatalogProfile, write_catalog
+from benchmarks.workload import load_comments, load_queries
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+DEFAULT_SIZES = (1000, 10000)
+
+
+def measure(function, repeat):
+    """function'ı repeat kez çalıştırır, her çalışmanın süresini milisaniye olarak döndürür."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(timings, operations=1):
+    """Süre listesini (ms) işlem başına median / p95 / ortalama olarak özetler."""
+    per_operation = sorted(timing / operations for timing in timings)
+    p95_index = min(len(per_operation) - 1, int(round(0.95 * (len(per_operation) - 1))))
+    return {
+        "median_ms": round(statistics.median(per_operation), 4),
+        "p95_ms": round(per_operation[p95_index], 4),
+        "mean_ms": round(statistics.fmean(per_operation), 4),
+        "runs": len(per_operation),
+    }
+
+
+def run_queries(queries, function):
+    def run():
+        for user_notes in queries:
+            function(user_notes)
+    return run
+
+
+def benchmark_size(size, catalog_path, queries, comments, repeat, scan_limit):
+    """Tek bir katalog boyutu için tüm ölçümleri yapar: {benchmark_adı: özet}."""
+    results = {}
+
+    results["load_perfume_database"] = summarize(
+        measure(lambda: load_perfume_database(catalog_path), max(1, repeat // 2)))
+
+    perfumes = load_perfume_database(catalog_path)
+    results["build_snapshot"] = summarize(
+        measure(lambda: CatalogSnapshot(perfumes, catalog_path, 0, 0, 1), max(1, repeat // 2)))
+    snapshot = CatalogSnapshot(perfumes, catalog_path, 0, 0, 1)
+    database, note_index = snapshot.perfumes, snapshot.note_index
+
+    # Sorgu başına süreler: her çalışma tüm iş yükünü işler
+    operations = len(queries)
+    results["find_matching_perfumes"] = summarize(measure(run_queries(
+        queries, lambda notes: find_matching_perfumes(notes, database, note_index)), repeat), operations)
+    results["find_matching_perfumes_page"] = summarize(measure(run_queries(
+        queries, lambda notes: find_matching_perfumes_page(notes, database, note_index)), repeat), operations)
+    if size <= scan_limit:
+        # Eski tam tarama yolu; büyük kataloglarda çok yavaş olduğu için sınırlı
+        results["find_matching_perfumes_scan"] = summarize(measure(run_queries(
+            queries, lambda notes: find_matching_perfumes(notes, perfumes)), max(1, repeat // 2)), operations)
+
+    def highlight_page(user_notes):
+        note_match = note_index.match(user_notes)
+        page_items, _ = find_matching_perfumes_page(user_notes, database, note_index, note_match=note_match)
+        for perfume, _, _, _ in page_items:
+            mask = note_match.perfume_mask(perfume)
+            for field in ('top_notes', 'heart_notes', 'base_notes', 'all_notes'):
+                highlight_matching_notes(perfume.get(field, []), user_notes, mask[field])
+
+    results["highlight_matching_notes"] = summarize(
+        measure(run_queries(queries, highlight_page), repeat), operations)
+
+    results["analyze_comment_route"] = benchmark_route(catalog_path, snapshot, comments, repeat)
+    return results
+
+
+def benchmark_route(catalog_path, snapshot, comments, repeat):
+    """
+    /analyze_comment rotasının tamamı (HTML yanıt dahil). LLM yerine yerel stub arka uç kullanılır
+    ve çıkarım önbelleği her çağrıda ıskalar; ölçülen süre sunucu tarafının kendisidir.
+    """
+    class BenchmarkConfig(Config):
+        PERFUME_DATABASE_PATH = catalog_path
+        CATALOG_RELOAD_INTERVAL = 3600.0
+
+    app = create_app(BenchmarkConfig)
+    original_client, original_cache = note_extraction.client, note_extraction.extraction_cache
+    note_extraction.client = LLMClient(StubBackend(snapshot.note_index.vocabulary), model=Config.LLM_MODEL)
+    note_extraction.extraction_cache = ExtractionCache(None, ttl=0)
+    try:
+        with app.test_client() as client:
+            def run():
+                for comment in comments:
+                    response = client.post("/analyze_comment", json={"text": comment})
+                    if response.status_code != 200:
+                        raise RuntimeError(f"/analyze_comment {response.status_code} döndürdü")
+            run()  # ısınma: snapshot yüklemesi ölçüme dahil edilmez
+            return summarize(measure(run, repeat), len(comments))
+    finally:
+        note_extraction.client, note_extraction.extraction_cache = original_client, original_cache
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Baz değerden tolerance katından fazla yavaşlayan ölçümleri döndürür."""
+    regressions = []
+    for size, benchmarks in results["sizes"].items():
+        for name, summary in benchmarks.items():
+            reference = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not reference:
+                continue
+            limit = reference["median_ms"] * tolerance
+            if summary["median_ms"] > limit:
+                regressions.append((size, name, reference["median_ms"], summary["median_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Eşleştirme sıcak yolları için performans ölçümleri")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Virgülle ayrılmış katalog boyutları (ör. 1000,10000,100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Her ölçümün tekrar sayısı")
+    parser.add_argument("--scan-limit", type=int, default=100000,
+                        help="Eski tam tarama yolunun ölçüleceği en büyük katalog boyutu")
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Karşılaştırılacak baz değer dosyası")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="Median süre baz değerin bu katını aşarsa gerileme sayılır")
+    parser.add_argument("--update-baseline", action="store_true", help="Sonuçları yeni baz değer olarak kaydet")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    profile = CatalogProfile.from_file()
+    queries = load_queries()
+    comments = load_comments()
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "queries": len(queries),
+        "comments": len(comments),
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in sizes:
+            catalog_path = os.path.join(work_dir, f"catalog_{size}.json")
+            write_catalog(catalog_path, size, profile, seed=args.seed)
+            print(f"⏱️  {size} parfüm ölçülüyor...", file=sys.stderr)
+            results["sizes"][str(size)] = benchmark_size(
+                size, catalog_path, queries, comments, args.repeat, args.scan_limit)
+
+    report = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(report)
+    else:
+        print(report)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            file.write(report + "\n")
+        print(f"✅ Baz değerler '{args.baseline}' dosyasına kaydedildi.", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("⚠️  Baz değer dosyası bulunamadı, karşılaştırma yapılmadı.", file=sys.stderr)
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    for size, name, reference, current in regressions:
+        print(f"❌ {name} @ {size}: {reference:.3f} ms -> {current:.3f} ms", file=sys.stderr)
+    if regressions:
+        return 1
+    print("✅ Baz değerlere göre gerileme yok.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
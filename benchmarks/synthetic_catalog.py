@@ -0,0 +1,118 @@
+import argparse
+import json
+import random
+from collections import Counter
+
+from config import Config
+from database_utils import load_perfume_database
+
+TIERS = ('top_notes', 'heart_notes', 'base_notes')
+
+
+class CatalogProfile:
+    """Gerçek bir scrape dosyasından çıkarılan dağılımlar; sentetik kataloğun kalıbı."""
+
+    def __init__(self, perfumes):
+        note_counts = Counter()
+        notes_per_perfume = []
+        tier_shares = Counter()
+        tiered = 0
+        for perfume in perfumes:
+            notes = perfume.get('all_notes', [])
+            note_counts.update(notes)
+            notes_per_perfume.append(len(notes))
+            if any(perfume.get(tier) for tier in TIERS):
+                tiered += 1
+                for tier in TIERS:
+                    tier_shares[tier] += len(perfume.get(tier, []))
+
+        self.notes = list(note_counts)
+        self.note_weights = [note_counts[note] for note in self.notes]
+        self.notes_per_perfume = [count for count in notes_per_perfume if count] or [1]
+        self.tiered_ratio = tiered / len(perfumes) if perfumes else 0.0
+        tier_total = sum(tier_shares.values()) or 1
+        self.tier_weights = [tier_shares[tier] / tier_total for tier in TIERS]
+
+        # Uzun kuyruk: tek bir parfümde geçen notaların oranı. Katalog büyüdükçe
+        # gerçek scrape'lerde de yeni (nadir) notalar çıkar; bu oran korunur.
+        total_occurrences = sum(self.note_weights) or 1
+        self.new_note_ratio = sum(1 for count in self.note_weights if count == 1) / total_occurrences
+
+        self.brands = [perfume.get('brand', '') for perfume in perfumes] or ['Synthetic']
+        self.years = [perfume.get('year') for perfume in perfumes] or [2025]
+        self.concentrations = [perfume.get('concentration', '') for perfume in perfumes] or ['']
+
+    @classmethod
+    def from_file(cls, path=None):
+        return cls(load_perfume_database(path or Config.PERFUME_DATABASE_PATH))
+
+
+def generate_perfumes(count, profile, seed=0):
+    """Profil dağılımına uyan `count` adet sentetik parfüm kaydı üretir (generator)."""
+    rng = random.Random(seed)
+    cumulative_weights = []
+    running = 0
+    for weight in profile.note_weights:
+        running += weight
+        cumulative_weights.append(running)
+    tail_notes = 0
+
+    for perfume_id in range(count):
+        target = rng.choice(profile.notes_per_perfume)
+        notes = []
+        seen = set()
+        attempts = 0
+        while len(notes) < target and attempts < target * 4:
+            attempts += 1
+            if rng.random() < profile.new_note_ratio:
+                tail_notes += 1
+                note = f"Synthetic note {tail_notes}"
+            else:
+                note = rng.choices(profile.notes, cum_weights=cumulative_weights)[0]
+            if note not in seen:
+                seen.add(note)
+                notes.append(note)
+
+        perfume = {
+            'brand': rng.choice(profile.brands),
+            'fragrance': f"Synthetic {perfume_id}",
+            'concentration': rng.choice(profile.concentrations),
+            'year': rng.choice(profile.years),
+            'top_notes': [],
+            'heart_notes': [],
+            'base_notes': [],
+            'all_notes': notes,
+            'notes_count': len(notes),
+            'source_url': f"https://example.invalid/perfumes/synthetic-{perfume_id}",
+            'scraped_date': "2025-01-01T00:00:00",
+        }
+        if rng.random() < profile.tiered_ratio:
+            for note in notes:
+                tier = rng.choices(TIERS, weights=profile.tier_weights)[0]
+                perfume[tier].append(note)
+            # all_notes scrape'lerde kademe sırasıyla gelir
+            perfume['all_notes'] = perfume['top_notes'] + perfume['heart_notes'] + perfume['base_notes']
+        yield perfume
+
+
+def write_catalog(path, count, profile=None, seed=0):
+    """Sentetik kataloğu, tamamını bellekte tutmadan scrape biçiminde (JSON dizi) yazar."""
+    profile = profile or CatalogProfile.from_file()
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('[\n')
+        for position, perfume in enumerate(generate_perfumes(count, profile, seed)):
+            if position:
+                file.write(',\n')
+            file.write(json.dumps(perfume, ensure_ascii=False))
+        file.write('\n]')
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentetik parfüm kataloğu üretir")
+    parser.add_argument("count", type=int, help="Parfüm sayısı (ör. 1000 - 1000000)")
+    parser.add_argument("output", help="Çıktı JSON dosyası")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_catalog(args.output, args.count, seed=args.seed)
+    print(f"✅ {args.count} sentetik parfüm '{args.output}' dosyasına yazıldı.")
@@ -0,0 +1,29 @@
+import os
+import re
+
+from catalog import Catalog
+from config import BASE_DIR
+from database_utils import load_perfume_database
+from local_extractor import LocalNoteExtractor
+
+REVIEWS_PATH = os.path.join(BASE_DIR, 'reviews.txt')
+
+
+def load_comments(path=REVIEWS_PATH):
+    """reviews.txt'deki yorumları baştaki sıra numarası olmadan döndürür."""
+    with open(path, 'r', encoding='utf-8') as file:
+        return [re.sub(r'^\d+\.\s*', '', line.strip()) for line in file if line.strip()]
+
+
+def load_queries(path=REVIEWS_PATH):
+    """
+    Her yorumun nota listesi (sorgu). Sonuçların tekrarlanabilir olması için notalar LLM yerine
+    gerçek katalog sözlüğüyle yerel çıkarıcıdan alınır; notası çıkmayan yorumlar atlanır.
+    """
+    extractor = LocalNoteExtractor(Catalog.from_dicts(load_perfume_database()).notes.normalized)
+    queries = []
+    for comment in load_comments(path):
+        notes = extractor.find(comment)
+        if notes:
+            queries.append(notes)
+    return queries
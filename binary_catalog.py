@@ -0,0 +1,393 @@
+"""
+Bellek eşlemeli (mmap) ikili katalog biçimi.
+
+Scrape JSON'u yerine işçiler bu dosyayı mmap ile açar: hiçbir şey önceden ayrıştırılmaz,
+kayıtlar ve metinler erişildikçe okunur ve sayfalar işletim sisteminin sayfa önbelleği
+üzerinden tüm işçi süreçleri arasında paylaşılır.
+
+Dosya düzeni (posting_tiers dışındaki tüm sayılar little-endian uint32):
+
+    başlık      MAGIC, FORMAT_VERSION, bölüm sayısı, ardından her bölüm için (ofset, uzunluk)
+    strings     tüm metinlerin art arda UTF-8 baytları (tekrarlar bir kez saklanır)
+    string_offsets  metin id -> strings içindeki başlangıç (n + 1 adet)
+    note_names      nota id -> metin id (orijinal nota metni)
+    normalized      normalize id -> metin id
+    normalized_ids  nota id -> normalize id
+    records         parfüm başına RECORD_FIELDS kadar alan (metin id'leri + nota havuzu sınırları)
+    note_pool       kademelerin nota id'leri: top, heart, base, all art arda
+    posting_offsets normalize id -> posting_pool içindeki başlangıç (n + 1 adet)
+    posting_pool    her notayı içeren parfümlerin konumları (ters indeks)
+    note_counts     parfüm başına farklı normalize nota sayısı
+    posting_tiers   posting_pool ile aynı sırada, notanın o parfümdeki kademe maskesi (uint8)
+    <alan>_values   facet alanı (brand, concentration, year) için değer id -> metin id
+    <alan>_ids      parfüm -> değer id (int32, değeri olmayanlarda -1)
+    <alan>_offsets  değer id -> <alan>_pool içindeki başlangıç (n + 1 adet)
+    <alan>_pool     her değere sahip parfümlerin konumları
+
+    python binary_catalog.py perfume_database.json perfume_database.fdcat
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from catalog import Catalog, PerfumeRecord, TIER_FIELDS
+from catalog_loader import CatalogLoadError, LoadReport, stream_perfume_database
+from facet_index import FACET_FIELDS, FacetIndex
+from note_index import NoteIndex
+
+MAGIC = b'FDCAT\x00\x00\x00'
+FORMAT_VERSION = 3
+BINARY_EXTENSION = '.fdcat'
+
+SECTIONS = ('strings', 'string_offsets', 'note_names', 'normalized', 'normalized_ids',
+            'records', 'note_pool', 'posting_offsets', 'posting_pool', 'note_counts', 'posting_tiers') + tuple(
+    f'{field}_{part}' for field in FACET_FIELDS for part in ('values', 'ids', 'offsets', 'pool'))
+
+# Kayıt alanları: metin id'leri, sonra nota havuzundaki kademe sınırları
+# (top = [top, heart), heart = [heart, base), base = [base, all), all = [all, end))
+STRING_FIELDS = ('brand', 'fragrance', 'concentration', 'year', 'source_url', 'scraped_date')
+RECORD_FIELDS = STRING_FIELDS + ('top', 'heart', 'base', 'all', 'end')
+_RECORD_SIZE = len(RECORD_FIELDS)
+_FIRST_TIER = len(STRING_FIELDS)
+
+_HEADER = struct.Struct('<8sII')
+_SECTION = struct.Struct('<QQ')
+
+
+class BinaryCatalogError(Exception):
+    """Dosya ikili katalog değil ya da desteklenmeyen bir sürümde."""
+
+
+def is_binary_catalog(path):
+    """Dosyanın ikili katalog olup olmadığını (uzantıdan bağımsız, MAGIC'ten) anlar."""
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# ---------------------------------------------------------------- yazma
+
+def _uint32_bytes(values, typecode='I'):
+    data = array(typecode, values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_binary_catalog(perfumes, path):
+    """
+    Scrape dict listesini (ya da Catalog'u) ikili kataloga yazar. Dosya önce geçici bir
+    dosyaya yazılıp os.replace ile yerine konur; eski dosyayı mmap ile açmış süreçler
+    eski içeriği görmeye devam eder.
+    """
+    catalog = perfumes if isinstance(perfumes, Catalog) else Catalog.from_dicts(perfumes)
+    note_index = NoteIndex(catalog)
+    facet_index = FacetIndex(catalog)
+    notes = catalog.notes
+
+    strings = []
+    string_ids = {}
+
+    def string_id(value):
+        sid = string_ids.get(value)
+        if sid is None:
+            sid = string_ids[value] = len(strings)
+            strings.append(value)
+        return sid
+
+    note_names = [string_id(name) for name in notes.names]
+    normalized = [string_id(note) for note in notes.normalized]
+
+    records = []
+    note_pool = array('I')
+    for record in catalog:
+        for field in STRING_FIELDS:
+            value = getattr(record, field)
+            # Yıl sayı, metin ("Belirtilmemiş") ya da None olabilir; türü korumak için JSON saklanır
+            records.append(string_id(json.dumps(value, ensure_ascii=False) if field == 'year' else value or ''))
+        for _key, slot in TIER_FIELDS:
+            records.append(len(note_pool))
+            note_pool.extend(getattr(record, slot))
+        records.append(len(note_pool))
+
+    # Facet indeksleri de hazır yazılır; işçiler bunları kurmak yerine mmap'ten okur
+    facet_sections = {}
+    for field in FACET_FIELDS:
+        facet = facet_index.facets[field]
+        values = [string_id(json.dumps(value, ensure_ascii=False) if field == 'year' else value)
+                  for value in facet.values]
+        offsets = [0]
+        for perfume_ids in facet.postings:
+            offsets.append(offsets[-1] + len(perfume_ids))
+        facet_sections[f'{field}_values'] = _uint32_bytes(values)
+        facet_sections[f'{field}_ids'] = _uint32_bytes(facet.value_ids, 'i')
+        facet_sections[f'{field}_offsets'] = _uint32_bytes(offsets)
+        facet_sections[f'{field}_pool'] = _uint32_bytes(
+            perfume_id for perfume_ids in facet.postings for perfume_id in perfume_ids)
+
+    encoded = [value.encode('utf-8') for value in strings]
+    string_offsets = [0]
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    posting_offsets = [0]
+    posting_pool = array('I')
+    posting_tiers = array('B')
+    for postings, tier_masks in zip(note_index.postings, note_index.tier_masks):
+        posting_pool.extend(postings)
+        posting_tiers.extend(tier_masks)
+        posting_offsets.append(len(posting_pool))
+
+    sections = {
+        'strings': b''.join(encoded),
+        'string_offsets': _uint32_bytes(string_offsets),
+        'note_names': _uint32_bytes(note_names),
+        'normalized': _uint32_bytes(normalized),
+        'normalized_ids': _uint32_bytes(notes.normalized_ids),
+        'records': _uint32_bytes(records),
+        'note_pool': _uint32_bytes(note_pool),
+        'posting_offsets': _uint32_bytes(posting_offsets),
+        'posting_pool': _uint32_bytes(posting_pool),
+        'note_counts': _uint32_bytes(note_index.note_counts),
+        'posting_tiers': posting_tiers.tobytes(),
+        **facet_sections,
+    }
+
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(SECTIONS)))
+        offset = _HEADER.size + _SECTION.size * len(SECTIONS)
+        for name in SECTIONS:
+            # Her bölüm 8 bayta hizalanır ki uint32 görünümleri hizalı olsun
+            offset += -offset % 8
+            file.write(_SECTION.pack(offset, len(sections[name])))
+            offset += len(sections[name])
+        for name in SECTIONS:
+            file.write(b'\x00' * (-file.tell() % 8))
+            file.write(sections[name])
+    os.replace(temp_path, path)
+    return path
+
+
+# ---------------------------------------------------------------- okuma
+
+class _StringColumn:
+    """Metin id dizisinin tembel görünümü: öğeler erişildiğinde UTF-8'den çözülür."""
+
+    def __init__(self, store, string_ids):
+        self.store = store
+        self.string_ids = string_ids
+
+    def __len__(self):
+        return len(self.string_ids)
+
+    def __getitem__(self, position):
+        return self.store.string(self.string_ids[position])
+
+    def __iter__(self):
+        string = self.store.string
+        return (string(sid) for sid in self.string_ids)
+
+
+class _JsonColumn(_StringColumn):
+    """_StringColumn gibi; metinler JSON olarak saklanmış değerlerdir (ör. yıl)."""
+
+    def __getitem__(self, position):
+        return json.loads(super().__getitem__(position))
+
+    def __iter__(self):
+        return map(json.loads, super().__iter__())
+
+
+class MappedNoteTable:
+    """NoteTable'ın salt okunur, mmap üzerinden çalışan karşılığı."""
+
+    def __init__(self, store):
+        self.names = _StringColumn(store, store.section('note_names'))
+        # Sözlük her sorguda baştan sona taranır (NoteIndex.resolve); bu yüzden bir kez çözülür.
+        # Boyutu katalogla değil, farklı nota sayısıyla büyür.
+        self.normalized = list(_StringColumn(store, store.section('normalized')))
+        self.normalized_ids = store.section('normalized_ids')
+
+    def __len__(self):
+        return len(self.normalized_ids)
+
+    def decode(self, note_ids):
+        """Id dizisini tekrar nota metinlerine çevirir."""
+        return [self.names[note_id] for note_id in note_ids]
+
+
+class _RecordColumn:
+    """Katalog kayıtlarının tembel görünümü: PerfumeRecord erişildiğinde oluşturulur."""
+
+    def __init__(self, store, notes):
+        self.store = store
+        self.notes = notes
+        self.fields = store.section('records')
+        self.note_pool = store.section('note_pool')
+
+    def __len__(self):
+        return len(self.fields) // _RECORD_SIZE
+
+    def __getitem__(self, perfume_id):
+        if perfume_id < 0:
+            perfume_id += len(self)
+        if not 0 <= perfume_id < len(self):
+            raise IndexError(perfume_id)
+
+        start = perfume_id * _RECORD_SIZE
+        fields = self.fields[start:start + _RECORD_SIZE]
+        string = self.store.string
+        record = PerfumeRecord.__new__(PerfumeRecord)
+        for position, field in enumerate(STRING_FIELDS):
+            setattr(record, field, string(fields[position]))
+        record.year = json.loads(record.year)
+        bounds = fields[_FIRST_TIER:]
+        for position, (_key, slot) in enumerate(TIER_FIELDS):
+            setattr(record, slot, self.note_pool[bounds[position]:bounds[position + 1]])
+        record.notes = self.notes
+        return record
+
+    def __iter__(self):
+        return (self[perfume_id] for perfume_id in range(len(self)))
+
+
+class _PostingColumn:
+    """
+    normalize id -> o notayı içeren parfüm konumları (mmap dilimi, kopyalanmaz).
+    pool verilirse aynı sınırlarla başka bir paralel havuz dilimlenir (ör. kademe maskeleri);
+    prefix başka bir ters indeksin (ör. facet değerleri) <prefix>_offsets/_pool bölümlerini seçer.
+    """
+
+    def __init__(self, store, pool=None, prefix='posting'):
+        self.offsets = store.section(f'{prefix}_offsets')
+        self.pool = store.section(f'{prefix}_pool') if pool is None else pool
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, normalized_id):
+        return self.pool[self.offsets[normalized_id]:self.offsets[normalized_id + 1]]
+
+    def __iter__(self):
+        return (self[normalized_id] for normalized_id in range(len(self)))
+
+
+class _MappedFile:
+    """mmap edilmiş dosya ve bölümlerinin uint32 görünümleri."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, section_count = _HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise BinaryCatalogError(f"Not a binary catalog: {path}")
+        if version != FORMAT_VERSION or section_count != len(SECTIONS):
+            raise BinaryCatalogError(f"Unsupported binary catalog version {version}: {path}")
+
+        self.sections = {}
+        for position, name in enumerate(SECTIONS):
+            self.sections[name] = _SECTION.unpack_from(self.buffer, _HEADER.size + position * _SECTION.size)
+        self.view = memoryview(self.buffer)
+        self.strings = self.view[slice(*self._bounds('strings'))]
+        self.string_offsets = self.section('string_offsets')
+
+    def _bounds(self, name):
+        offset, length = self.sections[name]
+        return offset, offset + length
+
+    def section(self, name, typecode='I'):
+        start, end = self._bounds(name)
+        if sys.byteorder == 'little':
+            return self.view[start:end].cast(typecode)
+        # Big-endian makinelerde (nadiren) bölüm belleğe kopyalanıp çevrilir
+        data = array(typecode, self.view[start:end].tobytes())
+        data.byteswap()
+        return data
+
+    def byte_section(self, name):
+        """Bölümün bayt (uint8) görünümü; bayt sırasından bağımsızdır."""
+        return self.view[slice(*self._bounds(name))]
+
+    def string(self, string_id):
+        return str(self.strings[self.string_offsets[string_id]:self.string_offsets[string_id + 1]], 'utf-8')
+
+
+class MappedCatalog(Catalog):
+    """
+    İkili katalog dosyasından mmap ile açılan Catalog. Kayıtlar ve nota metinleri
+    erişildikçe çözülür; ters indeks dosyada hazır olduğu için NoteIndex yeniden kurulmaz.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.store = _MappedFile(path)
+        notes = MappedNoteTable(self.store)
+        super().__init__(_RecordColumn(self.store, notes), notes)
+        self.postings = _PostingColumn(self.store)
+        self.tier_masks = _PostingColumn(self.store, self.store.byte_section('posting_tiers'))
+        self.note_counts = self.store.section('note_counts')
+
+    def facet_arrays(self, field):
+        """
+        Facet indeksinin dosyada hazır dizileri (bkz. facet_index._Facet.load): değer id -> değer,
+        parfüm -> değer id ve değer -> parfüm konumları. Hepsi mmap görünümüdür; değerler
+        erişildikçe çözülür, böylece işçiler facet sütunlarını kendi belleklerine kopyalamaz.
+        """
+        values = self.store.section(f'{field}_values')
+        return (_JsonColumn(self.store, values) if field == 'year' else _StringColumn(self.store, values),
+                self.store.section(f'{field}_ids', 'i'),
+                _PostingColumn(self.store, prefix=field))
+
+    def column(self, field):
+        """Catalog.column ile aynı; kayıtlar çözülmez, her farklı metin id'si bir kez çözülür."""
+        string_ids = self.records.fields[STRING_FIELDS.index(field)::_RECORD_SIZE]
+        decoded = {}
+        values = []
+        for string_id in string_ids:
+            value = decoded.get(string_id, decoded)
+            if value is decoded:
+                value = decoded[string_id] = self.store.string(string_id)
+                if field == 'year':
+                    value = decoded[string_id] = json.loads(value)
+            values.append(value)
+        return values
+
+
+def load_binary_catalog(path):
+    """İkili kataloğu mmap ile açar (bkz. MappedCatalog)."""
+    return MappedCatalog(path)
+
+
+def convert_json_to_binary(json_path, output_path, report=None):
+    """
+    Scrape JSON dosyasını ikili kataloga çevirir; yazılan parfüm sayısını döndürür.
+    Kayıtlar JSON yükleyicisiyle aynı akıştan, aynı normalizasyonla okunur; bozuk kayıtlar atlanır.
+    """
+    report = report if report is not None else LoadReport(json_path)
+    catalog = Catalog.from_dicts(stream_perfume_database(json_path, report))
+    if report.dropped_total:
+        print(f"UYARI: Bozuk kayıtlar atlandı: {report.summary()}")
+    write_binary_catalog(catalog, output_path)
+    return len(catalog)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape JSON dosyasını mmap edilebilir ikili kataloga çevirir")
+    parser.add_argument("input", help="perfume_database_*.json")
+    parser.add_argument("output", nargs="?", help=f"Çıktı dosyası (varsayılan: girdi adı + {BINARY_EXTENSION})")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.splitext(args.input)[0] + BINARY_EXTENSION
+    try:
+        count = convert_json_to_binary(args.input, output_path)
+    except CatalogLoadError as e:
+        print(f"HATA: {e}")
+        sys.exit(1)
+    print(f"✅ {count} parfüm '{output_path}' dosyasına yazıldı.")
@@ -0,0 +1,179 @@
+import sys
+from array import array
+
+from database_utils import normalize_note
+
+# Kademe adları ve kayıttaki karşılık gelen slot adları
+TIER_FIELDS = (
+    ('top_notes', 'top'),
+    ('heart_notes', 'heart'),
+    ('base_notes', 'base'),
+    ('all_notes', 'all'),
+)
+_TIER_SLOTS = dict(TIER_FIELDS)
+
+# Nota piramidi kademeleri ve kademe bit maskesindeki bitleri (bkz. PerfumeRecord.note_tiers).
+# Sadece all_notes'ta geçen (kademesi bilinmeyen) notanın maskesi 0'dır.
+PYRAMID_TIERS = ('top', 'heart', 'base')
+_TIER_BITS = tuple((1 << position, slot) for position, slot in enumerate(PYRAMID_TIERS))
+
+# Boş kademeler için tek bir paylaşılan dizi (hiçbir zaman değiştirilmez)
+_EMPTY_IDS = array('I')
+
+
+class NoteTable:
+    """
+    Katalogdaki tüm nota metinlerinin tek, intern edilmiş tablosu.
+    Her ham nota bir kez saklanır ve normalize edilmiş hali yükleme sırasında bir kez hesaplanır.
+    """
+
+    def __init__(self):
+        self.names = []             # nota id -> orijinal (görüntülenen) metin
+        self.normalized = []        # normalize id -> normalize edilmiş metin
+        self.normalized_ids = array('I')  # nota id -> normalize id
+        self._name_ids = {}
+        self._normalized_lookup = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        """Notayı tabloya ekler (zaten varsa mevcut id'yi kullanır) ve id'sini döndürür."""
+        note_id = self._name_ids.get(name)
+        if note_id is not None:
+            return note_id
+
+        normalized = normalize_note(name)
+        normalized_id = self._normalized_lookup.get(normalized)
+        if normalized_id is None:
+            normalized_id = len(self.normalized)
+            self.normalized.append(sys.intern(normalized))
+            self._normalized_lookup[normalized] = normalized_id
+
+        note_id = len(self.names)
+        self.names.append(sys.intern(name))
+        self.normalized_ids.append(normalized_id)
+        self._name_ids[name] = note_id
+        return note_id
+
+    def copy(self):
+        """
+        Tablonun bağımsız kopyası. Eski snapshot'ların tablosu hiç değişmesin diye artımlı
+        güncellemede yeni notalar kopyaya eklenir; mevcut id'ler iki tabloda da aynıdır.
+        """
+        table = NoteTable()
+        table.names = list(self.names)
+        table.normalized = list(self.normalized)
+        table.normalized_ids = array('I', self.normalized_ids)
+        table._name_ids = dict(self._name_ids)
+        table._normalized_lookup = dict(self._normalized_lookup)
+        return table
+
+    def encode(self, notes):
+        """Nota listesini kompakt bir id dizisine çevirir."""
+        if not notes:
+            return _EMPTY_IDS
+        return array('I', [self.intern(note) for note in notes])
+
+    def decode(self, note_ids):
+        """Id dizisini tekrar nota metinlerine çevirir."""
+        return [self.names[note_id] for note_id in note_ids]
+
+
+class PerfumeRecord:
+    """Tek bir parfümün kompakt kaydı. Notalar NoteTable id dizileri olarak tutulur."""
+
+    __slots__ = ('brand', 'fragrance', 'concentration', 'year', 'source_url', 'scraped_date',
+                 'top', 'heart', 'base', 'all', 'notes')
+
+    def __init__(self, perfume, notes):
+        self.brand = perfume.get('brand', '')
+        self.fragrance = perfume.get('fragrance', '')
+        self.concentration = perfume.get('concentration', '')
+        self.year = perfume.get('year')
+        self.source_url = perfume.get('source_url', '')
+        self.scraped_date = perfume.get('scraped_date', '')
+        self.top = notes.encode(perfume.get('top_notes'))
+        self.heart = notes.encode(perfume.get('heart_notes'))
+        self.base = notes.encode(perfume.get('base_notes'))
+        self.all = notes.encode(perfume.get('all_notes'))
+        self.notes = notes
+
+    def normalized_note_ids(self):
+        """Parfümün tüm notalarının (tekrarsız) normalize id'leri."""
+        normalized_ids = self.notes.normalized_ids
+        return {normalized_ids[note_id] for note_id in self.all}
+
+    def note_tiers(self):
+        """
+        Parfümün tüm notalarının normalize id'si -> notanın geçtiği kademelerin bit maskesi
+        (1 top, 2 heart, 4 base). Kademe listeleri boşsa (sadece all_notes) maskeler 0'dır.
+        """
+        normalized_ids = self.notes.normalized_ids
+        tiers = dict.fromkeys([normalized_ids[note_id] for note_id in self.all], 0)
+        for bit, slot in _TIER_BITS:
+            for note_id in getattr(self, slot):
+                normalized_id = normalized_ids[note_id]
+                if normalized_id in tiers:
+                    tiers[normalized_id] |= bit
+        return tiers
+
+    # Eski dict tabanlı kodun (perfume['all_notes'], perfume.get('brand')) çalışmaya devam etmesi için
+    def get(self, key, default=None):
+        slot = _TIER_SLOTS.get(key)
+        if slot is not None:
+            return self.notes.decode(getattr(self, slot))
+        if key == 'notes_count':
+            return len(self.all)
+        if key in self.__slots__ and key not in ('notes', 'all', 'top', 'heart', 'base'):
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self):
+        """Kaydı scrape dosyasındaki dict biçimine geri çevirir."""
+        perfume = {
+            'brand': self.brand,
+            'fragrance': self.fragrance,
+            'concentration': self.concentration,
+            'year': self.year,
+        }
+        for key, _slot in TIER_FIELDS:
+            perfume[key] = self.get(key)
+        perfume['notes_count'] = len(self.all)
+        perfume['source_url'] = self.source_url
+        perfume['scraped_date'] = self.scraped_date
+        return perfume
+
+
+class Catalog:
+    """Kompakt parfüm kayıtlarının sıralı listesi ve ortak nota tablosu."""
+
+    def __init__(self, records, notes):
+        self.records = records
+        self.notes = notes
+
+    @classmethod
+    def from_dicts(cls, perfumes):
+        """Scrape dosyasından gelen dict listesini kompakt kataloga çevirir."""
+        notes = NoteTable()
+        records = [PerfumeRecord(perfume, notes) for perfume in perfumes]
+        return cls(records, notes)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, perfume_id):
+        return self.records[perfume_id]
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def column(self, field):
+        """Tek bir kayıt alanının değerleri, katalog sırasıyla (ör. facet indeksleri için)."""
+        return [getattr(record, field) for record in self.records]
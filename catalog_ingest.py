@@ -0,0 +1,336 @@
+"""
+Artımlı katalog güncelleme.
+
+Yeni bir scrape, tüm katalog yeniden ayrıştırılıp indekslenmeden canlı kataloga uygulanır:
+parfümler source_url ile eşleştirilir; eklenen, değişen ve silinen kayıtlar için sadece
+etkilenen notaların ters indeks listeleri yeniden yazılır. Sonuç yeni bir snapshot olarak
+tek atamayla yayınlanır (bkz. CatalogStore.ingest).
+
+Değişiklik (delta) dosyası biçimi:
+    {"upsert": [ {scrape kaydı}, ... ], "delete": ["source_url", ...], "base": [mtime_ns, boyut]}
+
+Değişiklik dosyaları CATALOG_DELTA_DIR klasörüne bırakılır; her işçi bunları ad sırasıyla
+artımlı uygular. Aynı dosyanın tekrar uygulanması sonucu değiştirmez. "base", deltanın üzerine
+yazıldığı ana katalog dosyasının imzasıdır: ana dosya sonradan başka bir scrape ile değiştirilirse
+eski deltalar uygulanmaz (yeni verinin üzerine eski kayıtları geri yazmasınlar). "base" içermeyen
+(elle yazılmış) deltalar her ana dosyaya uygulanır.
+
+    python catalog_ingest.py yeni_scrape.json            # farkı hesaplayıp delta dosyası yazar
+    python catalog_ingest.py degisiklikler.json --delta  # hazır delta dosyasını kuyruğa ekler
+    python catalog_ingest.py --compact                   # deltaları ana dosyaya birleştirir
+"""
+import argparse
+import json
+import os
+import time
+from array import array
+
+from catalog import Catalog, NoteTable, PerfumeRecord, TIER_FIELDS
+from catalog_loader import LoadReport, normalize_perfume, stream_perfume_database
+from local_extractor import LocalNoteExtractor
+from note_index import NoteIndex
+
+DELTA_SUFFIX = '.json'
+
+
+class CatalogUpdate:
+    """
+    apply_changes sonucu: yeni snapshot'ın parçaları ve değişiklik sayıları.
+    changed_positions: kaydı eski snapshot'takinden farklı olan (güncellenen, eklenen ya da
+    silinen kaydın yerine taşınan) konumlar; katalog sonundan silinen konumlar dahil değildir.
+    Puanlayıcı ve facet indeksleri bunlardan artımlı güncellenir.
+    """
+
+    def __init__(self, catalog, note_index, local_extractor, url_positions, stats, changed_positions=()):
+        self.catalog = catalog
+        self.note_index = note_index
+        self.local_extractor = local_extractor
+        self.url_positions = url_positions
+        self.stats = stats
+        self.changed_positions = changed_positions
+
+
+def _first_token(path):
+    """Dosyanın boşluk dışındaki ilk karakteri ('[' ya da '{'; boş dosyada '')."""
+    with open(path, 'r', encoding='utf-8') as file:
+        while True:
+            chunk = file.read(4096)
+            if not chunk:
+                return ''
+            chunk = chunk.lstrip()
+            if chunk:
+                return chunk[0]
+
+
+def read_changes(path, report=None):
+    """
+    Dosyadan değişiklikleri okur: (upserts, deletes, tam_snapshot_mı, base).
+    JSON dizi tam bir scrape snapshot'ıdır; nesne ise delta dosyasıdır. base, deltanın yazıldığı
+    ana dosyanın imzasıdır ((mtime_ns, boyut); bilinmiyorsa None).
+    Tam scrape bütünüyle belleğe okunmaz: upserts, normalize edilmiş kayıtları üreten tek seferlik
+    bir akıştır (bkz. stream_perfume_database); atlanan bozuk kayıtlar report'ta sayılır.
+    """
+    if _first_token(path) == '[':
+        return stream_perfume_database(path, report), [], True, None
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    if isinstance(data, dict):
+        base = data.get('base')
+        return data.get('upsert', []), data.get('delete', []), False, tuple(base) if base else None
+    raise ValueError(f"Unsupported change file (expected a JSON array or object): {path}")
+
+
+def delta_matches_base(delta_base, snapshot):
+    """Delta, snapshot'ın ana dosyası için mi yazılmış (imzası olmayan deltalar her dosyaya uyar)."""
+    return delta_base is None or delta_base == (snapshot.mtime_ns, snapshot.size)
+
+
+def list_delta_files(delta_dir):
+    """Klasördeki delta dosyalarının adları, uygulama sırasıyla."""
+    if not delta_dir or not os.path.isdir(delta_dir):
+        return ()
+    return tuple(sorted(name for name in os.listdir(delta_dir)
+                        if name.endswith(DELTA_SUFFIX) and not name.startswith('.')))
+
+
+def url_positions(snapshot):
+    """source_url -> katalog konumu (snapshot başına bir kez hesaplanır)."""
+    if snapshot.url_positions is None:
+        snapshot.url_positions = {record.source_url: position
+                                  for position, record in enumerate(snapshot.perfumes) if record.source_url}
+    return snapshot.url_positions
+
+
+def _same_record(record, perfume):
+    """Kayıt scrape'teki dict ile aynı içeriğe mi sahip (scraped_date hariç)?"""
+    for field in ('brand', 'fragrance', 'concentration', 'year'):
+        if getattr(record, field) != perfume.get(field, '' if field != 'year' else None):
+            return False
+    return all(record.get(key) == list(perfume.get(key) or []) for key, _slot in TIER_FIELDS)
+
+
+def diff_snapshot(snapshot, perfumes):
+    """
+    Tam bir scrape'i mevcut snapshot ile karşılaştırır: (upserts, deletes).
+    Sadece yeni veya içeriği değişen kayıtlar upsert edilir; scrape'te olmayanlar silinir.
+    """
+    positions = url_positions(snapshot)
+    report = LoadReport()
+    upserts = []
+    seen = set()
+    for raw in perfumes:
+        # Yüklenen kayıtlarla aynı kurallarla normalize edilir, yoksa her kayıt "değişmiş" görünür
+        perfume = normalize_perfume(raw, report)
+        url = perfume.get('source_url') if perfume else None
+        if not url:
+            continue
+        seen.add(url)
+        position = positions.get(url)
+        if position is None or not _same_record(snapshot.perfumes[position], perfume):
+            upserts.append(perfume)
+    deletes = [url for url in positions if url not in seen]
+    return upserts, deletes
+
+
+def _as_mutable_catalog(snapshot):
+    """İkili (mmap) katalog artımlı güncellenemez; bu durumda bir kez bellekte kurulur."""
+    if isinstance(snapshot.perfumes.notes, NoteTable):
+        return snapshot.perfumes, snapshot.note_index
+    catalog = Catalog.from_dicts(record.to_dict() for record in snapshot.perfumes)
+    return catalog, NoteIndex(catalog)
+
+
+def apply_changes(snapshot, upserts, deletes):
+    """
+    Değişiklikleri snapshot'ı değiştirmeden uygular ve yeni snapshot'ın parçalarını döndürür.
+    Değişmeyen kayıtlar ve dokunulmayan notaların ters indeks listeleri eski snapshot ile
+    paylaşılır. Silinen kaydın yerine katalogdaki son kayıt taşınır (konumlar sıkışık kalır).
+    """
+    catalog, note_index = _as_mutable_catalog(snapshot)
+    if catalog is not snapshot.perfumes:
+        positions = {record.source_url: position for position, record in enumerate(catalog) if record.source_url}
+    else:
+        positions = dict(url_positions(snapshot))
+    stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'skipped': 0}
+
+    # Aynı source_url birden çok kez geçerse son kayıt geçerlidir
+    report = LoadReport()
+    latest = {}
+    for raw in upserts:
+        perfume = normalize_perfume(raw, report)
+        url = perfume.get('source_url') if perfume else None
+        if url:
+            latest[url] = perfume
+        else:
+            stats['skipped'] += 1
+    delete_urls = {url for url in deletes if url in positions and url not in latest}
+
+    notes = catalog.notes.copy()
+    records = list(catalog.records)
+    note_counts = array('I', note_index.note_counts)
+    # normalize nota id -> {parfüm konumu: net değişim (+1 eklendi, -1 çıkarıldı,
+    # 0 liste aynı kalır ama notanın kademesi değişmiş olabilir)}
+    posting_changes = {}
+    changed = set()
+
+    def move_postings(normalized_ids, perfume_id, change):
+        for normalized_id in normalized_ids:
+            changes = posting_changes.setdefault(normalized_id, {})
+            changes[perfume_id] = changes.get(perfume_id, 0) + change
+
+    # 1️⃣ Silme: büyükten küçüğe, son kayıt boşalan konuma taşınır
+    for position in sorted((positions[url] for url in delete_urls), reverse=True):
+        last = len(records) - 1
+        move_postings(records[position].normalized_note_ids(), position, -1)
+        del positions[records[position].source_url]
+        if position != last:
+            moved = records[last]
+            moved_ids = moved.normalized_note_ids()
+            move_postings(moved_ids, last, -1)
+            move_postings(moved_ids, position, +1)
+            records[position] = moved
+            note_counts[position] = note_counts[last]
+            positions[moved.source_url] = position
+            changed.add(position)
+        records.pop()
+        note_counts.pop()
+        stats['deleted'] += 1
+
+    # 2️⃣ Güncelleme ve ekleme
+    for url, perfume in latest.items():
+        position = positions.get(url)
+        if position is not None and _same_record(records[position], perfume):
+            stats['unchanged'] += 1
+            continue
+
+        record = PerfumeRecord(perfume, notes)
+        new_tiers = record.note_tiers()
+        if position is None:
+            position = len(records)
+            records.append(record)
+            note_counts.append(len(new_tiers))
+            positions[url] = position
+            move_postings(new_tiers, position, +1)
+            changed.add(position)
+            stats['inserted'] += 1
+        else:
+            old_tiers = records[position].note_tiers()
+            move_postings(old_tiers.keys() - new_tiers.keys(), position, -1)
+            move_postings(new_tiers.keys() - old_tiers.keys(), position, +1)
+            move_postings([normalized_id for normalized_id in old_tiers.keys() & new_tiers.keys()
+                           if old_tiers[normalized_id] != new_tiers[normalized_id]], position, 0)
+            records[position] = record
+            note_counts[position] = len(new_tiers)
+            changed.add(position)
+            stats['updated'] += 1
+
+    # 3️⃣ Sadece etkilenen notaların listeleri yeniden yazılır; diğerleri paylaşılır.
+    # Listede kalan ya da eklenen konumların kademesi o konumdaki son kayıttan okunur.
+    postings = list(note_index.postings)
+    tier_masks = list(note_index.tier_masks)
+    postings.extend(array('I') for _ in range(len(notes.normalized) - len(postings)))
+    tier_masks.extend(array('B') for _ in range(len(notes.normalized) - len(tier_masks)))
+    final_tiers = {}
+
+    def tiers_at(perfume_id, normalized_id):
+        if perfume_id not in final_tiers:
+            final_tiers[perfume_id] = records[perfume_id].note_tiers()
+        return final_tiers[perfume_id][normalized_id]
+
+    for normalized_id, changes in posting_changes.items():
+        removed = {perfume_id for perfume_id, change in changes.items() if change < 0}
+        retiered = {perfume_id for perfume_id, change in changes.items() if change == 0}
+        added = sorted(perfume_id for perfume_id, change in changes.items() if change > 0)
+        kept = [(perfume_id, tiers_at(perfume_id, normalized_id) if perfume_id in retiered else tiers)
+                for perfume_id, tiers in zip(postings[normalized_id], tier_masks[normalized_id])
+                if perfume_id not in removed]
+        postings[normalized_id] = array('I', [perfume_id for perfume_id, _tiers in kept] + added)
+        tier_masks[normalized_id] = array('B', [tiers for _perfume_id, tiers in kept] +
+                                          [tiers_at(perfume_id, normalized_id) for perfume_id in added])
+
+    new_catalog = Catalog(records, notes)
+    new_index = NoteIndex.from_parts(notes, postings, tier_masks, note_counts)
+    # Yerel çıkarıcının otomatı sadece sözlüğe yeni nota eklendiyse yeniden kurulur
+    if len(notes.normalized) == len(snapshot.note_index.vocabulary):
+        local_extractor = snapshot.local_extractor
+    else:
+        local_extractor = LocalNoteExtractor(new_index.vocabulary)
+    changed = {position for position in changed if position < len(records)}
+    return CatalogUpdate(new_catalog, new_index, local_extractor, positions, stats, changed)
+
+
+def _write_json_atomic(path, data):
+    """Dosyayı geçici bir dosyaya yazıp os.replace ile yerine koyar (okuyucular yarım dosya görmez)."""
+    temp_path = os.path.join(os.path.dirname(path) or '.', f".{os.path.basename(path)}.tmp{os.getpid()}")
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def write_delta(delta_dir, upserts, deletes, base=None):
+    """
+    Değişiklikleri klasöre yeni bir delta dosyası olarak yayınlar ve dosya adını döndürür.
+    base: deltanın hesaplandığı snapshot'ın ana dosya imzası ((mtime_ns, boyut); bkz. delta_matches_base).
+    """
+    os.makedirs(delta_dir, exist_ok=True)
+    existing = list_delta_files(delta_dir)
+    sequence = int(existing[-1].split('_', 1)[0]) + 1 if existing else 1
+    name = f"{sequence:06d}_{time.strftime('%Y%m%d_%H%M%S')}{DELTA_SUFFIX}"
+    data = {"upsert": upserts, "delete": deletes}
+    if base is not None and None not in base:
+        data["base"] = list(base)
+    _write_json_atomic(os.path.join(delta_dir, name), data)
+    return name
+
+
+def compact(store, delta_dir):
+    """
+    Tüm deltaları içeren güncel kataloğu ana dosyaya, ana dosyanın kendi biçiminde (JSON ya da
+    ikili katalog) yazar ve uygulanmış deltaları siler.
+    """
+    from binary_catalog import is_binary_catalog, write_binary_catalog
+
+    snapshot = store.load()
+    if is_binary_catalog(store.path):
+        write_binary_catalog(snapshot.perfumes, store.path)
+    else:
+        _write_json_atomic(store.path, [record.to_dict() for record in snapshot.perfumes])
+    # Deltalar tekrar uygulanabilir olduğundan silinmeden önce okuyan işçiler etkilenmez
+    for name in snapshot.applied_deltas:
+        os.remove(os.path.join(delta_dir, name))
+    return len(snapshot.perfumes), len(snapshot.applied_deltas)
+
+
+if __name__ == "__main__":
+    from catalog_store import CatalogStore
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Yeni scrape'i kataloga artımlı olarak uygular")
+    parser.add_argument("input", nargs="?", help="Tam scrape JSON'u (dizi) ya da delta dosyası (nesne)")
+    parser.add_argument("--delta", action="store_true", help="Girdi bir delta dosyası (fark hesaplanmaz)")
+    parser.add_argument("--compact", action="store_true", help="Deltaları ana katalog dosyasına birleştir")
+    parser.add_argument("--database", default=Config.PERFUME_DATABASE_PATH)
+    parser.add_argument("--delta-dir", default=Config.CATALOG_DELTA_DIR)
+    args = parser.parse_args()
+
+    store = CatalogStore(args.database, delta_dir=args.delta_dir)
+    if args.compact:
+        count, removed = compact(store, args.delta_dir)
+        print(f"✅ {count} parfüm '{args.database}' dosyasına yazıldı, {removed} delta dosyası silindi.")
+    elif not args.input:
+        parser.error("input is required unless --compact is given")
+    else:
+        report = LoadReport(args.input)
+        upserts, deletes, full_snapshot, _base = read_changes(args.input, report)
+        snapshot = store.load()
+        if full_snapshot and not args.delta:
+            upserts, deletes = diff_snapshot(snapshot, upserts)
+        else:
+            upserts = list(upserts)
+        if report.dropped_total:
+            print(f"UYARI: Bozuk kayıtlar atlandı: {report.summary()}")
+        if not upserts and not deletes:
+            print("Katalogda değişiklik yok, delta yazılmadı.")
+        else:
+            name = write_delta(args.delta_dir, upserts, deletes, base=(snapshot.mtime_ns, snapshot.size))
+            print(f"✅ {len(upserts)} ekleme/güncelleme ve {len(deletes)} silme '{name}' olarak yayınlandı.")
@@ -0,0 +1,325 @@
+"""
+Akış (streaming) katalog yükleyici.
+
+Scrape dosyası tek bir json.load ile belleğe alınmaz: JSON dizisi sabit boyutlu parçalar halinde
+okunur ve kayıtlar tek tek ayrıştırılır. Her kayıt doğrulanır ve tutarsız alanlar normalize edilir;
+bozuk kayıtlar atlanıp sayılır. Kayıtlar doğrudan Catalog.from_dicts / indeks kurucusuna akar,
+böylece yükleme sırasındaki bellek ham metin + tüm dict'ler değil, çıktı yapıları kadardır.
+"""
+import gc
+import json
+import re
+from contextlib import contextmanager
+
+# Okuma parçası boyutu (karakter). Bellekte en fazla bir parça + en uzun kayıt tutulur.
+READ_CHUNK_SIZE = 1 << 20
+# Tek bir kaydın en fazla boyutu; bozuk dosyada dosyanın geri kalanı belleğe okunmasın
+MAX_RECORD_SIZE = 16 << 20
+# Bir JSON sayısının devamı olabilecek karakterler ("1." | "5", "2e" | "-3" gibi parça sınırları için)
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# catalog.TIER_FIELDS ile aynı sıra (catalog -> database_utils -> bu modül döngüsel içe aktarımı yüzünden ayrı)
+_TIER_KEYS = ('top_notes', 'heart_notes', 'base_notes')
+_NOTE_KEYS = _TIER_KEYS + ('all_notes',)
+# Scrape kaydının alanları, scraper'ın yazdığı ve normalize_perfume'un ürettiği sırayla
+_RECORD_KEYS = ('brand', 'fragrance', 'concentration', 'year') + _NOTE_KEYS + ('notes_count', 'source_url', 'scraped_date')
+
+
+class CatalogLoadError(Exception):
+    """Katalog dosyası okunamadı (yok, JSON dizisi değil ya da yarıda kesilmiş)."""
+
+
+class LoadReport:
+    """Yükleme istatistikleri: okunan, yüklenen, atlanan (nedenine göre) ve düzeltilen alanlar."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.records = 0
+        self.loaded = 0
+        self.dropped = {}       # neden -> adet
+        self.normalized = {}    # alan -> düzeltilen kayıt sayısı
+
+    @property
+    def dropped_total(self):
+        return sum(self.dropped.values())
+
+    def drop(self, reason):
+        self.dropped[reason] = self.dropped.get(reason, 0) + 1
+
+    def fix(self, field):
+        self.normalized[field] = self.normalized.get(field, 0) + 1
+
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'records': self.records,
+            'loaded': self.loaded,
+            'dropped': dict(self.dropped),
+            'normalized': dict(self.normalized),
+        }
+
+    def summary(self):
+        text = f"{self.loaded}/{self.records} kayıt yüklendi"
+        if self.dropped:
+            text += ", atlanan: " + ", ".join(f"{reason}={count}" for reason, count in sorted(self.dropped.items()))
+        if self.normalized:
+            text += ", düzeltilen: " + ", ".join(f"{field}={count}" for field, count in sorted(self.normalized.items()))
+        return text
+
+
+@contextmanager
+def paused_gc():
+    """
+    Toplu yükleme/kurulum sırasında döngüsel GC'yi durdurur. Katalog yapıları (dict, liste,
+    PerfumeRecord, array) döngü içermez; büyüyen yığında tekrar tekrar yapılan GC taramaları
+    sadece süre ekler. Önceden kapalıysa GC açılmaz (iç içe kullanım).
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _normalize_year(value, report):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        report.fix('year')
+        return int(value)
+    text = str(value).strip()
+    if text.isdigit():
+        report.fix('year')
+        return int(text)
+    # "Belirtilmemiş" vb. bilinmeyen yıl -> None
+    report.fix('year')
+    return None
+
+
+def _normalize_notes(value, field, report):
+    if value is None:
+        return []
+    if type(value) is list:
+        # Hızlı yol: kayıtların neredeyse tamamı zaten temizdir, liste kopyalanmadan kullanılır
+        try:
+            if '' not in value and list(map(str.strip, value)) == value:
+                return value
+        except TypeError:
+            # Listede metin olmayan öğe var; aşağıdaki yavaş yol ayıklar
+            pass
+    if isinstance(value, str):
+        # Bazı scrape'lerde liste yerine virgülle ayrılmış metin gelir
+        value = value.split(',')
+        report.fix(field)
+    elif not isinstance(value, list):
+        raise ValueError(f"invalid_{field}")
+    notes = [note.strip() for note in value if isinstance(note, str) and note.strip()]
+    if len(notes) != len(value) or any(note != original for note, original in zip(notes, value)):
+        report.fix(field)
+    return notes
+
+
+def _complete_clean_record(raw, report):
+    """
+    Hızlı yol: alanları zaten normalize biçimde olan kaydı (scrape'lerin neredeyse tamamı)
+    kopyalamadan yerinde tamamlar (year, notes_count). Kayıt temiz değilse dokunmadan None döner.
+    """
+    (brand, fragrance, concentration, year, top, heart, base, all_notes,
+     _notes_count, source_url, scraped_date) = raw.values()
+    if not (type(brand) is str and type(fragrance) is str and type(concentration) is str
+            and type(source_url) is str and type(scraped_date) is str
+            and type(top) is list and type(heart) is list and type(base) is list and type(all_notes) is list):
+        return None
+    if not all_notes and (top or heart or base):
+        return None
+    texts = [fragrance, brand, concentration, *top, *heart, *base, *all_notes]
+    try:
+        if list(map(str.strip, texts)) != texts:
+            return None
+    except TypeError:
+        return None
+    # Boş olabilen tek metinler marka ve konsantrasyondur
+    if not fragrance or '' in top or '' in heart or '' in base or '' in all_notes:
+        return None
+    if type(year) is not int:
+        raw['year'] = _normalize_year(year, report)
+    raw['notes_count'] = len(all_notes)
+    return raw
+
+
+def normalize_perfume(raw, report):
+    """
+    Tek bir scrape kaydını doğrular ve normalize eder; kullanılamazsa None döner (nedeni sayılır).
+      year          -> int ya da None ("Belirtilmemiş", boş metin)
+      concentration -> kırpılmış metin; yoksa ''
+      *_notes       -> kırpılmış, boş olmayan metin listesi
+      all_notes     -> boşsa kademelerin birleşimi
+    Scrape biçimindeki temiz kayıt yeni dict'e kopyalanmaz, yerinde tamamlanır.
+    """
+    if type(raw) is dict and tuple(raw) == _RECORD_KEYS:
+        perfume = _complete_clean_record(raw, report)
+        if perfume is not None:
+            return perfume
+    if not isinstance(raw, dict):
+        report.drop('not_an_object')
+        return None
+    brand = raw.get('brand')
+    fragrance = raw.get('fragrance')
+    if not isinstance(fragrance, str) or not fragrance.strip():
+        report.drop('missing_fragrance')
+        return None
+
+    try:
+        tiers = {key: _normalize_notes(raw.get(key), key, report) for key in _NOTE_KEYS}
+    except ValueError as e:
+        report.drop(str(e))
+        return None
+    if not tiers['all_notes'] and any(tiers[key] for key in _TIER_KEYS):
+        tiers['all_notes'] = [note for key in _TIER_KEYS for note in tiers[key]]
+        report.fix('all_notes')
+
+    concentration = raw.get('concentration')
+    if not isinstance(concentration, str):
+        if concentration is not None:
+            report.fix('concentration')
+        concentration = '' if concentration is None else str(concentration)
+    elif concentration != concentration.strip():
+        report.fix('concentration')
+        concentration = concentration.strip()
+
+    perfume = {
+        'brand': brand.strip() if isinstance(brand, str) else '',
+        'fragrance': fragrance.strip(),
+        'concentration': concentration,
+        'year': _normalize_year(raw.get('year'), report),
+    }
+    perfume.update(tiers)
+    perfume['notes_count'] = len(tiers['all_notes'])
+    perfume['source_url'] = raw.get('source_url') if isinstance(raw.get('source_url'), str) else ''
+    perfume['scraped_date'] = raw.get('scraped_date') if isinstance(raw.get('scraped_date'), str) else ''
+    return perfume
+
+
+def _decode_complete_values(decode, buffer, position):
+    """
+    Parçadaki tam öğeleri tek çağrıyla çözer: position'dan son '}' karakterine kadarki metin
+    '[...]' içinde çözülebiliyorsa (kesim bir dize ya da iç nesne içine düşerse çözülemez) öğeler
+    ve kesim konumu döner, yoksa (None, position). Tarayıcı anahtar önbelleğini her çağrıdan sonra
+    temizlediği için kayıt başına çağrıya göre anahtar metinleri tekrar tekrar oluşturulmaz.
+    """
+    cut = buffer.rfind('}', position) + 1
+    if cut <= position:
+        return None, position
+    try:
+        return decode('[' + buffer[position:cut] + ']'), cut
+    except json.JSONDecodeError:
+        return None, position
+
+
+def iter_json_array(file, chunk_size=READ_CHUNK_SIZE):
+    """
+    Açık dosyadaki JSON dizisinin öğelerini tek tek üretir (tüm dizi belleğe alınmaz).
+    Söz dizimi bozuksa CatalogLoadError; tek tek kayıtların doğrulaması çağırana kalır.
+    """
+    decoder = json.JSONDecoder()
+    # raw_decode yerine tarayıcı doğrudan çağrılır (kayıt başına bir Python çağrısı daha az)
+    scan_once = decoder.scan_once
+    skip_whitespace = _WHITESPACE.match
+    buffer = file.read(chunk_size)
+    position = 0
+    eof = False
+    # Parça başına bir kez toplu çözüm denenir; olmazsa parça kayıt kayıt çözülür
+    batch = True
+
+    def fill():
+        nonlocal buffer, position, eof, batch
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+        batch = True
+
+    def next_char():
+        # Boşlukları atlayıp sıradaki karakteri döndürür; dosya sonunda ''
+        nonlocal position
+        while True:
+            position = skip_whitespace(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            if eof:
+                return ''
+            fill()
+
+    if next_char() != '[':
+        raise CatalogLoadError("Catalog file must contain a JSON array")
+    position += 1
+
+    char = next_char()
+    while char != ']':
+        if not char:
+            raise CatalogLoadError("Unexpected end of file (truncated catalog?)")
+        values = None
+        if batch:
+            values, end = _decode_complete_values(decoder.decode, buffer, position)
+            batch = values is not None
+        while values is None:
+            try:
+                value, end = scan_once(buffer, position)
+            except StopIteration as e:
+                error = json.JSONDecodeError("Expecting value", buffer, e.value)
+            except json.JSONDecodeError as e:
+                error = e
+            else:
+                # Sayı parça sonunda bölünmüş olabilir ("1." | "5"): sonrası okunmadan tamamlandığı bilinemez
+                if eof or type(value) not in (int, float) or _NUMBER_TAIL.match(buffer, end).end() != len(buffer):
+                    values = (value,)
+                    break
+                error = None
+            if error is not None and (eof or len(buffer) - position > MAX_RECORD_SIZE):
+                raise CatalogLoadError(f"Invalid JSON in catalog: {error}") from error
+            # Kayıt parçanın sonunda bölünmüş olabilir; bir parça daha okunup tekrar denenir
+            fill()
+        yield from values
+
+        position = skip_whitespace(buffer, end).end()
+        char = buffer[position] if position < len(buffer) else next_char()
+        if char == ',':
+            position = skip_whitespace(buffer, position + 1).end()
+            char = buffer[position] if position < len(buffer) else next_char()
+            if char == ']':
+                raise CatalogLoadError(f"Trailing comma before ']' at character {position}")
+        elif char and char != ']':
+            raise CatalogLoadError(f"Expected ',' or ']' at character {position}")
+
+    # Dizinin ardında sadece boşluk olabilir (birleştirilmiş ya da sonuna ekleme yapılmış dosya)
+    position += 1
+    if next_char():
+        raise CatalogLoadError(f"Unexpected data after the closing ']' at character {position}")
+
+
+def stream_perfume_database(path, report=None):
+    """
+    Scrape dosyasındaki geçerli (normalize edilmiş) kayıtları tek tek üretir.
+    Dosya düzeyindeki hatalar CatalogLoadError ile bildirilir; bozuk kayıtlar report'ta sayılır.
+    """
+    report = report if report is not None else LoadReport(path)
+    try:
+        file = open(path, 'r', encoding='utf-8')
+    except OSError as e:
+        raise CatalogLoadError(f"Catalog file could not be opened: {path}: {e}") from e
+    with file:
+        try:
+            for raw in iter_json_array(file):
+                report.records += 1
+                perfume = normalize_perfume(raw, report)
+                if perfume is not None:
+                    report.loaded += 1
+                    yield perfume
+        except UnicodeDecodeError as e:
+            raise CatalogLoadError(f"Catalog file is not valid UTF-8: {path}: {e}") from e
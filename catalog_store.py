@@ -0,0 +1,245 @@
+import os
+import threading
+import time
+
+from flask import current_app
+
+from binary_catalog import BinaryCatalogError, is_binary_catalog, load_binary_catalog
+from catalog import Catalog
+from catalog_ingest import apply_changes, delta_matches_base, list_delta_files, read_changes
+from catalog_loader import CatalogLoadError, LoadReport, paused_gc, stream_perfume_database
+from facet_index import FacetIndex
+from local_extractor import LocalNoteExtractor
+from metrics import timed_stage
+from note_index import NoteIndex
+from scoring import make_scorer
+
+
+class CatalogSnapshot:
+    """
+    Belirli bir anda diskten okunmuş, bir daha değiştirilmeyen katalog görüntüsü.
+    Rotalar her istekte bir snapshot alır ve istek boyunca onu kullanır.
+    Parfümler kompakt Catalog olarak tutulur; ters nota indeksi, puanlama motoru, marka/yıl/
+    konsantrasyon facet indeksleri ve nota sözlüğünden kurulan yerel çıkarıcı da snapshot ile
+    birlikte oluşturulur.
+    Artımlı güncellemede (catalog_ingest.py) indeks, puanlayıcı, facet indeksleri ve çıkarıcı
+    önceki snapshot'tan güncellenmiş olarak verilir; bunlar katalog boyunca yeniden kurulmaz.
+    """
+
+    def __init__(self, perfumes, path, mtime_ns, size, version, scoring_backend='python',
+                 note_index=None, local_extractor=None, applied_deltas=(), scorer=None, facets=None):
+        with paused_gc():
+            self.perfumes = perfumes if isinstance(perfumes, Catalog) else Catalog.from_dicts(perfumes)
+            self.note_index = note_index or NoteIndex(self.perfumes)
+            self.scorer = scorer or make_scorer(scoring_backend, self.note_index)
+            self.facets = facets or FacetIndex(self.perfumes)
+            self.local_extractor = local_extractor or LocalNoteExtractor(self.note_index.vocabulary)
+        self.scoring_backend = scoring_backend
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.version = version
+        # Bu snapshot'a uygulanmış değişiklik dosyaları (CATALOG_DELTA_DIR içindeki adlar)
+        self.applied_deltas = tuple(applied_deltas)
+        self.url_positions = None
+        # Dosyadan yüklemenin istatistikleri (catalog_loader.LoadReport); artımlı sürümlerde aktarılır
+        self.load_report = None
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.perfumes)
+
+
+def _load_catalog(path, report):
+    """
+    Kataloğu dosyadan kurar: ikili katalog mmap ile açılır; JSON kayıtlar akış halinde
+    okunup normalize edilerek doğrudan kompakt Catalog'a yazılır (dict listesi tutulmaz).
+    """
+    if is_binary_catalog(path):
+        try:
+            catalog = load_binary_catalog(path)
+        except (BinaryCatalogError, OSError, ValueError) as e:
+            raise CatalogLoadError(f"Binary catalog could not be opened: {path}: {e}") from e
+        report.records = report.loaded = len(catalog)
+        return catalog
+    with paused_gc():
+        return Catalog.from_dicts(stream_perfume_database(path, report))
+
+
+def _file_signature(path):
+    """Dosyanın değişip değişmediğini anlamak için (mtime, boyut) çiftini döndürür."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CatalogStore:
+    """
+    Parfüm kataloğunu süreç başına bir kez yükler ve bellekte tutar.
+    Dosya değiştiğinde yeni snapshot arka planda ayrıştırılır ve tek bir atama ile
+    yerine konur; devam eden istekler eski snapshot ile çalışmaya devam eder.
+    delta_dir'e yeni değişiklik dosyası düşerse katalog yeniden kurulmaz, değişiklikler
+    artımlı uygulanır (bkz. catalog_ingest.py).
+    """
+
+    def __init__(self, path, reload_interval=2.0, scoring_backend='python', delta_dir=None):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.scoring_backend = scoring_backend
+        self.delta_dir = delta_dir
+        self._snapshot = None
+        self._version = 0
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+
+    def load(self):
+        """Kataloğu senkron olarak (yeniden) yükler ve yeni snapshot'ı döndürür."""
+        with self._reload_lock:
+            return self._reload()
+
+    @property
+    def snapshot(self):
+        """Yüklü snapshot (yoksa None); get_snapshot'ın aksine yükleme veya kontrol tetiklemez."""
+        return self._snapshot
+
+    def get_snapshot(self):
+        """Güncel snapshot'ı döndürür; gerekirse arka planda yeniden yüklemeyi tetikler."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.load()
+
+        now = time.monotonic()
+        if now - self._last_check >= self.reload_interval:
+            self._last_check = now
+            if _file_signature(self.path) != (snapshot.mtime_ns, snapshot.size):
+                self._start_background_reload(self._reload)
+            elif list_delta_files(self.delta_dir) != snapshot.applied_deltas:
+                self._start_background_reload(self._apply_new_deltas)
+        return self._snapshot
+
+    def ingest(self, upserts, deletes=()):
+        """
+        Değişiklikleri canlı kataloga artımlı uygular ve yeni sürümü yayınlar.
+        (yeni_snapshot, istatistikler) döndürür. Sadece bu süreci günceller; tüm işçiler için
+        değişiklikler delta dosyası olarak yayınlanmalıdır (catalog_ingest.write_delta).
+        """
+        with self._reload_lock:
+            current = self._snapshot if self._snapshot is not None else self._reload()
+            update = apply_changes(current, upserts, deletes)
+            snapshot = self._incremental_snapshot(current, update, current.applied_deltas)
+            self._snapshot = snapshot  # Atomik değişim
+            return snapshot, update.stats
+
+    def _start_background_reload(self, target):
+        # Aynı anda yalnızca tek bir yeniden yükleme çalışsın
+        if not self._reload_lock.acquire(blocking=False):
+            return
+
+        def worker():
+            try:
+                target()
+            finally:
+                self._reload_lock.release()
+
+        threading.Thread(target=worker, name="catalog-reload", daemon=True).start()
+
+    def _reload(self):
+        # İmza okumadan ÖNCE alınır: okuma sırasında dosya değişirse bir sonraki kontrol yakalar
+        signature = _file_signature(self.path)
+        report = LoadReport(self.path)
+        current = self._snapshot
+        try:
+            with timed_stage("catalog_load"):
+                perfumes = _load_catalog(self.path, report)
+        except CatalogLoadError as e:
+            print(f"HATA: Katalog yüklenemedi: {e}")
+            perfumes = []
+        if report.dropped_total:
+            print(f"UYARI: Bozuk kayıtlar atlandı: {report.summary()}")
+
+        if not perfumes and current is not None and current.perfumes:
+            # Yarım yazılmış / bozuk dosya: eski snapshot'ı koru, sonraki kontrolde tekrar dene
+            print(f"UYARI: Katalog yeniden yüklenemedi, önceki snapshot kullanılmaya devam ediliyor: {self.path}")
+            return current
+
+        mtime_ns, size = signature if signature else (None, None)
+        self._version += 1
+        with timed_stage("catalog_index"):
+            snapshot = CatalogSnapshot(perfumes, self.path, mtime_ns, size, self._version,
+                                       scoring_backend=self.scoring_backend)
+        snapshot.load_report = report
+        # Ana dosyadan sonra yayınlanmış değişiklikler, yayından önce artımlı uygulanır
+        # (başka bir ana dosya için yazılmış eski deltalar atlanır, bkz. delta_matches_base)
+        snapshot = self._apply_new_deltas(snapshot)
+        self._snapshot = snapshot  # Atomik değişim
+        return snapshot
+
+    def _apply_new_deltas(self, base=None):
+        """
+        Henüz uygulanmamış delta dosyalarını sırayla uygular; sonuç tek seferde yayınlanır.
+        Ana dosyanın değiştirilmesinden önce yazılmış deltalar atlanır ve işlenmiş sayılır.
+        """
+        snapshot = base if base is not None else self._snapshot
+        pending = [name for name in list_delta_files(self.delta_dir) if name not in snapshot.applied_deltas]
+        if not pending:
+            return snapshot
+
+        applied = list(snapshot.applied_deltas)
+        for name in pending:
+            try:
+                upserts, deletes, full_snapshot, delta_base = read_changes(os.path.join(self.delta_dir, name))
+                if full_snapshot:
+                    upserts = list(upserts)
+            except (OSError, ValueError, CatalogLoadError) as e:
+                # Dosyalar atomik yazıldığı için okunamayan dosya bozuktur; tekrar denenmez
+                print(f"UYARI: Delta dosyası okunamadı, atlanıyor: {name}: {e}")
+                applied.append(name)
+                continue
+            if not delta_matches_base(delta_base, snapshot):
+                print(f"UYARI: Delta dosyası önceki bir ana katalog için yazılmış, atlanıyor: {name}")
+                applied.append(name)
+                continue
+            with timed_stage("catalog_ingest"):
+                update = apply_changes(snapshot, upserts, deletes)
+            applied.append(name)
+            snapshot = self._incremental_snapshot(snapshot, update, applied)
+
+        if base is None:
+            self._snapshot = snapshot  # Atomik değişim
+        return snapshot
+
+    def _incremental_snapshot(self, base, update, applied_deltas):
+        """
+        Artımlı güncellemenin parçalarından yeni sürüm numaralı snapshot oluşturur. Puanlayıcı ve
+        facet indeksleri sadece değişen konumlar için güncellenir (bkz. CatalogUpdate.changed_positions).
+        """
+        self._version += 1
+        changed = update.changed_positions
+        snapshot = CatalogSnapshot(update.catalog, self.path, base.mtime_ns, base.size, self._version,
+                                   scoring_backend=self.scoring_backend, note_index=update.note_index,
+                                   local_extractor=update.local_extractor, applied_deltas=applied_deltas,
+                                   scorer=base.scorer.updated(update.note_index, update.catalog, changed),
+                                   facets=base.facets.updated(update.catalog, changed))
+        snapshot.url_positions = update.url_positions
+        snapshot.load_report = base.load_report
+        return snapshot
+
+
+def init_catalog_store(app):
+    """Uygulama için katalog deposunu oluşturur ve kataloğu hemen yükler."""
+    store = CatalogStore(
+        app.config['PERFUME_DATABASE_PATH'],
+        reload_interval=app.config.get('CATALOG_RELOAD_INTERVAL', 2.0),
+        scoring_backend=app.config.get('SCORING_BACKEND', 'python'),
+        delta_dir=app.config.get('CATALOG_DELTA_DIR'),
+    )
+    store.load()
+    app.extensions['catalog_store'] = store
+    return store
+
+
+def get_catalog_snapshot():
+    """Aktif uygulamanın güncel katalog snapshot'ını döndürür."""
+    return current_app.extensions['catalog_store'].get_snapshot()
@@ -7,6 +7,9 @@ GROQ_API_KEY_VALUE = '...'
 # NOT: Bu yolu kendi sisteminize göre güncellemeyi unutmayın!
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PERFUME_DATABASE_PATH = os.path.join(BASE_DIR, 'perfume_database_20250904_201308.json')
+EXTRACTION_CACHE_PATH = os.path.join(BASE_DIR, 'extraction_cache.sqlite3')
+CATALOG_DELTA_DIR = os.path.join(BASE_DIR, 'catalog_deltas')
+METRICS_MULTIPROCESS_DIR = os.path.join(BASE_DIR, 'metrics_multiprocess')
 
 class Config:
     # SECRET_KEY değeri hala çevre değişkeninden alınabilir.
@@ -17,4 +20,90 @@ class Config:
     # Doğrudan koda gömülü anahtar değerini kullanıyoruz.
     GROQ_API_KEY = GROQ_API_KEY_VALUE
         
-    PERFUME_DATABASE_PATH = PERFUME_DATABASE_PATH
\ No newline at end of file
+    PERFUME_DATABASE_PATH = PERFUME_DATABASE_PATH
+
+    # LLM istemcisi (bkz. llm_client.py): 'groq' veya 'stub' (ağsız, deterministik; test/ölçüm için)
+    LLM_BACKEND = 'groq'
+    LLM_MODEL = "openai/gpt-oss-120b"
+    LLM_MAX_TOKENS = 4096
+    LLM_TEMPERATURE = 0.6
+    # Bir çıkarım çağrısının yeniden denemeler dahil toplam süre sınırı (saniye)
+    LLM_TIMEOUT = 20.0
+    LLM_CONNECT_TIMEOUT = 5.0
+    # Havuzdaki keep-alive bağlantı sayısı ve aynı anda yapılabilecek LLM çağrısı sayısı
+    LLM_MAX_CONNECTIONS = 10
+    LLM_MAX_CONCURRENCY = 8
+    LLM_MAX_RETRIES = 2
+    LLM_RETRY_BASE_DELAY = 0.5
+    LLM_RETRY_MAX_DELAY = 4.0
+    # Art arda bu kadar hata olursa devre açılır ve LLM_CIRCUIT_RESET_TIMEOUT saniye çağrı yapılmaz
+    LLM_CIRCUIT_FAILURE_THRESHOLD = 5
+    LLM_CIRCUIT_RESET_TIMEOUT = 30.0
+
+    # Üretim modu (bkz. ProductionConfig, lifecycle.py): create_app içinde katalog, indeksler ve
+    # şablonlar önceden ısıtılır; ardından uzun ömürlü nesneler döngüsel GC'den çıkarılır (gc.freeze)
+    WARMUP_ON_START = False
+    GC_FREEZE = False
+
+    # Katalog dosyasının değişip değişmediği en fazla bu sıklıkta (saniye) kontrol edilir.
+    CATALOG_RELOAD_INTERVAL = 2.0
+    # Artımlı katalog güncellemeleri (delta dosyaları) bu klasörden okunur (bkz. catalog_ingest.py)
+    CATALOG_DELTA_DIR = CATALOG_DELTA_DIR
+
+    # Nota çıkarım modu: 'llm', 'local' (katalog sözlüğü, ağ çağrısı yok) veya 'hybrid'
+    # hybrid modda yerel güven bu eşiğin altındaysa LLM'e gidilir (bkz. local_extractor.py)
+    EXTRACTION_MODE = 'llm'
+    LOCAL_EXTRACTOR_MIN_CONFIDENCE = 1.0
+
+    # Puanlama motoru: 'python' (ters indeks) veya 'numpy' (seyrek matris, NumPy gerekir)
+    SCORING_BACKEND = 'python'
+    # Varsayılan benzerlik metriği: 'matched', 'jaccard', 'cosine', 'idf' veya 'tiered' (bkz. scoring.py)
+    SIMILARITY_METRIC = 'matched'
+    # 'tiered' metriğinde nota piramidi kademelerinin varsayılan ağırlıkları; istekte "tier_weights"
+    # ile değiştirilebilir. Kademesi bilinmeyen eşleşmeler üçünün ortalamasını alır (bkz. scoring.TierWeights)
+    TIER_WEIGHTS = {'top': 0.75, 'heart': 1.0, 'base': 1.25}
+
+    # /analyze_comment sayfalama varsayılanları
+    DEFAULT_PAGE_SIZE = 10
+    MAX_PAGE_SIZE = 100
+
+    # Sorgu sonucu önbelleği (bkz. query_cache.py): aynı nota kümesi için sıralama tekrar yapılmaz.
+    # Her sorgu için en az QUERY_CACHE_RANK_DEPTH sonuç sıralanır, sonraki sayfalar buradan dilimlenir.
+    QUERY_CACHE_MAX_ENTRIES = 2048
+    QUERY_CACHE_RANK_DEPTH = 100
+
+    # Yanıttaki facet sayımlarında (marka, yıl, konsantrasyon) alan başına en fazla değer sayısı
+    FACET_MAX_VALUES = 20
+
+    # /metrics uç noktası ve yanıtlara eklenen Server-Timing başlığı
+    METRICS_ENABLED = True
+    # Pre-fork sunucularda her işçi metriklerini bu klasöre yazar ve /metrics tüm işçilerin toplamını
+    # döndürür (bkz. metrics.MultiprocessDirectory). None ise değerler yanıtı veren sürecindir.
+    METRICS_MULTIPROCESS_DIR = os.environ.get('METRICS_MULTIPROCESS_DIR')
+    # İşçilerin metrik dosyalarını güncelleme sıklığı (saniye)
+    METRICS_FLUSH_INTERVAL = 5.0
+
+    # /analyze_comment/stream: her "perfumes" olayında gönderilen parfüm sayısı
+    STREAM_CHUNK_SIZE = 3
+
+    # LLM nota çıkarım önbelleği (bellek içi LRU + SQLite). Yol None ise sadece bellek kullanılır.
+    EXTRACTION_CACHE_PATH = EXTRACTION_CACHE_PATH
+    EXTRACTION_CACHE_MAX_ENTRIES = 10000
+    EXTRACTION_CACHE_TTL = 7 * 24 * 3600
+
+    # /analyze_batch: yorumlar tahmini prompt token bütçesine göre paketlenir
+    BATCH_MAX_COMMENTS = 500
+    BATCH_PROMPT_TOKEN_BUDGET = 6000
+    BATCH_MAX_ITEMS_PER_CALL = 25
+    BATCH_MAX_PARALLEL_CALLS = 4
+
+
+class ProductionConfig(Config):
+    """
+    Pre-fork sunucular için (ör. gunicorn --preload wsgi:app): ana süreç her şeyi
+    fork'tan önce yükler ve ısıtır, işçiler hazır ve paylaşılan sayfalarla başlar.
+    """
+    DEBUG = False
+    WARMUP_ON_START = True
+    GC_FREEZE = True
+    METRICS_MULTIPROCESS_DIR = os.environ.get('METRICS_MULTIPROCESS_DIR', METRICS_MULTIPROCESS_DIR)
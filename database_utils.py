@@ -1,19 +1,32 @@
-import json
+from catalog_loader import CatalogLoadError, LoadReport, paused_gc, stream_perfume_database
 from config import Config
+from scoring import PythonScorer
 
 # Veritabanını yükle
-def load_perfume_database():
-    """Veritabanı JSON dosyasını yükler."""
-    path = Config.PERFUME_DATABASE_PATH
+def load_perfume_database(path=None):
+    """
+    Veritabanı JSON dosyasını yükler. Dosya ikili katalogsa (binary_catalog.py) ayrıştırılmaz;
+    mmap ile açılan MappedCatalog döner (dict yerine PerfumeRecord kayıtları).
+    JSON kayıtlar akış halinde okunur ve normalize edilir (bkz. catalog_loader.py).
+    """
+    path = path or Config.PERFUME_DATABASE_PATH
+    from binary_catalog import is_binary_catalog, load_binary_catalog
+    if is_binary_catalog(path):
+        try:
+            return load_binary_catalog(path)
+        except Exception as e:
+            print(f"HATA: İkili katalog açılırken hata: {e}")
+            return []
+    report = LoadReport(path)
     try:
-        with open(path, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        print(f"HATA: Veritabanı dosyası bulunamadı: {path}")
-        return []
-    except Exception as e:
+        with paused_gc():
+            perfumes = list(stream_perfume_database(path, report))
+    except CatalogLoadError as e:
         print(f"HATA: Veritabanı yüklenirken hata: {e}")
         return []
+    if report.dropped_total:
+        print(f"UYARI: Bozuk kayıtlar atlandı: {report.summary()}")
+    return perfumes
 
 # Notaları normalize et
 def normalize_note(note):
@@ -21,13 +34,21 @@ def normalize_note(note):
     return note.lower().strip().replace(',', '').replace('.', '')
 
 # Eşleşen notaları renklendir
-def highlight_matching_notes(notes_list, user_notes):
+def highlight_matching_notes(notes_list, user_notes, matched_positions=None):
     """
     Parfüm notaları listesindeki, kullanıcının aradığı notaları HTML ile vurgular.
+    matched_positions (NoteMatch.perfume_mask sonucu) verilirse eşleşme tekrar hesaplanmaz.
     """
     if not notes_list:
         return 'Belirtilmemiş'
     
+    if matched_positions is not None:
+        matched_positions = set(matched_positions)
+        return ', '.join(
+            f'<span style="color: red; font-weight: bold;">{note}</span>' if position in matched_positions else note
+            for position, note in enumerate(notes_list)
+        )
+
     user_notes_normalized = [normalize_note(note) for note in user_notes]
     highlighted_notes = []
     
@@ -78,10 +99,14 @@ def calculate_similarity(user_notes, perfume):
     return similarity_score, matched_count, total_count
 
 # Eşleşen parfümleri bul
-def find_matching_perfumes(user_notes, database):
+def find_matching_perfumes(user_notes, database, note_index=None):
     """
     Verilen notalara göre veritabanındaki parfümleri puanlar ve en iyi eşleşenleri döndürür.
+    note_index verilirse tüm katalog taranmaz; puanlar ters indeksin listelerinden hesaplanır.
     """
+    if note_index is not None:
+        return _find_matching_perfumes_indexed(user_notes, database, note_index)
+
     scored_perfumes = []
     
     for perfume in database:
@@ -91,4 +116,44 @@ def find_matching_perfumes(user_notes, database):
     
     # Benzerlik puanına göre sırala
     scored_perfumes.sort(key=lambda x: x[1], reverse=True)
-    return scored_perfumes
\ No newline at end of file
+    return scored_perfumes
+
+def _ranking_key(item):
+    # Yüksek eşleşme önce; eşit puanlarda katalog sırası (eski kararlı sıralama ile aynı)
+    perfume_id, matched = item
+    return -matched, perfume_id
+
+def _find_matching_perfumes_indexed(user_notes, database, note_index):
+    """find_matching_perfumes ile birebir aynı sonucu ters indeks üzerinden üretir."""
+    note_match = note_index.match(user_notes)
+    total = note_match.total
+    if total == 0:
+        return []
+
+    ranked = sorted(note_match.matched_counts().items(), key=_ranking_key)
+    return [(database[perfume_id], matched / total, matched, total)
+            for perfume_id, matched in ranked]
+
+# Sadece istenen sayfadaki parfümleri sırala
+def find_matching_perfumes_page(user_notes, database, note_index, page=1, page_size=10, note_match=None,
+                                metric='matched', scorer=None, tier_weights=None):
+    """
+    Eşleşen parfümlerin yalnızca istenen sayfasını döndürür: (sayfadaki_sonuçlar, toplam_eşleşme).
+    Tüm eşleşmeler sıralanmaz; sadece ilk page * page_size sonuç seçilir.
+    'matched' metriğinde sıralama find_matching_perfumes ile aynıdır, sayfalar kararlıdır.
+    Vurgulama için aynı maske kullanılacaksa note_match önceden hesaplanıp verilebilir.
+    scorer verilmezse saf Python puanlayıcı kullanılır (bkz. scoring.py); tier_weights 'tiered' metriği içindir.
+    """
+    if note_match is None:
+        note_match = note_index.match(user_notes)
+    total = note_match.total
+    if total == 0:
+        return [], 0
+
+    if scorer is None:
+        scorer = PythonScorer(note_index)
+    start = (page - 1) * page_size
+    top_k, total_matches = scorer.top_k(note_match, metric, start + page_size, tier_weights=tier_weights)
+    page_items = [(database[perfume_id], score, matched, total)
+                  for perfume_id, score, matched in top_k[start:]]
+    return page_items, total_matches
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""
+Çevrimiçi model değerlendirmesi (Excel adımı olmadan).
+
+Bir veya daha fazla çıkarım modeli reviews.txt üzerinde paralel çalıştırılır ve her sonuç
+geldiği anda etiketli gerçek nota sayısıyla karşılaştırılır. Metrikler analyze.py'deki
+RunningMetrics ile akış halinde birikir (MAE/RMSE/ağırlıklı skor/hata dağılımı); sonuçlar
+bellekte tutulmaz. Rapor gelismis_dogruluk_analizi.json ile aynı yapıdadır.
+
+Etiketler: "Reviews" ve "Real Notes Count" sütunları olan tablo (.xlsx, .csv veya .jsonl);
+satırlar reviews.txt ile aynı sıradadır.
+
+    python evaluate_models.py --models openai/gpt-oss-20b llama-3.3-70b-versatile
+    python evaluate_models.py --results analysis_results_x.jsonl   # batch_analyzer çıktısını puanla
+"""
+import argparse
+import json
+import os
+import re
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from analyze import REAL_NOTES_COLUMN, ROW_READERS, RunningMetrics, json_report, print_metrics
+from batch_analyzer import TokenBucket
+from config import Config
+from llm_client import LLM_BACKENDS, make_llm_client
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REVIEWS = os.path.join(BASE_DIR, 'reviews.txt')
+DEFAULT_LABELS = os.path.join(BASE_DIR, 'nota_cikarim_analizi_ilk.xlsx')
+REVIEW_COLUMN = "Reviews"
+# reviews.txt satırlarının başındaki "12. " numarası
+_REVIEW_NUMBER = re.compile(r'^\d+\.\s*')
+# Kaç sonuçta bir ara durum yazdırılır
+PROGRESS_EVERY = 50
+
+
+def iter_reviews(path):
+    """reviews.txt yorumlarını numarasız olarak tek tek üretir (boş satırlar atlanır)."""
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            review = _REVIEW_NUMBER.sub('', line.strip())
+            if review:
+                yield review
+
+
+def load_labels(labels_path, reviews_path):
+    """
+    Etiket tablosunu yorumlarla aynı anda akış halinde okur ve sadece gerçek nota sayılarını
+    (yorum sırasıyla) döndürür. Yorum metinleri eşleşmezse ValueError.
+    """
+    extension = os.path.splitext(labels_path)[1].lower()
+    if extension not in ROW_READERS:
+        raise ValueError(f"Unsupported label format '{extension}' (expected one of: {', '.join(ROW_READERS)})")
+    rows = ROW_READERS[extension](labels_path)
+    header = list(next(rows, None) or [])
+    if REAL_NOTES_COLUMN not in header:
+        raise ValueError(f"'{REAL_NOTES_COLUMN}' column not found in {labels_path}")
+    real_index = header.index(REAL_NOTES_COLUMN)
+    review_index = header.index(REVIEW_COLUMN) if REVIEW_COLUMN in header else None
+
+    labels = array('q')
+    reviews = iter_reviews(reviews_path)
+    for number, row in enumerate(rows, 1):
+        review = next(reviews, None)
+        if review is None:
+            raise ValueError(f"{labels_path} has more rows than {reviews_path}")
+        if review_index is not None and str(row[review_index] or '').strip() != review:
+            raise ValueError(f"Review #{number} in {labels_path} does not match {reviews_path}")
+        labels.append(int(row[real_index] or 0))
+    if next(reviews, None) is not None:
+        raise ValueError(f"{reviews_path} has more reviews than {labels_path}")
+    return labels
+
+
+def labeled_note_count(notes, excluded):
+    """
+    Etiketle karşılaştırılan nota sayısı. Etiketler yorumda geçen tüm notaları sayar:
+    istenenler ve hariç tutulanlar (canlı ve dosya değerlendirmesi aynı sayımı kullanır).
+    """
+    return len(notes or ()) + len(excluded or ())
+
+
+def evaluate_live(models, labels, reviews_path, backend=None, workers=8, rate=0.0):
+    """
+    Modelleri yorumlar üzerinde paralel çalıştırır; {model: RunningMetrics} ve {model: hata_sayısı}
+    döndürür. LLM hatası alan yorum 0 nota sayılır (batch_analyzer'daki boş sonuçla aynı).
+    """
+    from note_extraction import extract_notes_with_client
+
+    clients = {model: make_llm_client(Config, model=model, backend=backend) for model in models}
+    metrics = {model: RunningMetrics() for model in models}
+    failures = dict.fromkeys(models, 0)
+    bucket = TokenBucket(rate) if rate > 0 else None
+    total = len(labels) * len(models)
+
+    def worker(model, index, review):
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            query = extract_notes_with_client(review, clients[model])
+            return model, index, labeled_note_count(query.notes, query.excluded), None
+        except Exception as e:
+            return model, index, 0, e
+
+    tasks = ((model, index, review) for index, review in enumerate(iter_reviews(reviews_path))
+             for model in models)
+    done_count = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        while True:
+            # Kuyrukta en fazla 2 x işçi sayısı kadar iş tut (bellek sınırlı kalsın)
+            while len(in_flight) < workers * 2:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                in_flight.add(executor.submit(worker, *task))
+            if not in_flight:
+                break
+
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                model, index, note_count, error = future.result()
+                metrics[model].update(labels[index], note_count)
+                if error is not None:
+                    failures[model] += 1
+                    print(f"❌ {model} #{index + 1}: {error}")
+                done_count += 1
+                if done_count % PROGRESS_EVERY == 0 or done_count == total:
+                    print_progress(done_count, total, metrics)
+    return metrics, failures
+
+
+def print_progress(done_count, total, metrics):
+    running = ", ".join(f"{model}: {data.result()['weighted_accuracy']:.2f}%"
+                        for model, data in metrics.items())
+    print(f"[{done_count}/{total}] Weighted (anlık) → {running}")
+
+
+def evaluate_results_file(path, labels):
+    """
+    batch_analyzer JSONL çıktısını puanlar. Aynı yorumun birden çok kaydı varsa (yeniden deneme)
+    sonuncusu geçerlidir; çıktıda olmayan yorumlar 0 nota sayılır. excluded_notes alanı olmayan
+    (eski) çıktılarda sadece extracted_notes sayılır.
+    """
+    counts = array('q', bytes(8 * len(labels)))
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            index = result.get("review_number", 0) - 1
+            if 0 <= index < len(labels):
+                counts[index] = labeled_note_count(result.get("extracted_notes"), result.get("excluded_notes"))
+    return RunningMetrics().update(labels, counts)
+
+
+def _results_model_name(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name[len("analysis_results_"):] if name.startswith("analysis_results_") else name
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Nota çıkarım modellerini etiketli yorumlar üzerinde değerlendirir")
+    parser.add_argument("--models", nargs="+", default=[], help="Canlı çalıştırılacak model adları")
+    parser.add_argument("--results", nargs="+", default=[], help="Puanlanacak batch_analyzer JSONL çıktıları")
+    parser.add_argument("--reviews", default=DEFAULT_REVIEWS, help="Yorum dosyası")
+    parser.add_argument("--labels", default=DEFAULT_LABELS, help="Gerçek nota sayıları (.xlsx, .csv veya .jsonl)")
+    parser.add_argument("--backend", choices=LLM_BACKENDS, default=None, help="LLM arka ucu (varsayılan: Config)")
+    parser.add_argument("--workers", type=int, default=8, help="Eşzamanlı LLM çağrısı sayısı")
+    parser.add_argument("--rate", type=float, default=0.0, help="Saniyedeki en fazla istek (0 = sınırsız)")
+    parser.add_argument("--output", default=os.path.join(
+        BASE_DIR, f"gelismis_dogruluk_analizi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"),
+        help="JSON rapor dosyası")
+    args = parser.parse_args()
+    if not args.models and not args.results:
+        parser.error("at least one of --models or --results is required")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    labels = load_labels(args.labels, args.reviews)
+    print(f"📊 {len(labels)} etiketli yorum, {len(args.models)} canlı model, {len(args.results)} sonuç dosyası")
+
+    metrics = {}
+    failures = {}
+    for path in args.results:
+        metrics[_results_model_name(path)] = evaluate_results_file(path, labels)
+    if args.models:
+        live_metrics, failures = evaluate_live(args.models, labels, args.reviews, backend=args.backend,
+                                               workers=args.workers, rate=args.rate)
+        metrics.update(live_metrics)
+
+    print("=" * 90)
+    results = {model: data.result() for model, data in metrics.items()}
+    for model, data in results.items():
+        print_metrics(model, data)
+        if failures.get(model):
+            print(f"  ⚠️  {failures[model]} yorumda LLM hatası (0 nota sayıldı)\n")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(json_report(results, len(labels)), f, ensure_ascii=False, indent=2)
+    print(f"📊 JSON Rapor: {args.output}")
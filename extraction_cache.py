@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def canonicalize_comment(text):
+    """
+    Önemsiz farkları (büyük/küçük harf, fazla boşluk, baştaki/sondaki noktalama)
+    ortadan kaldırarak aynı anlama gelen yorumların aynı anahtarı üretmesini sağlar.
+    """
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip(' .,!?;:"\'')
+
+
+def make_cache_key(text, model, prompt_version, prompt='single'):
+    """
+    Yorum + model + prompt türü + prompt sürümünden kalıcı önbellek anahtarı üretir.
+    prompt, sonucu üreten prompt'tur ('single': tek yorum, 'batch': paketlenmiş yorumlar);
+    iki prompt'un yanıtları birbirinin yerine kullanılmaz.
+    """
+    raw = f"{model}\x00{prompt}\x00{prompt_version}\x00{canonicalize_comment(text)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+# SQLite'taki süresi dolmuş kayıtlar bu kadar yazmada bir toplu olarak silinir
+PRUNE_EVERY = 1000
+
+
+class ExtractionCache:
+    """
+    LLM nota çıkarım sonuçları için iki katmanlı önbellek:
+    süreç içi LRU (TTL'li) ve yeniden başlatmalarda korunan SQLite katmanı.
+    Sonuçlar JSON'a çevrilebilir değerlerdir (ör. NoteQuery.to_dict); her get yeni bir kopya döndürür.
+    Kilit sadece bellek katmanını korur; SQLite okuma/yazmaları kilit dışında, her iş parçacığının
+    kendi bağlantısıyla yapılır (disk beklemesi diğer istekleri bekletmez).
+    """
+
+    def __init__(self, path=None, max_entries=10000, ttl=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()  # anahtar -> (kayıt zamanı, JSON metni)
+        self._lock = threading.Lock()
+        self._local = threading.local()  # iş parçacığı başına (bağlantı, pid)
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.stores = 0
+
+    def get(self, key):
+        """Önbellekteki çıkarım sonucunu döndürür; yoksa veya süresi dolmuşsa None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, text = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits_memory += 1
+                    return json.loads(text)
+                del self._memory[key]
+
+        entry = self._disk_get(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            created_at, text = entry
+            self._memory_put(key, created_at, text)
+            self.hits_disk += 1
+        return json.loads(text)
+
+    def put(self, key, result):
+        """Çıkarım sonucunu her iki katmana yazar."""
+        now = time.time()
+        text = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._memory_put(key, now, text)
+            self.stores += 1
+            prune = self.stores % PRUNE_EVERY == 0
+        self._disk_put(key, now, text)
+        if prune:
+            self._disk_prune(now)
+
+    def stats(self):
+        """İsabet/ıskalama sayaçlarını döndürür."""
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            'hits_memory': self.hits_memory,
+            'hits_disk': self.hits_disk,
+            'misses': self.misses,
+            'stores': self.stores,
+            'hit_rate': (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+        }
+
+    def _memory_put(self, key, created_at, text):
+        self._memory[key] = (created_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # --- SQLite katmanı ---
+
+    def _db(self):
+        if not self.path:
+            return None
+        # Her iş parçacığı kendi bağlantısını kullanır; fork sonrası ebeveynin bağlantısı kullanılmaz
+        connection, pid = getattr(self._local, 'connection', (None, None))
+        if connection is None or pid != os.getpid():
+            connection = sqlite3.connect(self.path)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS extractions ('
+                'key TEXT PRIMARY KEY, notes TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS extractions_created_at ON extractions (created_at)')
+            connection.commit()
+            self._local.connection = (connection, os.getpid())
+        return connection
+
+    def _disk_get(self, key, now):
+        try:
+            connection = self._db()
+            if connection is None:
+                return None
+            row = connection.execute(
+                'SELECT notes, created_at FROM extractions WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and now - row[1] >= self.ttl:
+                # Süresi dolmuş kayıt okunduğu anda silinir
+                connection.execute('DELETE FROM extractions WHERE key = ? AND created_at = ?', (key, row[1]))
+                connection.commit()
+                return None
+        except sqlite3.Error as e:
+            print(f"UYARI: Çıkarım önbelleği okunamadı: {e}")
+            return None
+
+        if row is None:
+            return None
+        return row[1], row[0]
+
+    def _disk_put(self, key, created_at, text):
+        try:
+            connection = self._db()
+            if connection is None:
+                return
+            connection.execute(
+                'INSERT OR REPLACE INTO extractions (key, notes, created_at) VALUES (?, ?, ?)',
+                (key, text, created_at),
+            )
+            connection.commit()
+        except sqlite3.Error as e:
+            print(f"UYARI: Çıkarım önbelleğine yazılamadı: {e}")
+
+    def _disk_prune(self, now):
+        """Süresi dolmuş tüm kayıtları siler (bir daha okunmayan anahtarlar da birikmesin)."""
+        try:
+            connection = self._db()
+            if connection is None:
+                return
+            connection.execute('DELETE FROM extractions WHERE created_at <= ?', (now - self.ttl,))
+            connection.commit()
+        except sqlite3.Error as e:
+            print(f"UYARI: Çıkarım önbelleği temizlenemedi: {e}")
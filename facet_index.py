@@ -0,0 +1,277 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+# NumPy isteğe bağlıdır: yüklüyse facet sayımları tek bir bincount ile yapılır
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Filtrelenebilir alanlar (istek ve yanıttaki adlarıyla)
+FACET_FIELDS = ('brand', 'concentration', 'year')
+# Değeri olmayan parfümlerin değer id'si (ör. yılı bilinmeyen)
+_NO_VALUE = -1
+
+
+def facet_key(value):
+    """Marka/konsantrasyon değerinin karşılaştırma anahtarı (büyük/küçük harf ve boşluk duyarsız)."""
+    return ' '.join(str(value).split()).casefold()
+
+
+def _text_key(value):
+    return facet_key(value) or None
+
+
+def _year_key(value):
+    # Yıl katalog yüklenirken int'e normalize edilir; eski ikili kataloglarda metin kalmış olabilir
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    text = str(value or '').strip()
+    return int(text) if text.isdigit() else None
+
+
+class SearchFilters:
+    """
+    Bir aramanın facet filtreleri. Aynı alandaki değerler VEYA, farklı alanlar VE ile birleşir.
+    Yıl aralığı iki uçta da dahildir; yıl filtresi verilirse yılı bilinmeyen parfümler elenir.
+    """
+
+    __slots__ = ('brands', 'concentrations', 'year_min', 'year_max')
+
+    def __init__(self, brands=(), concentrations=(), year_min=None, year_max=None):
+        self.brands = tuple(sorted({facet_key(brand) for brand in brands if facet_key(brand)}))
+        self.concentrations = tuple(sorted({facet_key(value) for value in concentrations if facet_key(value)}))
+        self.year_min = year_min
+        self.year_max = year_max
+
+    @classmethod
+    def from_request(cls, data):
+        """
+        İstekteki "filters" nesnesini çözümler:
+            {"brand": "Dior" | ["Dior", ...], "concentration": ..., "year_min": 2000, "year_max": 2010}
+        Geçersiz değerlerde ValueError (mesaj istemciye gösterilir).
+        """
+        if data is None:
+            return cls()
+        if not isinstance(data, dict):
+            raise ValueError("'filters' must be an object.")
+
+        def values(name):
+            value = data.get(name)
+            if value is None:
+                return ()
+            if isinstance(value, str):
+                return (value,)
+            if isinstance(value, list) and all(isinstance(item, str) for item in value):
+                return value
+            raise ValueError(f"Filter '{name}' must be a string or a list of strings.")
+
+        def year(name):
+            value = data.get(name)
+            if value is None or value == '':
+                return None
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Filter '{name}' must be a year.") from None
+
+        filters = cls(values('brand'), values('concentration'), year('year_min'), year('year_max'))
+        if filters.year_min is not None and filters.year_max is not None and filters.year_min > filters.year_max:
+            raise ValueError("'year_min' cannot be greater than 'year_max'.")
+        return filters
+
+    def __bool__(self):
+        return bool(self.brands or self.concentrations or self.year_min is not None or self.year_max is not None)
+
+    def key(self):
+        """Sorgu önbelleği anahtarının parçası."""
+        return self.brands, self.concentrations, self.year_min, self.year_max
+
+
+class _Facet:
+    """
+    Tek bir alanın ikincil indeksi: değer -> parfüm konumları (sıralı) ve
+    parfüm -> değer id sütunu (sonuç kümesinin facet sayımları için).
+    """
+
+    def __init__(self, make_key, show_key=False):
+        # make_key değeri anahtara çevirir; show_key ise yanıtlarda ham değer yerine anahtar
+        # gösterilir (ör. normalize edilmiş yıl)
+        self.make_key = make_key
+        self.show_key = show_key
+        self.values = []        # değer id -> görüntülenen değer (ilk görülen yazım)
+        self._lookup = {}       # anahtar -> değer id (bkz. lookup)
+        self.postings = []      # değer id -> array('I') parfüm konumları
+        self.value_ids = array('i')
+
+    @property
+    def lookup(self):
+        """Anahtar -> değer id; hazır dizilerden yüklenen indekste ilk kullanımda değerlerden kurulur."""
+        if self._lookup is None:
+            self._lookup = {self.make_key(value): value_id for value_id, value in enumerate(self.values)}
+        return self._lookup
+
+    def load(self, values, value_ids, postings):
+        """
+        İndeksi hazır dizilerden (ikili kataloğun mmap görünümleri) kurar; hiçbiri kopyalanmaz.
+        values değer id ile, value_ids parfüm konumuyla (int32, değersizlerde _NO_VALUE),
+        postings değer id ile sıralı parfüm konumlarını veren dizilerdir.
+        """
+        self.values = values
+        self.value_ids = value_ids
+        self.postings = postings
+        self._lookup = None
+
+    def build(self, column):
+        """Alanın katalog sırasıyla değerlerinden indeksi kurar."""
+        value_ids = array('i')
+        known = {}      # ham değer -> değer id (anahtar her farklı ham değer için bir kez hesaplanır)
+        for value in column:
+            value_id = known.get(value)
+            if value_id is None:
+                value_id = known[value] = self._value_id_for(value)
+            value_ids.append(value_id)
+
+        postings = self.postings
+        for perfume_id, value_id in enumerate(value_ids):
+            if value_id != _NO_VALUE:
+                postings[value_id].append(perfume_id)
+        self.value_ids = value_ids
+
+    def updated(self, field, catalog, changed_positions):
+        """
+        Artımlı güncellenmiş katalog için indeksin kopyası: sadece changed_positions'taki ve
+        katalog sonundan silinen konumların değerleri değişir; dokunulmayan listeler paylaşılır.
+        """
+        facet = _Facet(self.make_key, self.show_key)
+        facet.values = list(self.values)
+        facet._lookup = dict(self.lookup)
+        facet.postings = list(self.postings)
+        old_ids = self.value_ids
+        # Sütun mmap görünümü olabilir; değiştirilebilir bir kopyası alınır
+        value_ids = facet.value_ids = array('i', old_ids[:len(catalog)].tobytes())
+        removed = {}    # değer id -> listeden çıkan konumlar
+        added = {}      # değer id -> listeye giren konumlar
+        for position in range(len(catalog), len(old_ids)):
+            removed.setdefault(old_ids[position], set()).add(position)
+        for position in sorted(changed_positions):
+            value_id = facet._value_id_for(getattr(catalog.records[position], field))
+            if position < len(old_ids):
+                if old_ids[position] == value_id:
+                    continue
+                removed.setdefault(old_ids[position], set()).add(position)
+                value_ids[position] = value_id
+            else:
+                # Sona eklenen kayıtlar (konumlar sıralı ve ardışık)
+                value_ids.append(value_id)
+            added.setdefault(value_id, set()).add(position)
+
+        for value_id in (removed.keys() | added.keys()) - {_NO_VALUE}:
+            perfume_ids = set(facet.postings[value_id]).difference(removed.get(value_id, ()))
+            facet.postings[value_id] = array('I', sorted(perfume_ids.union(added.get(value_id, ()))))
+        return facet
+
+    def _value_id_for(self, value):
+        key = self.make_key(value)
+        return self._value_id(key if self.show_key else value, key)
+
+    def _value_id(self, value, key):
+        if key is None:
+            return _NO_VALUE
+        value_id = self.lookup.get(key)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self.lookup[key] = value_id
+            self.postings.append(array('I'))
+        return value_id
+
+    def perfumes_for(self, keys):
+        """Anahtarlardan herhangi birine sahip parfümlerin konumları."""
+        perfume_ids = set()
+        for key in keys:
+            value_id = self.lookup.get(key)
+            if value_id is not None:
+                perfume_ids.update(self.postings[value_id])
+        return perfume_ids
+
+    def counts(self, perfume_ids):
+        """Verilen parfümler arasında her değerin kaç kez geçtiği (değer id sütunundan, kayıtlara dokunmadan)."""
+        if np is not None and len(perfume_ids) > 64:
+            column = np.frombuffer(self.value_ids, dtype=np.int32)
+            value_ids = column[np.asarray(perfume_ids, dtype=np.int64)]
+            tally = np.bincount(value_ids[value_ids != _NO_VALUE], minlength=len(self.values))
+            return {self.values[value_id]: int(tally[value_id]) for value_id in np.flatnonzero(tally)}
+
+        tally = {}
+        value_ids = self.value_ids
+        for perfume_id in perfume_ids:
+            value_id = value_ids[perfume_id]
+            if value_id != _NO_VALUE:
+                tally[value_id] = tally.get(value_id, 0) + 1
+        return {self.values[value_id]: count for value_id, count in tally.items()}
+
+
+class FacetIndex:
+    """
+    Marka, yıl ve konsantrasyon için ikincil indeksler. Katalog yüklenirken bir kez kurulur;
+    filtreler nota adaylarıyla puanlamadan önce kesiştirilir ve facet sayımları bu
+    indekslerden hesaplanır (eşleşen kayıtlar tek tek okunmaz).
+    """
+
+    def __init__(self, catalog):
+        self.facets = {field: _Facet(_year_key, show_key=True) if field == 'year' else _Facet(_text_key)
+                       for field in FACET_FIELDS}
+        facet_arrays = getattr(catalog, 'facet_arrays', None)
+        for field, facet in self.facets.items():
+            if facet_arrays is not None:
+                # İkili katalog (binary_catalog.py) facet dizilerini hazır getirir; yeniden kurulmaz
+                facet.load(*facet_arrays(field))
+            else:
+                # Kayıtlar bütünüyle çözülmez; sadece gereken alan sütun olarak okunur
+                facet.build(catalog.column(field))
+        # Yıl aralığı sorguları için katalogdaki yılların sıralı listesi
+        self._years = sorted(self.facets['year'].lookup)
+
+    def updated(self, catalog, changed_positions):
+        """Artımlı güncellenmiş katalog için indeks (bkz. CatalogUpdate.changed_positions)."""
+        index = FacetIndex.__new__(FacetIndex)
+        index.facets = {field: facet.updated(field, catalog, changed_positions)
+                        for field, facet in self.facets.items()}
+        index._years = sorted(index.facets['year'].lookup)
+        return index
+
+    def allowed(self, filters):
+        """Filtrelere uyan parfümlerin konum kümesi; filtre yoksa None (tüm katalog)."""
+        if not filters:
+            return None
+
+        constraints = []
+        if filters.brands:
+            constraints.append(self.facets['brand'].perfumes_for(filters.brands))
+        if filters.concentrations:
+            constraints.append(self.facets['concentration'].perfumes_for(filters.concentrations))
+        if filters.year_min is not None or filters.year_max is not None:
+            low = bisect_left(self._years, filters.year_min) if filters.year_min is not None else 0
+            high = bisect_right(self._years, filters.year_max) if filters.year_max is not None else len(self._years)
+            constraints.append(self.facets['year'].perfumes_for(self._years[low:high]))
+
+        # Küçük kümeden başlanarak kesiştirilir
+        constraints.sort(key=len)
+        allowed = constraints[0]
+        for perfume_ids in constraints[1:]:
+            allowed = allowed.intersection(perfume_ids)
+        return allowed
+
+    def counts(self, perfume_ids, max_values=20):
+        """
+        Sonuç kümesinin facet sayımları: {alan: [{"value": ..., "count": n}, ...]}.
+        Değerler sayıya göre azalan sıradadır; alan başına en fazla max_values değer döner.
+        """
+        facets = {}
+        for field, facet in self.facets.items():
+            counts = sorted(facet.counts(perfume_ids).items(), key=lambda item: (-item[1], str(item[0])))
+            facets[field] = [{"value": value, "count": count} for value, count in counts[:max_values]]
+        return facets
@@ -0,0 +1,99 @@
+import gc
+import time
+
+from flask import Blueprint, current_app, jsonify
+
+from catalog import TIER_FIELDS
+from catalog_store import get_catalog_snapshot
+from database_utils import highlight_matching_notes
+from query_cache import get_query_cache
+from scoring import SIMILARITY_METRICS
+
+# Canlılık / hazırlık uç noktaları (ör. Kubernetes probe'ları veya yük dengeleyici için)
+health = Blueprint('health', __name__)
+
+# Isınma sorgusunda kullanılan nota sayısı (sözlüğün başından alınır)
+WARMUP_NOTE_COUNT = 3
+WARMUP_COMMENT = "A warm vanilla and amber scent with fresh bergamot and a hint of rose."
+
+
+def _lifecycle(app=None):
+    return (app or current_app).extensions.setdefault('lifecycle', {'ready': False})
+
+
+def warm_up(app):
+    """
+    İlk istekte tembel olarak yapılacak işleri önceden yapar: katalog ve indeksler yüklenir,
+    her metrikle bir örnek sorgu rotaların kullandığı yoldan (sorgu önbelleği) puanlanıp ilk
+    sayfası vurgulanır, yerel çıkarıcı çalıştırılır ve ana sayfa şablonu derlenir. Böylece
+    fork'tan sonra işçiler hazır durumu (ve bu sorguların önbellek kayıtlarını) paylaşır.
+    """
+    started = time.perf_counter()
+    with app.app_context():
+        snapshot = get_catalog_snapshot()
+        query_cache = get_query_cache()
+        user_notes = list(snapshot.note_index.vocabulary[:WARMUP_NOTE_COUNT])
+        if user_notes:
+            for metric in SIMILARITY_METRICS:
+                page_items, _total, note_match, _facets = query_cache.page(snapshot, user_notes, metric=metric)
+                for perfume, _similarity, _matched, _total in page_items:
+                    mask = note_match.perfume_mask(perfume)
+                    for key, _slot in TIER_FIELDS:
+                        highlight_matching_notes(perfume.get(key, []), user_notes, mask[key])
+        snapshot.local_extractor.extract(WARMUP_COMMENT)
+        app.jinja_env.get_template('index.html')
+
+    state = _lifecycle(app)
+    state['warmup_seconds'] = round(time.perf_counter() - started, 4)
+    return state['warmup_seconds']
+
+
+def freeze_long_lived_objects():
+    """
+    Şu ana kadar oluşturulan nesneleri döngüsel GC'nin dışına alır (gc.freeze).
+    Fork'tan önce çağrılırsa GC geçişleri bu nesnelerin başlıklarına yazmaz ve
+    işçilerde sayfalar copy-on-write ile kopyalanmadan paylaşılmaya devam eder.
+    """
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+        return gc.get_freeze_count()
+    return 0
+
+
+def init_lifecycle(app):
+    """
+    Hazırlık durumunu kurar. WARMUP_ON_START açıksa ısınma create_app içinde yapılır ve
+    GC_FREEZE açıksa ardından uzun ömürlü nesneler dondurulur; /readyz ancak bundan sonra 200 döner.
+    """
+    state = _lifecycle(app)
+    app.register_blueprint(health)
+
+    if app.config.get('WARMUP_ON_START', False):
+        warm_up(app)
+    if app.config.get('GC_FREEZE', False):
+        state['frozen_objects'] = freeze_long_lived_objects()
+    state['ready'] = True
+    return state
+
+
+@health.route("/healthz")
+def liveness():
+    """Süreç ayakta ve istek işleyebiliyor."""
+    return jsonify({"status": "ok"})
+
+
+@health.route("/readyz")
+def readiness():
+    """Isınma bitti ve katalog yüklü ise hazır; değilse 503 (trafik yönlendirilmemeli)."""
+    state = _lifecycle()
+    snapshot = current_app.extensions['catalog_store'].snapshot
+    perfume_count = len(snapshot) if snapshot is not None else 0
+    ready = state['ready'] and perfume_count > 0
+    return jsonify({
+        "status": "ready" if ready else "not ready",
+        "perfumes": perfume_count,
+        "catalog_version": snapshot.version if snapshot is not None else None,
+        "warmup_seconds": state.get('warmup_seconds'),
+        "load_report": snapshot.load_report.to_dict() if snapshot is not None and snapshot.load_report else None,
+    }), 200 if ready else 503
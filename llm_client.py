@@ -0,0 +1,247 @@
+import json
+import random
+import threading
+import time
+
+from local_extractor import LocalNoteExtractor
+
+
+class LLMClientError(Exception):
+    """LLM çağrısı yapılamadı (zaman aşımı, yoğunluk, üst servis hatası)."""
+
+
+class CircuitOpenError(LLMClientError):
+    """Devre açık: üst servis son çağrılarda sürekli hata verdi, çağrı hiç yapılmadan reddedildi."""
+
+
+class DeadlineExceededError(LLMClientError):
+    """Çağrının süre sınırı (timeout) doldu; yeniden deneme yapılmadı."""
+
+
+class CircuitBreaker:
+    """
+    Art arda failure_threshold hatadan sonra devreyi açar; reset_timeout saniye boyunca
+    çağrılar beklemeden reddedilir. Süre dolunca tek bir deneme çağrısına izin verilir
+    (yarı açık); başarılı olursa devre kapanır, olmazsa tekrar açılır.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self):
+        """Çağrı yapılabilirse True döner; yarı açık durumda sadece tek çağrıya izin verir."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class GroqBackend:
+    """
+    Groq sohbet API'si. Tek bir havuzlu (keep-alive) httpx istemcisi tüm çağrılarda paylaşılır;
+    yeniden deneme LLMClient'ta yapıldığı için SDK'nın kendi denemeleri kapatılır.
+    """
+
+    def __init__(self, api_key, connect_timeout=5.0, max_connections=10):
+        import httpx
+        from groq import Groq
+
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(None, connect=connect_timeout),
+        )
+        self.client = Groq(api_key=api_key, http_client=self.http_client, max_retries=0)
+
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        import httpx
+
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=httpx.Timeout(timeout, connect=min(timeout, self.http_client.timeout.connect)),
+        )
+        return response.choices[0].message.content
+
+    def is_retryable(self, error):
+        """Zaman aşımı, bağlantı hatası, 408/409/429 ve 5xx yanıtları tekrar denenir."""
+        import groq
+
+        if isinstance(error, (groq.APITimeoutError, groq.APIConnectionError)):
+            return True
+        if isinstance(error, groq.APIStatusError):
+            return error.status_code in (408, 409, 429) or error.status_code >= 500
+        return False
+
+
+class StubBackend:
+    """
+    Ağ çağrısı yapmayan, deterministik yerel arka uç (testler ve ölçümler için).
+    Notalar verilen sözlükten (verilmezse katalog dosyasının sözlüğünden) yerel çıkarıcıyla
+    bulunur; tekli ve toplu (id'li JSON liste) promptların ikisine de uygun yanıt üretir.
+    """
+
+    def __init__(self, vocabulary=None, latency=0.0):
+        self._vocabulary = vocabulary
+        self._extractor = None
+        self._lock = threading.Lock()
+        self.latency = latency
+        self.calls = 0
+
+    @property
+    def extractor(self):
+        with self._lock:
+            if self._extractor is None:
+                vocabulary = self._vocabulary
+                if vocabulary is None:
+                    from catalog import Catalog
+                    from database_utils import load_perfume_database
+                    vocabulary = Catalog.from_dicts(load_perfume_database()).notes.normalized
+                self._extractor = LocalNoteExtractor(vocabulary)
+            return self._extractor
+
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        self.calls += 1
+        if self.latency:
+            time.sleep(min(self.latency, timeout))
+        content = messages[-1]['content']
+        try:
+            items = json.loads(content)
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            results = [{"id": item.get("id"), "notes": self.extractor.find(item.get("text", ""))}
+                       for item in items if isinstance(item, dict)]
+            return json.dumps({"results": results})
+        return json.dumps({"notes": self.extractor.find(content)})
+
+    def is_retryable(self, error):
+        return False
+
+
+class LLMClient:
+    """
+    Model parametrelerini, çağrı başına süre sınırını, eşzamanlılık sınırını, rastgele
+    gecikmeli yeniden denemeyi ve devre kesiciyi tek yerde toplayan ince katman.
+    timeout, yeniden denemeler dahil bir complete() çağrısının toplam süresidir.
+    """
+
+    def __init__(self, backend, model, max_tokens=4096, temperature=0.6, timeout=20.0,
+                 max_concurrency=8, max_retries=2, retry_base_delay=0.5, retry_max_delay=4.0,
+                 circuit_breaker=None):
+        self.backend = backend
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def complete(self, messages, max_tokens=None):
+        """Mesajları modele gönderir ve yanıt metnini döndürür; başarısız olursa LLMClientError."""
+        deadline = time.monotonic() + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            raise DeadlineExceededError("LLM concurrency limit reached, request timed out while waiting.")
+        try:
+            return self._complete_with_retries(messages, max_tokens or self.max_tokens, deadline)
+        finally:
+            self._slots.release()
+
+    def _complete_with_retries(self, messages, max_tokens, deadline):
+        attempt = 0
+        while True:
+            # Süre allow()'dan önce kontrol edilir: yarı açık devrede deneme hakkını alıp
+            # çağrı yapmadan çıkmak devreyi sonsuza dek yarı açık bırakırdı
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceededError("LLM request deadline exceeded.")
+            if not self.circuit_breaker.allow():
+                raise CircuitOpenError("LLM service is unavailable (circuit open), failing fast.")
+
+            try:
+                content = self.backend.complete(messages, self.model, max_tokens, self.temperature, remaining)
+            except Exception as e:
+                retryable = self.backend.is_retryable(e)
+                if retryable:
+                    self.circuit_breaker.record_failure()
+                else:
+                    # İstek hatalı (400, 401...) ama servis yanıt veriyor; devre açılmaz
+                    self.circuit_breaker.record_success()
+                if not retryable or attempt >= self.max_retries:
+                    raise LLMClientError(f"LLM request failed: {e}") from e
+                # Full jitter: aynı anda hata alan istekler aynı anda tekrar denemesin
+                delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    raise LLMClientError(f"LLM request failed: {e}") from e
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self.circuit_breaker.record_success()
+            return (content or "").strip()
+
+
+LLM_BACKENDS = ('groq', 'stub')
+
+
+def make_llm_client(config, model=None, backend=None):
+    """
+    Config'e göre LLMClient oluşturur: LLM_BACKEND 'groq' veya 'stub' (bkz. LLM_BACKENDS).
+    model/backend verilirse Config'deki LLM_MODEL/LLM_BACKEND yerine kullanılır (ör. model karşılaştırması).
+    """
+    backend_name = backend or config.LLM_BACKEND
+    if backend_name == 'stub':
+        backend = StubBackend()
+    elif backend_name == 'groq':
+        backend = GroqBackend(config.GROQ_API_KEY, connect_timeout=config.LLM_CONNECT_TIMEOUT,
+                              max_connections=config.LLM_MAX_CONNECTIONS)
+    else:
+        raise ValueError(f"Unknown LLM backend: {backend_name!r} (expected one of {LLM_BACKENDS})")
+
+    return LLMClient(
+        backend,
+        model=model or config.LLM_MODEL,
+        max_tokens=config.LLM_MAX_TOKENS,
+        temperature=config.LLM_TEMPERATURE,
+        timeout=config.LLM_TIMEOUT,
+        max_concurrency=config.LLM_MAX_CONCURRENCY,
+        max_retries=config.LLM_MAX_RETRIES,
+        retry_base_delay=config.LLM_RETRY_BASE_DELAY,
+        retry_max_delay=config.LLM_RETRY_MAX_DELAY,
+        circuit_breaker=CircuitBreaker(config.LLM_CIRCUIT_FAILURE_THRESHOLD, config.LLM_CIRCUIT_RESET_TIMEOUT),
+    )
@@ -0,0 +1,114 @@
+import re
+from collections import deque
+
+# Olumsuzluk ifadeleri yerel çıkarıcının anlayamadığı anlam taşır ("no patchouli", "without oud");
+# böyle yorumlarda güven düşürülür ve hybrid modda LLM'e gidilir.
+NEGATION_PATTERN = re.compile(r"\b(no|not|without|never|hate|dislike|avoid|except|don't|doesn't)\b")
+
+
+class AhoCorasick:
+    """
+    Çoklu kalıp eşleştirici: tüm kalıpları metin üzerinde tek geçişte bulur.
+    Kalıp sayısından bağımsız olarak metin uzunluğu + eşleşme sayısı kadar iş yapar.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]        # düğüm -> {karakter: sonraki düğüm}
+        self.fail = [0]
+        self.outputs = [[]]     # düğüm -> bu düğümde biten kalıpların id'leri
+        self.lengths = []
+
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                node = next_node
+            self.outputs[node].append(pattern_id)
+            self.lengths.append(len(pattern))
+
+        # Başarısızlık bağlantılarını genişlik öncelikli kur
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def finditer(self, text):
+        """(başlangıç, bitiş, kalıp_id) üçlülerini metindeki sırayla üretir."""
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for pattern_id in self.outputs[node]:
+                end = position + 1
+                yield end - self.lengths[pattern_id], end, pattern_id
+
+
+def _is_word_char(char):
+    return char.isalnum()
+
+
+class LocalNoteExtractor:
+    """
+    Katalogun nota sözlüğünden kurulan, ağ çağrısı gerektirmeyen nota çıkarıcı.
+    Çok kelimeli notaları ("tonka bean", "mandarin orange") tanır; çakışan eşleşmelerde
+    en soldaki en uzun eşleşme seçilir ("lily of the valley" > "lily").
+    """
+
+    def __init__(self, vocabulary, confident_note_count=2):
+        # Tek harflik / boş notalar her metinde eşleşeceği için sözlüğe alınmaz
+        self.patterns = [note for note in vocabulary if len(note) >= 2]
+        self.matcher = AhoCorasick(self.patterns)
+        self.confident_note_count = confident_note_count
+
+    def find(self, text):
+        """Metinde geçen katalog notalarını (tekrarsız, metindeki sırayla) döndürür."""
+        text = text.lower()
+        candidates = []
+        for start, end, pattern_id in self.matcher.finditer(text):
+            # Sadece tam kelime eşleşmeleri ("rose" -> "rosewood" içinde değil)
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            candidates.append((start, end, pattern_id))
+
+        # En soldaki en uzun, çakışmayan eşleşmeler
+        candidates.sort(key=lambda match: (match[0], -(match[1] - match[0])))
+        notes = []
+        seen = set()
+        covered_until = 0
+        for start, end, pattern_id in candidates:
+            if start < covered_until:
+                continue
+            covered_until = end
+            note = self.patterns[pattern_id]
+            if note not in seen:
+                seen.add(note)
+                notes.append(note)
+        return notes
+
+    def extract(self, text):
+        """
+        (notalar, güven) döndürür. Güven 0-1 arasıdır: hiç nota yoksa 0, en az
+        confident_note_count nota bulunduysa 1; olumsuzluk ifadesi varsa yarıya iner.
+        """
+        notes = self.find(text)
+        if not notes:
+            return notes, 0.0
+        confidence = min(1.0, len(notes) / self.confident_note_count)
+        if NEGATION_PATTERN.search(text.lower()):
+            confidence *= 0.5
+        return notes, confidence
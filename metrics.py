@@ -0,0 +1,367 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+# Gecikme histogramlarının varsayılan kova sınırları (saniye)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Etiketli, sadece artan sayaç (Prometheus 'counter')."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def snapshot(self):
+        """JSON'a yazılabilir değerler: [[etiket değerleri, değer], ...]."""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def merge(self, snapshots):
+        """Birden çok sürecin snapshot()'larını toplar (samples() için)."""
+        values = {}
+        for snapshot in snapshots:
+            for labelvalues, value in snapshot:
+                key = tuple(labelvalues)
+                values[key] = values.get(key, 0) + value
+        return values
+
+    def samples(self, values=None):
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        for labelvalues, value in sorted(values.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Histogram:
+    """Etiketli gecikme histogramı (Prometheus 'histogram'; kovalar kümülatif yazılır)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}   # etiket değerleri -> [kova sayıları, toplam, adet]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][position] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        """JSON'a yazılabilir değerler: [[etiket değerleri, kova sayıları, toplam, adet], ...]."""
+        with self._lock:
+            return [[list(key), list(counts), total, count] for key, (counts, total, count) in self._series.items()]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def merge(self, snapshots):
+        """Birden çok sürecin snapshot()'larını kova kova toplar (samples() için)."""
+        series = {}
+        for snapshot in snapshots:
+            for labelvalues, counts, total, count in snapshot:
+                if len(counts) != len(self.buckets):
+                    # Farklı kova sınırlarıyla yazılmış (eski sürüm) dosya
+                    continue
+                key = tuple(labelvalues)
+                merged = series.get(key)
+                if merged is None:
+                    series[key] = [list(counts), total, count]
+                else:
+                    merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                    merged[1] += total
+                    merged[2] += count
+        return series
+
+    def samples(self, series=None):
+        if series is None:
+            with self._lock:
+                series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for labelvalues, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, labelvalues, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+    """Metriklerin listesi; render() Prometheus metin biçimini (0.0.4) üretir."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+    def render(self, snapshots=None):
+        """
+        Metin biçimini üretir. snapshots (süreçlerin snapshot() listesi) verilirse değerler
+        bu süreçlerin toplamıdır; verilmezse bu sürecin kendi değerleridir.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            values = None if snapshots is None else metric.merge([snapshot.get(metric.name, ()) for snapshot in snapshots])
+            lines.extend(metric.samples(values))
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MultiprocessDirectory:
+    """
+    Pre-fork sunucularda (gunicorn --workers N) her işçi metriklerini paylaşılan bir klasörde
+    kendi dosyasına (metrics_<pid>.json) yazar; /metrics tüm dosyaları toplayarak döndürür.
+    Böylece hangi işçi yanıt verirse versin sayaçlar tüm işçilerin toplamıdır.
+
+    Dosyalar interval saniyede bir (ve /metrics isteğinde) arka planda güncellenir. Ölmüş işçilerin
+    dosyaları bu çalıştırma boyunca toplamda kalır (sayaçlar geri gitmez); klasör açılırken
+    çalışmayan süreçlerin (ör. önceki çalıştırmadan kalan) dosyaları silinir.
+    """
+
+    def __init__(self, path, registry, interval=5.0):
+        self.path = path
+        self.registry = registry
+        self.interval = interval
+        self._pid = os.getpid()
+        self._writer_pid = None
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.remove_stale()
+
+    def _file(self, pid):
+        return os.path.join(self.path, f"metrics_{pid}.json")
+
+    def remove_stale(self):
+        for name in os.listdir(self.path):
+            if not (name.startswith("metrics_") and name.endswith(".json")):
+                continue
+            pid = name[len("metrics_"):-len(".json")]
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+    def attach(self):
+        """
+        İstek işleyen süreçte çağrılır; süreç başına bir kez periyodik yazıcıyı başlatır. Süreç
+        fork ile oluşmuşsa ana süreçten devralınan değerler (ör. ısınma sırasında ölçülenler) sıfırlanır.
+        """
+        pid = os.getpid()
+        if self._writer_pid == pid:
+            return
+        with self._lock:
+            if self._writer_pid == pid:
+                return
+            if pid != self._pid:
+                self.registry.reset()
+                self._pid = pid
+            self._writer_pid = pid
+            threading.Thread(target=self._run, name="metrics-writer", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.write()
+
+    def write(self):
+        """Bu sürecin değerlerini dosyasına atomik olarak yazar."""
+        path = self._file(os.getpid())
+        temporary = f"{path}.tmp"
+        try:
+            with open(temporary, 'w', encoding='utf-8') as file:
+                json.dump(self.registry.snapshot(), file)
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"UYARI: Metrik dosyası yazılamadı: {e}")
+
+    def read_all(self):
+        """Klasördeki tüm süreçlerin snapshot'ları (okunamayan dosyalar atlanır)."""
+        snapshots = []
+        for name in os.listdir(self.path):
+            if not (name.startswith("metrics_") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.path, name), 'r', encoding='utf-8') as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "fragrance_http_requests", "HTTP requests by endpoint and status code.", ("endpoint", "method", "status")))
+REQUEST_DURATION = registry.register(Histogram(
+    "fragrance_http_request_duration_seconds", "HTTP request latency until the response is returned.",
+    ("endpoint", "method")))
+STAGE_DURATION = registry.register(Histogram(
+    "fragrance_stage_duration_seconds", "Latency of the individual request stages.", ("stage",)))
+LLM_REQUESTS = registry.register(Counter(
+    "fragrance_llm_requests", "LLM extraction calls by outcome (ok, error, circuit_open).", ("outcome",)))
+EXTRACTIONS = registry.register(Counter(
+    "fragrance_extractions", "Note extractions by result (notes or empty).", ("result",)))
+QUERY_CACHE = registry.register(Counter(
+    "fragrance_query_cache_lookups", "Query result cache lookups by result (hit or miss).", ("result",)))
+EXTRACTION_CACHE = registry.register(Counter(
+    "fragrance_extraction_cache_lookups", "Extraction cache lookups by result (hit or miss).", ("result",)))
+
+
+@contextmanager
+def timed_stage(stage):
+    """
+    Bloğun süresini aşama histogramına yazar. İstek içindeyse süre ayrıca Server-Timing
+    başlığı için isteğe de eklenir (aynı aşama tekrar ederse süreler toplanır).
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, stage=stage)
+        _add_request_timing(stage, elapsed)
+
+
+def _add_request_timing(stage, elapsed):
+    if has_request_context():
+        timings = g.setdefault('stage_timings', {})
+        timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def lap(stage):
+    """
+    Rotalardaki düz akış için: bir önceki lap()'ten (ya da isteğin başından) bu yana
+    geçen süreyi stage aşaması olarak kaydeder. İstek dışında çağrılırsa bir şey yapmaz.
+    """
+    if not has_request_context() or 'stage_mark' not in g:
+        return
+    now = time.perf_counter()
+    elapsed = now - g.stage_mark
+    g.stage_mark = now
+    STAGE_DURATION.observe(elapsed, stage=stage)
+    _add_request_timing(stage, elapsed)
+
+
+def server_timing_header(timings):
+    """{aşama: saniye} sözlüğünü Server-Timing başlık değerine çevirir (süreler ms)."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items())
+
+
+def init_metrics(app):
+    """
+    İstek sayaçlarını, gecikme histogramını, Server-Timing başlığını ve /metrics rotasını kurar.
+    METRICS_MULTIPROCESS_DIR verilmişse /metrics tüm işçilerin toplamını döndürür (bkz. MultiprocessDirectory);
+    verilmemişse değerler sadece yanıtı veren sürecindir.
+    """
+    directory = None
+    if app.config.get('METRICS_MULTIPROCESS_DIR'):
+        directory = MultiprocessDirectory(app.config['METRICS_MULTIPROCESS_DIR'], registry,
+                                          app.config.get('METRICS_FLUSH_INTERVAL', 5.0))
+        app.extensions['metrics_directory'] = directory
+
+    @app.before_request
+    def start_request_timer():
+        if directory is not None:
+            directory.attach()
+        g.request_started = g.stage_mark = time.perf_counter()
+        g.stage_timings = {}
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or "unknown"
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        REQUEST_DURATION.observe(elapsed, endpoint=endpoint, method=request.method)
+
+        # Akış yanıtlarında başlıklar gövdeden önce gider; sadece o ana kadarki aşamalar görünür
+        timings = dict(g.get('stage_timings') or {})
+        timings['total'] = elapsed
+        response.headers.add('Server-Timing', server_timing_header(timings))
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        if directory is None:
+            text = registry.render()
+        else:
+            directory.write()
+            text = registry.render(directory.read_all())
+        return Response(text, mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+    return registry
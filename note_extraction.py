@@ -0,0 +1,310 @@
+# note_extraction.py
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import Config
+from extraction_cache import ExtractionCache, make_cache_key
+from llm_client import CircuitOpenError, DeadlineExceededError, make_llm_client
+from metrics import EXTRACTION_CACHE, LLM_REQUESTS, timed_stage
+from note_query import NoteQuery
+
+# 🔑 LLM İSTEMCİSİ BAŞLATMA
+# client objesi, bu dosya yüklendiği anda Config'den (LLM_BACKEND, LLM_MODEL, süre sınırları...) oluşturulur.
+try:
+    client = make_llm_client(Config)
+except Exception as e:
+    # Başlatma başarısız olursa, bir placeholder istemci kullanın veya loglayın.
+    print(f"ERROR: LLM client could not be initialized globally: {e}") 
+    client = None 
+
+# Nota çıkarımında kullanılan model ve prompt sürümü (önbellek anahtarının parçası).
+# Prompt değiştirildiğinde PROMPT_VERSION artırılmalı ki eski sonuçlar kullanılmasın.
+# Tekli ve toplu prompt'ların sonuçları ayrı anahtarlarla saklanır (bkz. make_cache_key).
+LLM_MODEL = Config.LLM_MODEL
+PROMPT_VERSION = 2
+
+SYSTEM_PROMPT = """You are a perfume expert. Analyze the user's comment.
+Extract the perfume notes from the comment and return them **only in English**:
+- "notes": every note the user wants or likes.
+- "required": the notes from "notes" that the user insists on (e.g. "must have oud").
+- "excluded": the notes the user does not want (e.g. "no patchouli", "without vanilla"). Never list these in "notes".
+Your response format must be strictly JSON, containing no other text or explanation. For example:
+{
+  "notes": ["bergamot", "lavender", "vanilla"],
+  "required": ["vanilla"],
+  "excluded": ["patchouli"]
+}
+Note: If no notes are found in the text, return empty lists.
+"""
+
+BATCH_SYSTEM_PROMPT = """You are a perfume expert. You will receive a JSON list of user comments, each with an "id".
+Extract the perfume notes from every comment and return them **only in English**:
+- "notes": every note the user wants or likes.
+- "required": the notes from "notes" that the user insists on (e.g. "must have oud").
+- "excluded": the notes the user does not want (e.g. "no patchouli", "without vanilla"). Never list these in "notes".
+Your response format must be strictly JSON, containing no other text or explanation. For example:
+{
+  "results": [
+    {"id": "1", "notes": ["bergamot", "lavender", "vanilla"], "required": ["vanilla"], "excluded": ["patchouli"]},
+    {"id": "2", "notes": [], "required": [], "excluded": []}
+  ]
+}
+Return exactly one entry for every id you received. If no notes are found in a comment, return empty lists for it.
+"""
+
+# 🗄️ Çıkarım önbelleği: aynı (veya önemsiz farklı) yorum için LLM tekrar çağrılmaz
+extraction_cache = ExtractionCache(
+    Config.EXTRACTION_CACHE_PATH,
+    max_entries=Config.EXTRACTION_CACHE_MAX_ENTRIES,
+    ttl=Config.EXTRACTION_CACHE_TTL,
+)
+
+
+def _cached_query(cache_key):
+    """Önbellekteki nota sorgusunu (NoteQuery) döndürür (yoksa None) ve isabet/ıskalama sayacını günceller."""
+    data = extraction_cache.get(cache_key)
+    EXTRACTION_CACHE.inc(result="miss" if data is None else "hit")
+    return None if data is None else NoteQuery.from_extraction(data)
+
+
+def _complete(messages):
+    """LLM çağrısını 'llm' aşaması olarak ölçer ve sonucunu sayar."""
+    try:
+        with timed_stage("llm"):
+            raw_output = client.complete(messages)
+    except CircuitOpenError:
+        LLM_REQUESTS.inc(outcome="circuit_open")
+        raise
+    except Exception:
+        LLM_REQUESTS.inc(outcome="error")
+        raise
+    LLM_REQUESTS.inc(outcome="ok")
+    return raw_output
+
+
+def _parse_json_object(raw_output):
+    """LLM yanıtındaki ilk JSON nesnesini ayrıştırır; bulunamazsa None döner."""
+    json_match = re.search(r'\{.*\}', raw_output, re.DOTALL)
+    if not json_match:
+        return None
+    return json.loads(json_match.group())
+
+
+def _note_messages(text):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Extract perfume notes from this comment: {text}"}
+    ]
+
+
+def extract_notes(text, also_cache_as=()):
+    """
+    Yorumdaki parfüm notalarını Groq ile (SADECE İNGİLİZCE) çıkarır; sonuçlar önbelleğe alınır.
+    İstenen, zorunlu ve hariç tutulan notalar NoteQuery olarak döner.
+    also_cache_as: sonucun ayrıca yazılacağı anahtarlar (ör. toplu çıkarımın tekli çağrıyla
+    tamamladığı yorumun toplu anahtarı; sonraki toplu çağrılar yorumu tekrar göndermez).
+    """
+    cache_key = make_cache_key(text, LLM_MODEL, PROMPT_VERSION, prompt='single')
+    cached_query = _cached_query(cache_key)
+    if cached_query is not None:
+        for extra_key in also_cache_as:
+            extraction_cache.put(extra_key, cached_query.to_dict())
+        return cached_query
+
+    # Model, max_tokens, temperature, süre sınırı ve yeniden denemeler istemcide (Config)
+    raw_output = _complete(_note_messages(text))
+
+    # 🧩 JSON yanıtı ayrıştır (SADECE İNGİLİZCE "notes", "required", "excluded" anahtarları bekleniyor)
+    try:
+        with timed_stage("llm_parse"):
+            data = _parse_json_object(raw_output)
+            if data is None:
+                raise ValueError("no JSON object in LLM response")
+            query = NoteQuery.from_extraction(data)
+    except Exception as e:
+        print(f"JSON Parsing Error: {e}")
+        # Ayrıştırılamayan (JSON içermeyen dahil) yanıtlar önbelleğe yazılmaz, bir sonraki istekte tekrar denenir
+        return NoteQuery()
+
+    for key in (cache_key, *also_cache_as):
+        extraction_cache.put(key, query.to_dict())
+
+    return query
+
+
+def extract_notes_with_client(text, llm_client):
+    """
+    extract_notes ile aynı prompt ve ayrıştırma, verilen istemciyle ve önbelleksiz
+    (model değerlendirmesi için; bkz. evaluate_models.py). LLM hataları çağırana iletilir.
+    """
+    raw_output = llm_client.complete(_note_messages(text))
+    try:
+        return NoteQuery.from_extraction(_parse_json_object(raw_output))
+    except ValueError as e:
+        print(f"JSON Parsing Error: {e}")
+        return NoteQuery()
+
+
+def estimate_tokens(text):
+    """Kaba token tahmini (İngilizce metin için ~4 karakter/token)."""
+    return len(text) // 4 + 1
+
+
+def pack_comments(items, token_budget, max_items):
+    """
+    (id, metin) çiftlerini, her paketin tahmini prompt boyutu token_budget'ı ve
+    öğe sayısı max_items'ı aşmayacak şekilde sırayla paketlere böler.
+    """
+    packs = []
+    current = []
+    current_tokens = estimate_tokens(BATCH_SYSTEM_PROMPT)
+    for item_id, text in items:
+        # id, JSON yapısı ve yanıttaki nota listeleri için öğe başına sabit pay
+        item_tokens = estimate_tokens(text) + 32
+        if current and (current_tokens + item_tokens > token_budget or len(current) >= max_items):
+            packs.append(current)
+            current = []
+            current_tokens = estimate_tokens(BATCH_SYSTEM_PROMPT)
+        current.append((item_id, text))
+        current_tokens += item_tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _extract_pack(pack):
+    """Tek bir paketi tek LLM çağrısıyla çıkarır; {id: NoteQuery} döndürür (eksik id'ler hariç)."""
+    payload = [{"id": item_id, "text": text} for item_id, text in pack]
+    raw_output = _complete([
+        {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}
+    ])
+
+    try:
+        with timed_stage("llm_parse"):
+            data = _parse_json_object(raw_output) or {}
+    except Exception as e:
+        print(f"JSON Parsing Error (batch): {e}")
+        return {}
+
+    expected_ids = {item_id for item_id, _text in pack}
+    queries_by_id = {}
+    for entry in data.get("results", []):
+        if not isinstance(entry, dict):
+            continue
+        item_id = str(entry.get("id"))
+        if item_id in expected_ids and isinstance(entry.get("notes"), list):
+            queries_by_id[item_id] = NoteQuery.from_extraction(entry)
+    return queries_by_id
+
+
+def extract_notes_batch(items, errors=None):
+    """
+    Birden çok yorumun notalarını mümkün olduğunca az LLM çağrısıyla çıkarır.
+    items: (id, metin) çiftleri. {id: NoteQuery} döndürür.
+    Önbellekte bulunanlar LLM'e gönderilmez. Paket yanıtında eksik kalan ya da paketi
+    başarısız olan yorumlar aynı havuzda tek tek çıkarılır; devre açıksa ya da süre dolduysa
+    tekli çağrı yapılmaz (başarısız servise yorum başına bir çağrı daha gitmesin). Çıkarılamayan
+    yorumlar sonuçta yer almaz, errors sözlüğü verilmişse {id: hata mesajı} olarak yazılır.
+    """
+    results = {}
+    pending = []
+    cache_keys = {}
+    for item_id, text in items:
+        cache_key = make_cache_key(text, LLM_MODEL, PROMPT_VERSION, prompt='batch')
+        cached_query = _cached_query(cache_key)
+        if cached_query is not None:
+            results[item_id] = cached_query
+        else:
+            cache_keys[item_id] = cache_key
+            pending.append((item_id, text))
+
+    if not pending:
+        return results
+
+    packs = pack_comments(pending, Config.BATCH_PROMPT_TOKEN_BUDGET, Config.BATCH_MAX_ITEMS_PER_CALL)
+    with ThreadPoolExecutor(max_workers=min(len(pending), Config.BATCH_MAX_PARALLEL_CALLS)) as executor:
+        pack_futures = {executor.submit(_extract_pack, pack): pack for pack in packs}
+        single_futures = {}
+        # Paketler bittikçe işlenir; bir paketin hatası diğerlerinin sonuçlarını düşürmez
+        for future in as_completed(pack_futures):
+            pack = pack_futures[future]
+            try:
+                queries_by_id = future.result()
+            except (CircuitOpenError, DeadlineExceededError) as e:
+                print(f"HATA: Paket çıkarımı başarısız ({len(pack)} yorum), LLM servisi kullanılamıyor: {e}")
+                if errors is not None:
+                    errors.update((item_id, str(e)) for item_id, _text in pack)
+                continue
+            except Exception as e:
+                print(f"UYARI: Paket çıkarımı başarısız ({len(pack)} yorum), yorumlar tek tek çıkarılacak: {e}")
+                queries_by_id = {}
+            for item_id, query in queries_by_id.items():
+                results[item_id] = query
+                extraction_cache.put(cache_keys[item_id], query.to_dict())
+            # Model bazı id'leri atladıysa (ya da paket başarısızsa) bunları tekli çağrıyla tamamla
+            for item_id, text in pack:
+                if item_id not in queries_by_id:
+                    future = executor.submit(extract_notes, text, (cache_keys[item_id],))
+                    single_futures[future] = item_id
+
+        for future in as_completed(single_futures):
+            item_id = single_futures[future]
+            try:
+                results[item_id] = future.result()
+            except Exception as e:
+                print(f"HATA: Yorum {item_id} için nota çıkarımı başarısız: {e}")
+                if errors is not None:
+                    errors[item_id] = str(e)
+
+    return results
+
+
+# Nota çıkarım modları:
+#   llm    - her yorum için Groq (eski davranış)
+#   local  - sadece katalog sözlüğünden yerel çıkarım (ağ çağrısı yok; zorunlu/hariç nota ayrımı yapılmaz)
+#   hybrid - önce yerel çıkarım; güven düşükse (ör. olumsuzluk ifadesi varsa) LLM'e gidilir
+EXTRACTION_MODES = ('llm', 'local', 'hybrid')
+
+
+def extract_notes_with_mode(text, mode, local_extractor):
+    """Seçilen moda göre notaları çıkarır (bkz. EXTRACTION_MODES); NoteQuery döndürür."""
+    if mode == 'llm':
+        return extract_notes(text)
+
+    local_notes, confidence = local_extractor.extract(text)
+    if mode == 'local' or confidence >= Config.LOCAL_EXTRACTOR_MIN_CONFIDENCE or client is None:
+        return NoteQuery(local_notes)
+
+    try:
+        return extract_notes(text)
+    except Exception as e:
+        # LLM yavaş/erişilemez olsa da servis yerel sonuçlarla çalışmaya devam eder
+        print(f"UYARI: LLM çıkarımı başarısız, yerel sonuç kullanılıyor: {e}")
+        return NoteQuery(local_notes)
+
+
+def extract_notes_batch_with_mode(items, mode, local_extractor, errors=None):
+    """
+    extract_notes_batch'in mod destekli sürümü: sadece yerel güveni düşük yorumlar LLM'e gider.
+    errors extract_notes_batch'teki gibidir; hybrid modda başarısız yorumlar yerel sonuçla kalır.
+    """
+    if mode == 'llm':
+        return extract_notes_batch(items, errors)
+
+    results = {}
+    uncertain = []
+    for item_id, text in items:
+        local_notes, confidence = local_extractor.extract(text)
+        results[item_id] = NoteQuery(local_notes)
+        if mode == 'hybrid' and confidence < Config.LOCAL_EXTRACTOR_MIN_CONFIDENCE:
+            uncertain.append((item_id, text))
+
+    if uncertain and client is not None:
+        try:
+            results.update(extract_notes_batch(uncertain))
+        except Exception as e:
+            print(f"UYARI: LLM toplu çıkarımı başarısız, yerel sonuçlar kullanılıyor: {e}")
+    return results
\ No newline at end of file
@@ -0,0 +1,271 @@
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import compress
+
+from catalog import PYRAMID_TIERS, TIER_FIELDS
+from database_utils import normalize_note
+from perfume_bitmap import PerfumeBitmap, ids_to_bits
+
+# NumPy isteğe bağlıdır: yüklüyse ters indeks ve kademe maskeleri tek bir sıralamayla kurulur
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Nota başına bit kümesi önbelleği (katalog notası sayısı kadar kümeyi sürekli tutmak yerine
+# sadece zorunlu/hariç koşullarda kullanılan notaların kümeleri tutulur)
+BITMAP_CACHE_SIZE = 256
+
+
+def _build_postings(records, notes):
+    """
+    Ters indeks listelerini, kademe maskelerini ve parfüm başına nota sayılarını tek geçişte,
+    kayıtların kodlanmış nota dizilerinden kurar (maske anlamı için bkz. PerfumeRecord.note_tiers).
+    """
+    normalized_of = notes.normalized_ids.__getitem__
+    postings = [array('I') for _ in notes.normalized]
+    tier_masks = [array('B') for _ in notes.normalized]
+    note_counts = array('I')
+    for perfume_id, record in enumerate(records):
+        # Aynı parfümde aynı nota birden fazla kez geçse de tek kayıt tutulur
+        normalized_ids = set(map(normalized_of, record.all))
+        for normalized_id in normalized_ids:
+            postings[normalized_id].append(perfume_id)
+            tier_masks[normalized_id].append(0)
+        for position, slot in enumerate(PYRAMID_TIERS):
+            for normalized_id in map(normalized_of, getattr(record, slot)):
+                if normalized_id in normalized_ids:
+                    tier_masks[normalized_id][-1] |= 1 << position
+        note_counts.append(len(normalized_ids))
+    return postings, tier_masks, note_counts
+
+
+def _build_postings_numpy(records, notes):
+    """
+    _build_postings ile aynı sonuç; (normalize nota id, parfüm konumu) çiftleri tek anahtar olarak
+    sıralanır, böylece her nota listesi sıralamadaki ardışık bir dilimdir. Kademe maskeleri aynı
+    anahtarların kademe dizilerindeki karşılıklarından bulunur.
+    """
+    perfume_count = len(records)
+    normalized_of = np.frombuffer(notes.normalized_ids, dtype=np.uint32).astype(np.int64)
+
+    def pair_keys(slot):
+        # normalize id * parfüm sayısı + parfüm konumu; sıralı ve tekrarsız
+        ids = [getattr(record, slot) for record in records]
+        lengths = np.fromiter(map(len, ids), dtype=np.int64, count=perfume_count)
+        note_ids = np.frombuffer(b''.join(ids), dtype=np.uint32)
+        keys = normalized_of[note_ids] * perfume_count + np.repeat(np.arange(perfume_count), lengths)
+        keys.sort()
+        return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+    keys = pair_keys('all')
+    masks = np.zeros(len(keys), dtype=np.uint8)
+    for position, slot in enumerate(PYRAMID_TIERS):
+        tier_keys = pair_keys(slot)
+        found = np.searchsorted(keys, tier_keys)
+        inside = found < len(keys)
+        found = found[inside]
+        masks[found[keys[found] == tier_keys[inside]]] |= 1 << position
+
+    normalized_ids, perfume_ids = np.divmod(keys, perfume_count)
+    perfume_ids = perfume_ids.astype(np.uint32)
+    bounds = np.searchsorted(normalized_ids, np.arange(len(notes.normalized) + 1)).tolist()
+    postings_bytes, masks_bytes = perfume_ids.tobytes(), masks.tobytes()
+    postings = [array('I', postings_bytes[4 * start:4 * end]) for start, end in zip(bounds, bounds[1:])]
+    tier_masks = [array('B', masks_bytes[start:end]) for start, end in zip(bounds, bounds[1:])]
+    note_counts = array('I', np.bincount(perfume_ids, minlength=perfume_count).astype(np.uint32).tobytes())
+    return postings, tier_masks, note_counts
+
+
+class NoteIndex:
+    """
+    Katalogdaki her benzersiz normalize nota id'sini, o notayı içeren parfümlerin
+    konumlarına eşleyen ters indeks. Katalog yüklenirken bir kez oluşturulur.
+    """
+
+    def __init__(self, catalog):
+        self.note_table = catalog.notes
+        self.vocabulary = catalog.notes.normalized
+        self._init_caches()
+        if getattr(catalog, 'postings', None) is not None:
+            # İkili katalog (binary_catalog.py) indeksi hazır getirir; yeniden kurulmaz
+            self.postings = catalog.postings
+            self.tier_masks = catalog.tier_masks
+            self.note_counts = catalog.note_counts
+            return
+
+        build = _build_postings_numpy if np is not None else _build_postings
+        postings, tier_masks, note_counts = build(list(catalog), catalog.notes)
+
+        self.postings = postings
+        # postings ile aynı sırada: o parfümde notanın geçtiği kademeler (bkz. PerfumeRecord.note_tiers);
+        # kademe ağırlıklı puanlama bunları kullanır
+        self.tier_masks = tier_masks
+        # Parfüm başına farklı (normalize) nota sayısı; Jaccard/kosinüs için
+        self.note_counts = note_counts
+
+    @classmethod
+    def from_parts(cls, note_table, postings, tier_masks, note_counts):
+        """Hazır ters indeks listelerinden (ör. artımlı güncellemeden) indeks oluşturur."""
+        note_index = cls.__new__(cls)
+        note_index.note_table = note_table
+        note_index.vocabulary = note_table.normalized
+        note_index.postings = postings
+        note_index.tier_masks = tier_masks
+        note_index.note_counts = note_counts
+        note_index._init_caches()
+        return note_index
+
+    def _init_caches(self):
+        self._bitmaps = OrderedDict()   # normalize nota id -> bit kümesi (int, LRU)
+        self._bitmaps_lock = threading.Lock()
+        self._tier_postings = {}        # normalize nota id -> [(kademe maskesi, parfüm konumları), ...]
+
+    def tier_postings(self, normalized_id):
+        """
+        Notanın ters indeks listesi kademe maskesine göre bölünmüş: [(maske, parfüm konumları), ...].
+        Maskeler yüklemede hazırdır; bölme nota başına ilk kullanımda bir kez yapılır. Notanın tüm
+        parfümlerde aynı kademede olduğu (ör. kademesiz kataloglar) durumda liste kopyalanmaz.
+        """
+        groups = self._tier_postings.get(normalized_id)
+        if groups is None:
+            postings = self.postings[normalized_id]
+            tier_masks = self.tier_masks[normalized_id]
+            masks = sorted(set(tier_masks))
+            if len(masks) <= 1:
+                groups = [(masks[0] if masks else 0, postings)]
+            else:
+                groups = [(mask, array('I', compress(postings, map(mask.__eq__, tier_masks)))) for mask in masks]
+            self._tier_postings[normalized_id] = groups
+        return groups
+
+    def resolve(self, user_note):
+        """
+        Kullanıcı notasını nota sözlüğüne karşı bir kez çözümler ve eşleşen normalize id'leri döndürür.
+        calculate_similarity ile aynı kural: tam eşleşme veya iki yönlü içerik eşleşmesi.
+        """
+        user_note = normalize_note(user_note)
+        return [normalized_id for normalized_id, note in enumerate(self.vocabulary)
+                if user_note == note or user_note in note or note in user_note]
+
+    def matching_perfumes(self, user_note):
+        """Kullanıcı notasıyla eşleşen en az bir notası olan parfümlerin konumlarını döndürür."""
+        return self.perfumes_for(self.resolve(user_note))
+
+    def perfumes_for(self, normalized_ids):
+        """Verilen normalize nota id'lerinden en az birini içeren parfümlerin konumları."""
+        perfume_ids = set()
+        for normalized_id in normalized_ids:
+            perfume_ids.update(self.postings[normalized_id])
+        return perfume_ids
+
+    def note_bits(self, normalized_id):
+        """Notayı içeren parfümlerin bit kümesi (int); ters indeks listesinden kurulur ve önbellekte tutulur."""
+        with self._bitmaps_lock:
+            bits = self._bitmaps.get(normalized_id)
+            if bits is not None:
+                self._bitmaps.move_to_end(normalized_id)
+                return bits
+        bits = ids_to_bits(self.postings[normalized_id], len(self.note_counts))
+        with self._bitmaps_lock:
+            self._bitmaps[normalized_id] = bits
+            while len(self._bitmaps) > BITMAP_CACHE_SIZE:
+                self._bitmaps.popitem(last=False)
+        return bits
+
+    def _user_note_bits(self, user_note, resolved):
+        # Kullanıcı notasıyla (resolve kuralı) eşleşen notalardan en az birini içeren parfümler
+        normalized_ids = resolved.get(user_note) if resolved else None
+        bits = 0
+        for normalized_id in normalized_ids if normalized_ids is not None else self.resolve(user_note):
+            bits |= self.note_bits(normalized_id)
+        return bits
+
+    def constraint(self, required=(), excluded=(), resolved=None):
+        """
+        Zorunlu ve hariç notaların aday kümesi (PerfumeBitmap): her zorunlu notayla eşleşen VE
+        hiçbir hariç notayla eşleşmeyen parfümler. Koşul yoksa None (tüm katalog).
+        Puanlamadan önce adaylarla kesiştirilir, böylece hariç notalı parfümler hiç puanlanmaz.
+        resolved (NoteMatch.resolved) verilirse sorguda zaten çözümlenen notalar tekrar çözümlenmez.
+        """
+        if not required and not excluded:
+            return None
+        size = len(self.note_counts)
+        bits = (1 << size) - 1
+        for user_note in dict.fromkeys(normalize_note(note) for note in required):
+            bits &= self._user_note_bits(user_note, resolved)
+        for user_note in dict.fromkeys(normalize_note(note) for note in excluded):
+            bits &= ~self._user_note_bits(user_note, resolved)
+        return PerfumeBitmap(bits, size)
+
+    def match(self, user_notes):
+        """Kullanıcı notaları için tek seferlik eşleşme maskesini (NoteMatch) hesaplar."""
+        return NoteMatch(self, user_notes)
+
+
+class NoteMatch:
+    """
+    Bir sorgunun eşleşme maskesi: hangi katalog notasının hangi kullanıcı notalarıyla
+    eşleştiği bir kez hesaplanır. Puanlama ve vurgulama aynı maskeyi kullanır,
+    böylece iç içe içerik karşılaştırması sonuç başına tekrar yapılmaz.
+    """
+
+    def __init__(self, note_index, user_notes):
+        self.note_index = note_index
+        self.user_notes_normalized = [normalize_note(note) for note in user_notes]
+
+        # Her farklı kullanıcı notası sözlüğe karşı yalnızca bir kez çözümlenir
+        self.resolved = {user_note: note_index.resolve(user_note)
+                         for user_note in set(self.user_notes_normalized)}
+
+        # normalize nota id -> eşleştiği kullanıcı notalarının konumları
+        note_mask = {}
+        for position, user_note in enumerate(self.user_notes_normalized):
+            for normalized_id in self.resolved[user_note]:
+                note_mask.setdefault(normalized_id, []).append(position)
+        self.note_mask = note_mask
+        self._perfume_sets = None
+        self._matched_counts = None
+        # Puanlayıcının sorgu başına ara sonucu (ör. SparseScorer isabet matrisi)
+        self.scorer_state = None
+
+    @property
+    def total(self):
+        return len(self.user_notes_normalized)
+
+    def perfume_sets(self):
+        """Her farklı kullanıcı notası için eşleşen parfümlerin kümesi."""
+        if self._perfume_sets is None:
+            self._perfume_sets = {user_note: self.note_index.perfumes_for(normalized_ids)
+                                  for user_note, normalized_ids in self.resolved.items()}
+        return self._perfume_sets
+
+    def matched_counts(self):
+        """Her parfüm için kaç farklı kullanıcı notasının eşleştiğini ters indeksten sayar."""
+        if self._matched_counts is None:
+            matched_counts = {}
+            for perfume_ids in self.perfume_sets().values():
+                for perfume_id in perfume_ids:
+                    matched_counts[perfume_id] = matched_counts.get(perfume_id, 0) + 1
+            self._matched_counts = matched_counts
+        return self._matched_counts
+
+    def compact(self):
+        """
+        Puanlama bittikten sonra parfüm kümelerini ve sayaçları bırakır; vurgulama için
+        gereken maske kalır. Önbellekte uzun süre tutulacak eşleşmeler için.
+        """
+        self._perfume_sets = None
+        self._matched_counts = None
+        self.scorer_state = None
+
+    def perfume_mask(self, record):
+        """Parfümün her kademesinde maskeyle eşleşen notaların konumlarını döndürür."""
+        normalized_ids = self.note_index.note_table.normalized_ids
+        note_mask = self.note_mask
+        return {
+            key: [position for position, note_id in enumerate(getattr(record, slot))
+                  if normalized_ids[note_id] in note_mask]
+            for key, slot in TIER_FIELDS
+        }
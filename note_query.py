@@ -0,0 +1,74 @@
+from database_utils import normalize_note
+
+
+def _unique(notes):
+    # Normalize hali aynı olan notaların ilk yazımı tutulur; boş notalar atılır
+    seen = set()
+    unique = []
+    for note in notes:
+        key = normalize_note(note)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(note)
+    return unique
+
+
+def _string_list(value):
+    """LLM çıktısındaki bir nota alanını metin listesine çevirir (geçersizse boş liste)."""
+    if not isinstance(value, list):
+        return []
+    return [note for note in value if isinstance(note, str)]
+
+
+class NoteQuery:
+    """
+    Bir yorumdan ya da istekten çıkan nota koşulları:
+      notes    - puanlanan notalar (herhangi biri eşleşebilir; zorunlu notalar da dahildir)
+      required - parfümde mutlaka bulunması gereken notalar ("must have oud")
+      excluded - parfümde bulunmaması gereken notalar ("no patchouli"); puanlanmaz, eler
+    Bir nota hem istenip hem hariç tutulmuşsa hariç tutma geçerlidir.
+    """
+
+    __slots__ = ('notes', 'required', 'excluded')
+
+    def __init__(self, notes=(), required=(), excluded=()):
+        self.excluded = _unique(excluded)
+        excluded_keys = {normalize_note(note) for note in self.excluded}
+        self.required = [note for note in _unique(required) if normalize_note(note) not in excluded_keys]
+
+        # Tekrarlanan notalar korunur ('matched' puanının paydası toplam nota sayısıdır)
+        notes = [note for note in notes if normalize_note(note) not in excluded_keys]
+        known = {normalize_note(note) for note in notes}
+        notes.extend(note for note in self.required if normalize_note(note) not in known)
+        self.notes = notes
+
+    @classmethod
+    def from_extraction(cls, data):
+        """LLM'in JSON yanıtından ({"notes": [...], "required": [...], "excluded": [...]}) oluşturur."""
+        if not isinstance(data, dict):
+            return cls()
+        return cls(_string_list(data.get("notes")), _string_list(data.get("required")),
+                   _string_list(data.get("excluded")))
+
+    @classmethod
+    def from_request(cls, notes, required=None, excluded=None):
+        """
+        İstekteki nota listelerinden oluşturur; listeler verilmemişse (None) boştur.
+        Liste olmayan alanlarda ValueError (mesaj istemciye gösterilir).
+        """
+        fields = {'notes': notes, 'required_notes': required, 'excluded_notes': excluded}
+        for name, value in fields.items():
+            if value is not None and not isinstance(value, list):
+                raise ValueError(f"'{name}' must be a list of notes.")
+        return cls([str(note) for note in notes or ()], [str(note) for note in required or ()],
+                   [str(note) for note in excluded or ()])
+
+    def with_constraints(self, required=(), excluded=()):
+        """İstekte ayrıca verilen zorunlu/hariç notalar eklenmiş yeni sorgu."""
+        if not required and not excluded:
+            return self
+        return NoteQuery(self.notes, self.required + list(required), self.excluded + list(excluded))
+
+    def to_dict(self):
+        """Çıkarım önbelleğinde saklanan ve LLM yanıtıyla aynı yapıdaki hali."""
+        return {"notes": list(self.notes), "required": list(self.required), "excluded": list(self.excluded)}
@@ -0,0 +1,78 @@
+"""
+Parfüm konumları üzerinde bit kümeleri.
+
+Bir bit kümesi, katalogdaki her parfüm için bir bit taşıyan Python tamsayısıdır (bit i = parfüm i).
+Kesişim, birleşim ve fark tek bir tamsayı işlemiyle (makine kelimesi başına 64 parfüm) yapılır;
+zorunlu/hariç nota koşulları bu kümeler üzerinde hesaplanır (bkz. NoteIndex.constraint).
+"""
+from array import array
+
+# NumPy isteğe bağlıdır: yüklüyse bit kümesi ile nota listeleri arasındaki dönüşümler vektörizedir
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def ids_to_bits(perfume_ids, size):
+    """Parfüm konumlarından (ör. ters indeks listesi: array('I') ya da mmap görünümü) bit kümesi kurar."""
+    if np is not None and isinstance(perfume_ids, (array, memoryview)) and len(perfume_ids) > 64:
+        mask = np.zeros(size, dtype=bool)
+        mask[np.frombuffer(perfume_ids, dtype=np.uint32)] = True
+        return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+    data = bytearray((size + 7) // 8)
+    for perfume_id in perfume_ids:
+        data[perfume_id >> 3] |= 1 << (perfume_id & 7)
+    return int.from_bytes(data, 'little')
+
+
+class PerfumeBitmap:
+    """
+    size parfümlük katalogda değişmez bir parfüm konumu kümesi. Puanlayıcılara aday filtresi
+    olarak verilir (küme gibi: len, in, iter); üyelik testi için bitler bir kez bayt dizisine açılır.
+    """
+
+    __slots__ = ('bits', 'size', '_bytes', '_count')
+
+    def __init__(self, bits, size):
+        self.bits = bits
+        self.size = size
+        self._bytes = bits.to_bytes((size + 7) // 8, 'little')
+        self._count = None
+
+    def __contains__(self, perfume_id):
+        return bool(self._bytes[perfume_id >> 3] >> (perfume_id & 7) & 1)
+
+    def __len__(self):
+        if self._count is None:
+            self._count = self.bits.bit_count()
+        return self._count
+
+    def restrict(self, counts):
+        """{parfüm_id: değer} sözlüğünü kümedeki parfümlerle sınırlar (üyelik testi satır içi yapılır)."""
+        data = self._bytes
+        return {perfume_id: value for perfume_id, value in counts.items()
+                if data[perfume_id >> 3] >> (perfume_id & 7) & 1}
+
+    def intersection(self, perfume_ids):
+        """Verilen konumlardan kümede olanlar (set)."""
+        data = self._bytes
+        return {perfume_id for perfume_id in perfume_ids if data[perfume_id >> 3] >> (perfume_id & 7) & 1}
+
+    def __iter__(self):
+        """Kümedeki konumlar, artan sırayla."""
+        if np is not None:
+            yield from self.to_mask().nonzero()[0].tolist()
+            return
+        for byte_index, byte in enumerate(self._bytes):
+            if byte:
+                base = byte_index << 3
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield base + bit
+
+    def to_mask(self):
+        """Kümenin NumPy bool maskesi (uzunluk size); NumPy gerekir."""
+        bits = np.unpackbits(np.frombuffer(self._bytes, dtype=np.uint8), bitorder='little')
+        return bits[:self.size].view(bool)
@@ -0,0 +1,138 @@
+import threading
+from array import array
+from collections import OrderedDict
+
+from flask import current_app
+
+from database_utils import normalize_note
+from metrics import QUERY_CACHE
+from scoring import DEFAULT_TIER_WEIGHTS
+
+
+def make_query_key(user_notes, metric, filters=None, required=(), excluded=(), tier_weights=None):
+    """
+    Sorgunun kanonik anahtarı: normalize edilip sıralanmış notalar, puanlama seçenekleri
+    (metrik; 'tiered' metriğinde kademe ağırlıkları), facet filtreleri ve zorunlu/hariç notalar. Farklı yorumlardan aynı notalar (farklı
+    sırada/yazımda) çıkarsa aynı anahtar oluşur. Tekrarlanan notalar korunur, çünkü
+    'matched' puanının paydası toplam nota sayısıdır.
+    """
+    return (tuple(sorted(normalize_note(note) for note in user_notes)), metric,
+            (tier_weights or DEFAULT_TIER_WEIGHTS).key() if metric == 'tiered' else None,
+            filters.key() if filters else None,
+            tuple(sorted({normalize_note(note) for note in required})),
+            tuple(sorted({normalize_note(note) for note in excluded})))
+
+
+class RankedResult:
+    """Bir sorgunun sıralaması: ilk len(ids) sonucun id, puan ve eşleşme sayıları ve facet sayımları."""
+
+    __slots__ = ('ids', 'scores', 'matched', 'total_matches', 'note_match', 'facets')
+
+    def __init__(self, top_k, total_matches, note_match, facets):
+        self.ids = array('I', [perfume_id for perfume_id, _score, _matched in top_k])
+        self.scores = array('d', [score for _perfume_id, score, _matched in top_k])
+        self.matched = array('I', [matched for _perfume_id, _score, matched in top_k])
+        self.total_matches = total_matches
+        self.note_match = note_match
+        self.facets = facets
+
+    def covers(self, end):
+        """İlk `end` sonuç bu sıralamada var mı (ya da daha fazla sonuç yok mu)?"""
+        return end <= len(self.ids) or len(self.ids) >= self.total_matches
+
+
+class QueryResultCache:
+    """
+    Sorgu sonuçları için LRU önbellek. HTML değil, sıralanmış parfüm id listeleri saklanır;
+    aynı sıralamadan tüm sayfalar dilimlenerek üretilir. Katalog snapshot'ı değiştiğinde
+    (sürüm numarası) önbellek kendiliğinden boşaltılır.
+    """
+
+    def __init__(self, max_entries=2048, rank_depth=100, facet_max_values=20):
+        self.max_entries = max_entries
+        self.rank_depth = rank_depth
+        self.facet_max_values = facet_max_values
+        self._entries = OrderedDict()   # anahtar -> RankedResult
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def page(self, snapshot, user_notes, page=1, page_size=10, metric='matched', filters=None,
+             required=(), excluded=(), tier_weights=None):
+        """
+        find_matching_perfumes_page ile aynı sonucu döndürür, ek olarak vurgulama için NoteMatch
+        ve sonuç kümesinin facet sayımları: (sayfadaki_sonuçlar, toplam_eşleşme, note_match, facets).
+        filters (facet_index.SearchFilters) verilirse sadece filtrelere uyan parfümler sıralanır.
+        required notaların hepsini içermeyen ya da excluded notalardan birini içeren parfümler
+        puanlanmadan elenir (bkz. note_query.NoteQuery). tier_weights (scoring.TierWeights) sadece
+        'tiered' metriğinde kullanılır.
+        """
+        start = (page - 1) * page_size
+        end = start + page_size
+        key = make_query_key(user_notes, metric, filters, required, excluded, tier_weights)
+
+        with self._lock:
+            if self._version != snapshot.version:
+                self._entries.clear()
+                self._version = snapshot.version
+            ranked = self._entries.get(key)
+            if ranked is not None and ranked.covers(end):
+                self._entries.move_to_end(key)
+            else:
+                ranked = None
+
+        if ranked is None:
+            QUERY_CACHE.inc(result="miss")
+            ranked = self._rank(snapshot, user_notes, metric, end, filters, required, excluded, tier_weights)
+            with self._lock:
+                if self._version == snapshot.version:
+                    self._entries[key] = ranked
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        else:
+            QUERY_CACHE.inc(result="hit")
+
+        total = ranked.note_match.total
+        database = snapshot.perfumes
+        page_items = [(database[ranked.ids[position]], ranked.scores[position], ranked.matched[position], total)
+                      for position in range(start, min(end, len(ranked.ids)))]
+        return page_items, ranked.total_matches, ranked.note_match, ranked.facets
+
+    def _rank(self, snapshot, user_notes, metric, end, filters=None, required=(), excluded=(), tier_weights=None):
+        note_match = snapshot.note_index.match(user_notes)
+        if note_match.total == 0:
+            return RankedResult([], 0, note_match, snapshot.facets.counts(()))
+        # Facet filtreleri ikincil indekslerden, zorunlu/hariç notalar nota bit kümelerinden çözülür;
+        # ikisi de nota adaylarıyla puanlamadan önce kesiştirilir
+        allowed = snapshot.facets.allowed(filters)
+        constraint = snapshot.note_index.constraint(required, excluded, note_match.resolved)
+        if constraint is not None:
+            allowed = constraint if allowed is None else constraint.intersection(allowed)
+
+        # Sonraki sayfalar da aynı sıralamadan sunulsun diye en az rank_depth sonuç sıralanır;
+        # daha derin bir sayfa istenirse sıralama rank_depth'in katlarına genişletilir
+        depth = max(self.rank_depth, 1)
+        k = -(-end // depth) * depth
+        top_k, total_matches = snapshot.scorer.top_k(note_match, metric, k, allowed, tier_weights)
+        facets = snapshot.facets.counts(snapshot.scorer.match_ids(note_match, allowed), self.facet_max_values)
+        note_match.compact()
+        return RankedResult(top_k, total_matches, note_match, facets)
+
+
+def init_query_cache(app):
+    """Uygulama için sorgu sonucu önbelleğini oluşturur."""
+    cache = QueryResultCache(
+        max_entries=app.config.get('QUERY_CACHE_MAX_ENTRIES', 2048),
+        rank_depth=app.config.get('QUERY_CACHE_RANK_DEPTH', 100),
+        facet_max_values=app.config.get('FACET_MAX_VALUES', 20),
+    )
+    app.extensions['query_cache'] = cache
+    return cache
+
+
+def get_query_cache():
+    """Aktif uygulamanın sorgu sonucu önbelleğini döndürür."""
+    return current_app.extensions['query_cache']
@@ -0,0 +1,398 @@
+import heapq
+import math
+from collections import Counter
+from itertools import repeat
+from operator import add, itemgetter, truediv
+
+from perfume_bitmap import PerfumeBitmap
+
+# NumPy isteğe bağlıdır: yüklü değilse sadece saf Python puanlayıcı kullanılır
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Seçilebilir benzerlik metrikleri:
+#   matched - eşleşen kullanıcı notası / toplam kullanıcı notası (varsayılan, eski davranış)
+#   jaccard - eşleşen / (parfüm notaları + kullanıcı notaları - eşleşen)
+#   cosine  - eşleşen / sqrt(parfüm notaları * kullanıcı notaları)
+#   idf     - nadir notaların eşleşmesi daha değerli (IDF ağırlıklı eşleşme oranı)
+#   tiered  - eşleşmeler notanın parfümdeki kademesine göre ağırlıklı (bkz. TierWeights)
+SIMILARITY_METRICS = ('matched', 'jaccard', 'cosine', 'idf', 'tiered')
+
+
+def idf_weight(document_frequency, perfume_count):
+    """Bir kullanıcı notasının ağırlığı: ne kadar az parfümde geçiyorsa o kadar yüksek."""
+    return math.log(1 + perfume_count / (1 + document_frequency))
+
+
+class TierWeights:
+    """
+    'tiered' metriğinde kademe ağırlıkları: eşleşen bir kullanıcı notası, parfümde geçtiği en
+    yüksek ağırlıklı kademe kadar sayılır (ör. kalıcılık isteyen aramada base > top). Kademesi
+    bilinmeyen eşleşmeler (kademe listeleri boş, sadece all_notes) üç ağırlığın ortalamasını alır;
+    böylece piramit bilgisi olmayan parfümler ne cezalanır ne öne çıkar.
+    Puan, en yüksek ağırlıkla tam eşleşmede 1 olacak şekilde ölçeklenir.
+    """
+
+    __slots__ = ('top', 'heart', 'base')
+
+    def __init__(self, top=0.75, heart=1.0, base=1.25):
+        self.top = float(top)
+        self.heart = float(heart)
+        self.base = float(base)
+
+    @classmethod
+    def from_request(cls, data, defaults=None):
+        """
+        İstekteki "tier_weights" nesnesini ({"top": 0.5, "heart": 1, "base": 2}) çözümler; verilmeyen
+        kademeler defaults'tan (Config.TIER_WEIGHTS) gelir. Geçersiz değerlerde ValueError.
+        """
+        weights = dict(defaults or {})
+        if data is not None:
+            if not isinstance(data, dict):
+                raise ValueError("'tier_weights' must be an object.")
+            for name, value in data.items():
+                if name not in cls.__slots__:
+                    raise ValueError(f"Unknown tier '{name}'. Choose from: {', '.join(cls.__slots__)}.")
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+                    raise ValueError(f"Tier weight '{name}' must be a number between 0 and 100.")
+                weights[name] = value
+        tier_weights = cls(**weights)
+        if not max(tier_weights.key()) > 0:
+            raise ValueError("At least one tier weight must be greater than 0.")
+        return tier_weights
+
+    def key(self):
+        """Sorgu önbelleği anahtarının parçası."""
+        return self.top, self.heart, self.base
+
+    def table(self):
+        """Kademe bit maskesi (1 top, 2 heart, 4 base) -> eşleşmenin ağırlığı; 0 = kademesi bilinmiyor."""
+        weights = self.key()
+        table = [sum(weights) / len(weights)]
+        for mask in range(1, 8):
+            table.append(max(weight for bit, weight in enumerate(weights) if mask >> bit & 1))
+        return table
+
+
+DEFAULT_TIER_WEIGHTS = TierWeights()
+
+_group_weight = itemgetter(0)
+_score_of = itemgetter(1)
+
+
+def _restrict(matched_counts, allowed):
+    """Eşleşme sayaçlarını filtrelere uyan parfümlerle sınırlar (küçük küme üzerinden dolaşılır)."""
+    if allowed is None:
+        return matched_counts
+    if isinstance(allowed, PerfumeBitmap):
+        return allowed.restrict(matched_counts)
+    if len(allowed) < len(matched_counts):
+        return {perfume_id: matched_counts[perfume_id] for perfume_id in allowed if perfume_id in matched_counts}
+    return {perfume_id: matched for perfume_id, matched in matched_counts.items() if perfume_id in allowed}
+
+
+def _ranking_key(item):
+    # Yüksek puan önce; eşit puanlarda katalog sırası (sayfalar kararlı kalır)
+    perfume_id, score, _matched = item
+    return -score, perfume_id
+
+
+def _tiered_scores(matched_counts, bests, distinct_total, top, k):
+    """
+    'tiered' puanları: (parfüm_id, puan, eşleşen) üreteci. Puan en fazla eşleşen / distinct_total
+    olabileceğinden (her nota en fazla top ağırlık alır), önce en yüksek eşleşme sayılarından en az
+    k parfüm puanlanır; daha düşük eşleşme sayıları ancak o k. puana yetişebiliyorsa eklenir.
+    """
+    def scored(low, high=None):
+        perfume_ids = [perfume_id for perfume_id, matched in matched_counts.items()
+                       if matched >= low and (high is None or matched < high)]
+        weighted = None
+        for best in bests:
+            column = map(best.get, perfume_ids, repeat(0.0))
+            weighted = column if weighted is None else map(add, weighted, column)
+        return list(zip(perfume_ids, map(truediv, weighted, repeat(distinct_total * top)),
+                        map(matched_counts.__getitem__, perfume_ids)))
+
+    if not matched_counts:
+        return []
+    level_sizes = Counter(matched_counts.values())
+    levels = sorted(level_sizes, reverse=True)
+    seen = 0
+    for floor in levels:
+        seen += level_sizes[floor]
+        if seen >= k:
+            break
+    scores = scored(floor)
+    if seen >= k and floor > levels[-1]:
+        kth = heapq.nlargest(k, map(_score_of, scores))[-1]
+        # Eşit puanlar katalog sırasıyla yarıştığından sınır dahil; küçük pay kayan nokta yuvarlaması için
+        low = max(math.ceil(kth * distinct_total - 1e-9), 1)
+        if low < floor:
+            scores.extend(scored(low, floor))
+    return scores
+
+
+class PythonScorer:
+    """Ters indeksin listeleri üzerinden, sadece aday parfümleri dolaşan puanlayıcı."""
+
+    def __init__(self, note_index):
+        self.note_index = note_index
+
+    def updated(self, note_index, catalog, changed_positions):
+        """Artımlı güncellenmiş katalog için puanlayıcı (indeks dışında durumu yoktur)."""
+        return PythonScorer(note_index)
+
+    def top_k(self, note_match, metric, k, allowed=None, tier_weights=None):
+        """
+        En iyi k sonucu [(parfüm_id, puan, eşleşen), ...] olarak ve toplam aday sayısını döndürür.
+        allowed (facet filtrelerine / nota koşullarına uyan parfüm konumları: küme ya da PerfumeBitmap)
+        verilirse adaylar puanlamadan önce bununla kesiştirilir; IDF ağırlıkları yine tüm katalogdan hesaplanır.
+        tier_weights sadece 'tiered' metriğinde kullanılır (verilmezse DEFAULT_TIER_WEIGHTS).
+        """
+        total = note_match.total
+        if total == 0:
+            return [], 0
+
+        matched_counts = _restrict(note_match.matched_counts(), allowed)
+        distinct_total = len(note_match.resolved)
+        note_counts = self.note_index.note_counts
+
+        if metric == 'matched':
+            scores = ((perfume_id, matched / total, matched)
+                      for perfume_id, matched in matched_counts.items())
+        elif metric == 'jaccard':
+            scores = ((perfume_id, matched / (note_counts[perfume_id] + distinct_total - matched), matched)
+                      for perfume_id, matched in matched_counts.items())
+        elif metric == 'cosine':
+            scores = ((perfume_id, matched / math.sqrt(note_counts[perfume_id] * distinct_total), matched)
+                      for perfume_id, matched in matched_counts.items())
+        elif metric == 'idf':
+            perfume_count = len(note_counts)
+            weighted = {}
+            weight_total = 0.0
+            for perfume_ids in note_match.perfume_sets().values():
+                weight = idf_weight(len(perfume_ids), perfume_count)
+                weight_total += weight
+                for perfume_id in perfume_ids:
+                    weighted[perfume_id] = weighted.get(perfume_id, 0.0) + weight
+            scores = ((perfume_id, weighted[perfume_id] / weight_total, matched)
+                      for perfume_id, matched in matched_counts.items())
+        elif metric == 'tiered':
+            table = (tier_weights or DEFAULT_TIER_WEIGHTS).table()
+            scores = _tiered_scores(matched_counts, self._tier_best(note_match, table),
+                                    distinct_total, max(table), k)
+        else:
+            raise ValueError(f"Unknown similarity metric: {metric}")
+
+        return heapq.nsmallest(k, scores, key=_ranking_key), len(matched_counts)
+
+    def _tier_best(self, note_match, table):
+        """
+        Her farklı kullanıcı notası için {parfüm_id: notanın o parfümdeki en ağır kademe ağırlığı}.
+        Kademeye göre bölünmüş listeler hafiften ağıra yazılır, böylece en ağır kademe kalır;
+        döngü C'de döner (dict.update), parfüm başına Python adımı yoktur.
+        """
+        bests = []
+        for normalized_ids in note_match.resolved.values():
+            groups = sorted(((table[mask], perfume_ids)
+                             for normalized_id in normalized_ids
+                             for mask, perfume_ids in self.note_index.tier_postings(normalized_id)),
+                            key=_group_weight)
+            best = {}
+            for weight, perfume_ids in groups:
+                best.update(zip(perfume_ids, repeat(weight)))
+            bests.append(best)
+        return bests
+
+    def match_ids(self, note_match, allowed=None):
+        """Filtrelere uyan tüm eşleşen parfümlerin konumları (facet sayımları için)."""
+        if note_match.total == 0:
+            return []
+        return list(_restrict(note_match.matched_counts(), allowed))
+
+
+class SparseScorer:
+    """
+    NumPy ile vektörize puanlayıcı. Katalog, yükleme sırasında parfüm x nota ikili
+    CSR matrisine (indptr, indices) çevrilir. Sorguda her farklı kullanıcı notası
+    sözlük kurallarıyla bir sorgu vektörüne açılır ve tüm parfümlerin isabetleri
+    tek bir seyrek matris-vektör çarpımıyla hesaplanır.
+    """
+
+    def __init__(self, note_index):
+        # Ters indeks (nota -> parfümler) CSC'dir; satır sıralı CSR'ye çevir
+        note_ids = np.concatenate(
+            [np.full(len(postings), note_id, dtype=np.int32)
+             for note_id, postings in enumerate(note_index.postings)]
+            or [np.zeros(0, dtype=np.int32)]
+        )
+        perfume_ids = np.concatenate(
+            [np.frombuffer(postings, dtype=np.uint32) for postings in note_index.postings]
+            or [np.zeros(0, dtype=np.uint32)]
+        )
+        tier_masks = np.concatenate(
+            [np.frombuffer(tiers, dtype=np.uint8) for tiers in note_index.tier_masks]
+            or [np.zeros(0, dtype=np.uint8)]
+        )
+        order = np.argsort(perfume_ids, kind='stable')
+        self._set_rows(note_index, note_ids[order], tier_masks[order])
+
+    def _set_rows(self, note_index, indices, tier_masks):
+        self.note_index = note_index
+        self.vocabulary_size = len(note_index.vocabulary)
+        self.row_lengths = np.frombuffer(note_index.note_counts, dtype=np.uint32).astype(np.int64)
+        self.perfume_count = len(self.row_lengths)
+        self.indices = indices
+        # indices ile aynı sırada, notanın o parfümdeki kademe maskesi ('tiered' metriği için)
+        self.tier_masks = tier_masks
+        self.indptr = np.zeros(self.perfume_count + 1, dtype=np.int64)
+        np.cumsum(self.row_lengths, out=self.indptr[1:])
+        # Boş olmayan satırların başlangıçları (satır başına maksimum için reduceat boş satırları atlamalı)
+        self.nonempty_rows = self.row_lengths > 0
+        self.row_starts = self.indptr[:-1][self.nonempty_rows]
+
+    def updated(self, note_index, catalog, changed_positions):
+        """
+        Artımlı güncellenmiş katalog için puanlayıcı. Değişmeyen satırlar eski CSR'den dilim
+        olarak kopyalanır; sadece changed_positions satırları kayıtlardan yeniden kodlanır.
+        """
+        indptr = self.indptr
+        indices, tier_masks = [], []
+
+        def copy_rows(start, end):
+            # Eski CSR'deki [start, end) satırları (katalog sonuna eklenenler eski CSR'de yoktur)
+            end = min(end, self.perfume_count)
+            if start < end:
+                indices.append(self.indices[indptr[start]:indptr[end]])
+                tier_masks.append(self.tier_masks[indptr[start]:indptr[end]])
+
+        start = 0
+        for position in sorted(changed_positions):
+            copy_rows(start, position)
+            note_tiers = catalog.records[position].note_tiers()
+            indices.append(np.fromiter(note_tiers.keys(), dtype=np.int32, count=len(note_tiers)))
+            tier_masks.append(np.fromiter(note_tiers.values(), dtype=np.uint8, count=len(note_tiers)))
+            start = position + 1
+        copy_rows(start, len(note_index.note_counts))
+
+        scorer = SparseScorer.__new__(SparseScorer)
+        scorer._set_rows(note_index,
+                         np.concatenate(indices) if indices else self.indices[:0],
+                         np.concatenate(tier_masks) if tier_masks else self.tier_masks[:0])
+        return scorer
+
+    def _row_hits(self, normalized_ids):
+        """A @ q: her parfümün sorgu vektöründeki notalardan kaçını içerdiği (CSR matris-vektör çarpımı)."""
+        query = np.zeros(self.vocabulary_size, dtype=np.int32)
+        query[normalized_ids] = 1
+        running = np.zeros(len(self.indices) + 1, dtype=np.int32)
+        np.cumsum(query[self.indices], out=running[1:])
+        return running[self.indptr[1:]] - running[self.indptr[:-1]]
+
+    def _hits(self, note_match):
+        """
+        Her farklı kullanıcı notası için hangi parfümlerin isabet aldığı (P x D) ve parfüm başına
+        eşleşen sayısı. Aynı sorguda top_k ve match_ids tekrar hesaplamasın diye eşleşmede saklanır.
+        """
+        if note_match.scorer_state is None:
+            hits = np.stack([self._row_hits(normalized_ids) > 0
+                             for normalized_ids in note_match.resolved.values()], axis=1)
+            note_match.scorer_state = hits, hits.sum(axis=1)
+        return note_match.scorer_state
+
+    def _tier_weighted(self, note_match, table):
+        """
+        PythonScorer._tier_best ile aynı ağırlıkların parfüm başına toplamı. Girdiler ağırlık sırasına
+        (1..; 0 = isabet yok) kodlanır ve her kullanıcı notası için satır maksimumu tek bir uint8
+        reduceat ile alınır; kod > 0 isabet demek olduğundan _hits ayrıca hesaplanmaz.
+        """
+        levels = sorted(set(table))
+        level_weights = np.array([0.0] + levels)
+        entry_codes = np.array([levels.index(weight) + 1 for weight in table], dtype=np.uint8)[self.tier_masks]
+        codes = []
+        for normalized_ids in note_match.resolved.values():
+            query = np.zeros(self.vocabulary_size, dtype=bool)
+            query[normalized_ids] = True
+            row_codes = np.zeros(self.perfume_count, dtype=np.uint8)
+            if len(self.row_starts):
+                row_codes[self.nonempty_rows] = np.maximum.reduceat(entry_codes * query[self.indices], self.row_starts)
+            codes.append(row_codes)
+
+        if note_match.scorer_state is None:
+            hits = np.stack(codes, axis=1) > 0
+            note_match.scorer_state = hits, hits.sum(axis=1)
+        # Notalar sırayla toplanır (PythonScorer ile aynı toplama sırası, aynı puanlar)
+        weighted = np.zeros(self.perfume_count)
+        for row_codes in codes:
+            weighted += level_weights[row_codes]
+        return weighted
+
+    def _candidates(self, matched, allowed):
+        is_candidate = matched > 0
+        if isinstance(allowed, PerfumeBitmap):
+            is_candidate &= allowed.to_mask()
+        elif allowed is not None:
+            mask = np.zeros(self.perfume_count, dtype=bool)
+            mask[np.fromiter(allowed, dtype=np.int64, count=len(allowed))] = True
+            is_candidate &= mask
+        return np.flatnonzero(is_candidate)
+
+    def top_k(self, note_match, metric, k, allowed=None, tier_weights=None):
+        """PythonScorer.top_k ile aynı sözleşme, vektörize hesaplama."""
+        total = note_match.total
+        if total == 0 or self.perfume_count == 0:
+            return [], 0
+
+        if metric == 'tiered':
+            table = (tier_weights or DEFAULT_TIER_WEIGHTS).table()
+            # Önce hesaplanır: isabetleri de doldurur
+            weighted = self._tier_weighted(note_match, table)
+        hits, matched = self._hits(note_match)
+        distinct_total = hits.shape[1]
+
+        if metric == 'matched':
+            scores = matched / total
+        elif metric == 'jaccard':
+            scores = matched / np.maximum(self.row_lengths + distinct_total - matched, 1)
+        elif metric == 'cosine':
+            scores = matched / np.sqrt(np.maximum(self.row_lengths, 1) * distinct_total)
+        elif metric == 'idf':
+            document_frequency = hits.sum(axis=0)
+            weights = np.log1p(self.perfume_count / (1 + document_frequency))
+            scores = hits @ weights / weights.sum()
+        elif metric == 'tiered':
+            scores = weighted / (distinct_total * max(table))
+        else:
+            raise ValueError(f"Unknown similarity metric: {metric}")
+
+        candidates = self._candidates(matched, allowed)
+        candidate_scores = scores[candidates]
+        if k < len(candidates):
+            # Kısmi seçim: sadece k. en yüksek puana eşit veya üstündekiler sıralanır
+            threshold = np.partition(candidate_scores, len(candidates) - k)[len(candidates) - k]
+            keep = candidate_scores >= threshold
+            selected, selected_scores = candidates[keep], candidate_scores[keep]
+        else:
+            selected, selected_scores = candidates, candidate_scores
+        order = np.lexsort((selected, -selected_scores))[:k]
+
+        return ([(int(selected[i]), float(selected_scores[i]), int(matched[selected[i]])) for i in order],
+                len(candidates))
+
+    def match_ids(self, note_match, allowed=None):
+        """PythonScorer.match_ids ile aynı sözleşme (NumPy dizisi döner)."""
+        if note_match.total == 0 or self.perfume_count == 0:
+            return []
+        _hits, matched = self._hits(note_match)
+        return self._candidates(matched, allowed)
+
+
+def make_scorer(backend, note_index):
+    """Yapılandırmadaki puanlama motorunu oluşturur ('python' veya 'numpy')."""
+    if backend == 'numpy':
+        if np is not None:
+            return SparseScorer(note_index)
+        print("UYARI: NumPy bulunamadı, saf Python puanlayıcı kullanılıyor.")
+    return PythonScorer(note_index)
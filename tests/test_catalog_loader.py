@@ -0,0 +1,103 @@
+import io
+import json
+import unittest
+
+from catalog_loader import CatalogLoadError, LoadReport, iter_json_array, normalize_perfume
+
+
+def _decode_in_chunks(text):
+    """Metni tüm parça boyutlarıyla (1..len) okur; her boyutta aynı sonucu bekleriz."""
+    return {chunk_size: list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+            for chunk_size in range(1, len(text) + 1)}
+
+
+class IterJsonArrayTest(unittest.TestCase):
+
+    def assert_decodes(self, text):
+        expected = json.loads(text)
+        for chunk_size, values in _decode_in_chunks(text).items():
+            self.assertEqual(values, expected, f"chunk_size={chunk_size}")
+
+    def test_numbers_split_at_chunk_boundary(self):
+        # "1." | "5", "2e" | "5", "-" | "3" gibi bölünmeler sayıyı kısaltmamalı
+        for text in ('[1.5,2]', '[-3,2e5,3.25E-2]', '[12345, 0.5 ,-0.0]', '[1e+10,2E-3]'):
+            self.assert_decodes(text)
+
+    def test_literals_strings_and_objects(self):
+        self.assert_decodes('[true, null, false, "a,b]", {"x": [1.5, "y"]}, []]')
+        self.assert_decodes('[ ]')
+
+    def test_records(self):
+        records = [{"brand": "Dior", "fragrance": "Sauvage", "year": 2015, "all_notes": ["Bergamot"]},
+                   {"brand": "Chanel", "fragrance": "No 5", "year": 1921.0, "all_notes": []}]
+        self.assert_decodes(json.dumps(records, indent=2))
+
+    def test_braces_inside_strings_and_nested_objects(self):
+        # Parçanın toplu çözümü son '}' karakterinden keser; kesim dize ya da iç nesne içine düşebilir
+        self.assert_decodes('[{"a": "x}, {"}, {"b": {"c": {"d": "}]"}}, "e": "}"}, 3, {"f": []}]')
+
+    def test_truncated_file(self):
+        for text in ('[1.5', '[{"a": 1}', '[{"a": 1},', '[{"a": '):
+            with self.assertRaises(CatalogLoadError):
+                list(iter_json_array(io.StringIO(text), chunk_size=2))
+
+    def test_not_an_array(self):
+        with self.assertRaises(CatalogLoadError):
+            list(iter_json_array(io.StringIO('{"a": 1}')))
+
+    def test_trailing_comma(self):
+        for text in ('[1,]', '[{"a": 1}, ]', '[1,\n]'):
+            with self.assertRaises(CatalogLoadError):
+                list(iter_json_array(io.StringIO(text), chunk_size=2))
+
+    def test_data_after_array(self):
+        for text in ('[1][2]', '[{"a": 1}] x', '[1]\n,'):
+            with self.assertRaises(CatalogLoadError):
+                list(iter_json_array(io.StringIO(text), chunk_size=2))
+        self.assert_decodes('[1, 2]\n  \n')
+
+    def test_missing_separator(self):
+        with self.assertRaises(CatalogLoadError):
+            list(iter_json_array(io.StringIO('[1 2]')))
+
+
+class NormalizePerfumeTest(unittest.TestCase):
+
+    def test_normalizes_fields(self):
+        report = LoadReport()
+        perfume = normalize_perfume({
+            "brand": " Dior ", "fragrance": "Sauvage", "concentration": None, "year": "Belirtilmemiş",
+            "top_notes": "Bergamot, Pepper", "heart_notes": [" Lavender", ""], "base_notes": [],
+            "all_notes": [],
+        }, report)
+        self.assertEqual(perfume["brand"], "Dior")
+        self.assertEqual(perfume["concentration"], "")
+        self.assertIsNone(perfume["year"])
+        self.assertEqual(perfume["top_notes"], ["Bergamot", "Pepper"])
+        self.assertEqual(perfume["heart_notes"], ["Lavender"])
+        self.assertEqual(perfume["all_notes"], ["Bergamot", "Pepper", "Lavender"])
+        self.assertEqual(perfume["notes_count"], 3)
+
+    def test_clean_record_matches_general_path(self):
+        # Scrape sırasındaki temiz kayıt hızlı yoldan, sırası farklı kopyası genel yoldan geçer
+        raw = {"brand": "Dior", "fragrance": "Sauvage", "concentration": "EDT", "year": "2015",
+               "top_notes": ["Bergamot"], "heart_notes": [], "base_notes": ["Ambroxan"],
+               "all_notes": ["Bergamot", "Ambroxan"], "notes_count": 0, "source_url": "u1", "scraped_date": ""}
+        reordered = dict(reversed(list(raw.items())))
+        fast_report, slow_report = LoadReport(), LoadReport()
+        fast = normalize_perfume(raw, fast_report)
+        slow = normalize_perfume(reordered, slow_report)
+        self.assertEqual(list(fast.items()), list(slow.items()))
+        self.assertEqual(fast["year"], 2015)
+        self.assertEqual(fast["notes_count"], 2)
+        self.assertEqual(fast_report.normalized, slow_report.normalized)
+
+    def test_drops_invalid_records(self):
+        report = LoadReport()
+        self.assertIsNone(normalize_perfume(["not", "a", "record"], report))
+        self.assertIsNone(normalize_perfume({"brand": "Dior", "fragrance": " "}, report))
+        self.assertEqual(report.dropped, {"not_an_object": 1, "missing_fragrance": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
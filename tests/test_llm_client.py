@@ -0,0 +1,55 @@
+import time
+import unittest
+
+from llm_client import CircuitBreaker, CircuitOpenError, LLMClient, LLMClientError
+
+
+class FlakyBackend:
+    """fail True iken tekrar denenebilir hata veren sahte arka uç."""
+
+    def __init__(self):
+        self.fail = True
+        self.calls = 0
+
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        self.calls += 1
+        if self.fail:
+            raise TimeoutError("backend down")
+        return "ok"
+
+    def is_retryable(self, error):
+        return True
+
+
+class CircuitBreakerRecoveryTest(unittest.TestCase):
+
+    def test_expired_deadline_does_not_hold_half_open_trial(self):
+        backend = FlakyBackend()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        client = LLMClient(backend, "model", timeout=5.0, max_retries=0, circuit_breaker=breaker)
+        expired = LLMClient(backend, "model", timeout=0.0, max_retries=0, circuit_breaker=breaker)
+        messages = [{"role": "user", "content": "x"}]
+
+        # Kapalı -> açık
+        with self.assertRaises(LLMClientError):
+            client.complete(messages)
+        self.assertEqual(breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            client.complete(messages)
+
+        # Yarı açık: süresi dolmuş çağrı deneme hakkını tüketmemeli
+        time.sleep(0.02)
+        self.assertEqual(breaker.state, 'half-open')
+        with self.assertRaises(LLMClientError) as raised:
+            expired.complete(messages)
+        self.assertNotIsInstance(raised.exception, CircuitOpenError)
+        self.assertEqual(backend.calls, 1)
+
+        # Servis düzeldi: deneme çağrısı yapılır ve devre kapanır
+        backend.fail = False
+        self.assertEqual(client.complete(messages), "ok")
+        self.assertEqual(breaker.state, 'closed')
+
+
+if __name__ == "__main__":
+    unittest.main()
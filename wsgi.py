@@ -0,0 +1,9 @@
+# wsgi.py
+# Üretim giriş noktası. Pre-fork sunucuda uygulama ana süreçte bir kez oluşturulmalı:
+#     gunicorn --preload --workers 4 wsgi:app
+# /metrics tüm işçilerin toplamını döndürür: işçiler metriklerini METRICS_MULTIPROCESS_DIR klasörüne yazar.
+
+from app import create_app
+from config import ProductionConfig
+
+app = create_app(ProductionConfig)